@@ -0,0 +1,100 @@
+"""
+Applicant-query benchmark: resume-first scan vs job-first candidate pruning.
+
+The scan query is the original eligible_applicants() expanded query, which
+starts from every (Resume)-[:HAS]->(Skill) edge; the pruned one is what
+eligible_applicants() runs now. Both are run against the same jobs, results
+are checked to be identical, and per-query latency is reported.
+
+Build a large graph first, e.g. 100k resumes (PDFs skipped to save time):
+    python synthetic_data.py --resumes 100000 --jobs 2000 --skills 800 --no-pdfs
+
+Usage (from the backend folder, with MongoDB and Neo4j running):
+    python bench_applicants.py --jobs 20 --repeat 3
+"""
+import argparse
+import random
+import statistics
+import time
+
+import connections
+from main import (
+    db,
+    neo4j_driver,
+    eligible_applicants,
+    ensure_graph_indexes,
+)
+
+SCAN_QUERY = """
+    MATCH (j:Job {id:$job_id})-[:REQUIRES]->(js:Skill)
+    WITH j, collect(DISTINCT js) AS jobSkills
+    MATCH (r:Resume)-[:HAS]->(rs:Skill)
+    WITH j, r, jobSkills, rs,
+         CASE WHEN rs IN jobSkills THEN 1 ELSE 0 END AS directMatch
+    WITH j, r, jobSkills, rs, directMatch
+    OPTIONAL MATCH (rs)-[rel:RELATED_TO|IS_A]-(js_related)
+    WHERE js_related IN jobSkills AND directMatch = 0
+      AND (type(rel) = 'RELATED_TO' OR startNode(rel) = rs)
+    WITH j, r, rs, directMatch,
+         CASE WHEN js_related IS NOT NULL THEN 1 ELSE 0 END AS relatedMatch
+    WITH r, SUM(directMatch) AS directScore, SUM(relatedMatch) AS relatedScore
+    WHERE directScore + relatedScore > 0
+    RETURN r.id AS resume_id, (directScore * 1.0) + (relatedScore * 0.5) AS weightedScore,
+           directScore, relatedScore
+"""
+
+
+def run_scan(job_id):
+    with neo4j_driver.session() as session:
+        return [dict(record) for record in session.run(SCAN_QUERY, job_id=job_id)]
+
+
+def run_pruned(job_id):
+    return eligible_applicants(job_id)
+
+
+def _scores(rows):
+    return {row["resume_id"]: (row["directScore"], row["relatedScore"]) for row in rows}
+
+
+def _timed(fn, job_id, repeat):
+    timings, rows = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn(job_id)
+        timings.append(time.perf_counter() - start)
+    return min(timings), rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark resume-first vs job-first applicant queries.")
+    parser.add_argument("--jobs", type=int, default=20, help="number of random jobs to query")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per job and query (best is kept)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    ensure_graph_indexes()
+    with neo4j_driver.session() as session:
+        resumes = session.run("MATCH (r:Resume) RETURN count(r) AS n").single()["n"]
+        has_edges = session.run("MATCH (:Resume)-[h:HAS]->() RETURN count(h) AS n").single()["n"]
+    job_ids = [str(d["_id"]) for d in db["JD_skills"].find({}, {"_id": 1})]
+    job_ids = random.Random(args.seed).sample(job_ids, min(args.jobs, len(job_ids)))
+    print(f"Graph: {resumes} resumes, {has_edges} HAS edges. Querying {len(job_ids)} jobs x {args.repeat}.")
+
+    scan_times, pruned_times, mismatches = [], [], 0
+    for job_id in job_ids:
+        t_scan, scan_rows = _timed(run_scan, job_id, args.repeat)
+        t_pruned, pruned_rows = _timed(run_pruned, job_id, args.repeat)
+        scan_times.append(t_scan)
+        pruned_times.append(t_pruned)
+        if _scores(scan_rows) != _scores(pruned_rows):
+            mismatches += 1
+            print(f"  ❌ Results differ for job {job_id}")
+
+    print("\n============================")
+    print(f" Resume-first scan  : median {statistics.median(scan_times) * 1000:8.1f} ms   max {max(scan_times) * 1000:8.1f} ms")
+    print(f" Job-first pruning  : median {statistics.median(pruned_times) * 1000:8.1f} ms   max {max(pruned_times) * 1000:8.1f} ms")
+    print(f" Speedup (median)   : {statistics.median(scan_times) / max(statistics.median(pruned_times), 1e-9):.1f}x")
+    print(f" Identical results  : {len(job_ids) - mismatches}/{len(job_ids)} jobs")
+    print("============================")
+    connections.close_all()
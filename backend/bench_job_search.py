@@ -0,0 +1,71 @@
+"""
+Job search latency benchmark for /jobs/search (search_jobs in main.py).
+
+Builds (or loads) this process's "jobs" text index, then times a mix of
+queries drawn from the stored jobs: one and two title words, a skill filter,
+and both combined. Reports p50/p95/p99 per query kind against the target.
+
+Load a large job set first, e.g. 100k jobs (PDFs skipped to save time):
+    python synthetic_data.py --resumes 1000 --jobs 100000 --skills 800 --no-pdfs
+
+Usage (from the backend folder, with MongoDB running):
+    python bench_job_search.py --queries 200 --target-ms 10
+"""
+import argparse
+import random
+import statistics
+import time
+
+import connections
+import text_index
+from main import db, get_text_index, search_jobs
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def build_queries(rng, count):
+    sample = list(db["JD_skills"].aggregate([{"$sample": {"size": min(count, 1000)}},
+                                             {"$project": {"job_title": 1, "skills": 1}}]))
+    queries = {"one term": [], "two terms": [], "skill filter": [], "terms + skill": []}
+    for _ in range(count):
+        job = rng.choice(sample)
+        words = text_index.tokenize(job.get("job_title", "")) or ["engineer"]
+        skill = rng.choice(job.get("skills") or ["Python"])
+        queries["one term"].append((rng.choice(words), []))
+        queries["two terms"].append((" ".join(rng.sample(words, min(2, len(words)))), []))
+        queries["skill filter"].append(("", [skill]))
+        queries["terms + skill"].append((rng.choice(words), [skill]))
+    return queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /jobs/search latency.")
+    parser.add_argument("--queries", type=int, default=200, help="queries per kind")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = get_text_index("jobs")
+    print(f"Index ready in {time.perf_counter() - start:.1f}s: {index.stats()}")
+
+    worst_p95 = 0.0
+    print("\n============================")
+    for kind, queries in build_queries(random.Random(args.seed), args.queries).items():
+        timings, totals = [], []
+        for q, skills in queries:
+            t0 = time.perf_counter()
+            total, _ = search_jobs(q, skills, page=1, page_size=args.page_size)
+            timings.append((time.perf_counter() - t0) * 1000)
+            totals.append(total)
+        p95 = _percentile(timings, 95)
+        worst_p95 = max(worst_p95, p95)
+        print(f" {kind:<14}: p50 {statistics.median(timings):6.2f} ms  p95 {p95:6.2f} ms  "
+              f"p99 {_percentile(timings, 99):6.2f} ms  (median {int(statistics.median(totals))} matches)")
+    print("============================")
+    print(f"{'✅' if worst_p95 <= args.target_ms else '❌'} worst p95 {worst_p95:.2f} ms (target {args.target_ms} ms)")
+    connections.close_all()
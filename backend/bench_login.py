@@ -0,0 +1,83 @@
+"""
+Login throughput benchmark: before vs after session tokens.
+
+Before: /login/ ran bcrypt verify on FastAPI's shared thread pool (40 threads,
+also serving every sync endpoint), and nothing after login proved identity.
+After: bcrypt runs on a dedicated, bounded process pool, and each later
+request is authenticated with one HMAC token check.
+
+Runs in-process (no server, no database) so it measures the auth cost only.
+
+Usage (from the backend folder):
+    python bench_login.py --logins 200 --requests-per-login 20
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import security
+
+
+async def _run_all(executor, fn, args_list):
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(executor, fn, *args) for args in args_list))
+
+
+def bench_threadpool_bcrypt(hashed, n, threads=40):
+    """Old behaviour: bcrypt verify in the shared threadpool."""
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        results = asyncio.run(_run_all(pool, security.verify_password, [("benchmark-password", hashed)] * n))
+        elapsed = time.perf_counter() - start
+    assert all(results)
+    return elapsed
+
+
+def bench_processpool_bcrypt(hashed, n):
+    """New login path: bcrypt verify on the dedicated process pool."""
+    async def run():
+        # Warm the pool so worker start-up isn't counted
+        await security.verify_password_async("benchmark-password", hashed)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(security.verify_password_async("benchmark-password", hashed) for _ in range(n)))
+        return time.perf_counter() - start, results
+
+    elapsed, results = asyncio.run(run())
+    security.shutdown_bcrypt_pool()
+    assert all(results)
+    return elapsed
+
+
+def bench_token_checks(n):
+    """New per-request path: HMAC token verification."""
+    token = security.create_session_token("benchmark-user", "user")
+    start = time.perf_counter()
+    for _ in range(n):
+        assert security.verify_session_token(token)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark login and per-request auth cost.")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--requests-per-login", type=int, default=20,
+                        help="token-authenticated requests per session")
+    args = parser.parse_args()
+
+    hashed = security.hash_password("benchmark-password")
+    total_requests = args.logins * args.requests_per_login
+    print(f"bcrypt pool workers: {security.BCRYPT_WORKERS}, scheme: {security.pwd_context.identify(hashed)}")
+
+    t_thread = bench_threadpool_bcrypt(hashed, args.logins)
+    t_process = bench_processpool_bcrypt(hashed, args.logins)
+    t_token = bench_token_checks(total_requests)
+
+    print("\n============================")
+    print(f" Logins/s, bcrypt on shared threadpool : {args.logins / t_thread:10.1f}")
+    print(f" Logins/s, bcrypt on process pool      : {args.logins / t_process:10.1f}")
+    print(f" Token checks/s (HMAC)                 : {total_requests / t_token:10.0f}")
+    print("----------------------------")
+    print(f" Cost to authenticate one request: bcrypt {t_thread / args.logins * 1000:.1f} ms (amortized), "
+          f"token {t_token / total_requests * 1e6:.1f} µs")
+    print("============================")
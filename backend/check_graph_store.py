@@ -0,0 +1,201 @@
+"""
+GraphStore conformance check: loads one small fixture graph into a store and
+checks every operation (upserts, relations, closure, recommend in all graph
+modes, eligible, explain, explore) against the same expected results, so the
+Neo4j and in-memory backends are held to one contract.
+
+The fixture uses its own ids and "Conformance ..." skill names, refreshes the
+closure only around its own skills and deletes its nodes afterwards, so it
+can run against a shared Neo4j database.
+
+Usage (from the backend folder):
+    python check_graph_store.py                     # in-memory store, no services needed
+    python check_graph_store.py --backend neo4j     # Neo4j from .env
+    python check_graph_store.py --backend all
+"""
+import argparse
+import sys
+
+import graph_store
+
+PREFIX = "Conformance"
+CLOSURE = {"max_hops": 3, "top_k": 25, "decay": 0.5}
+SCORING = {"max_hops": 2, "hop_decay": 0.5, "related_weight": 0.5, "use_confidence": True}
+
+
+def skill(name):
+    return f"{PREFIX} {name}"
+
+
+def job_id(n):
+    return f"conformance-job-{n}"
+
+
+def resume_id(n):
+    return f"conformance-resume-{n}"
+
+
+def load_fixture(store):
+    S = skill
+    store.upsert_jobs([
+        {"id": job_id(1), "title": "Backend", "skills": [S("python"), S("flask")]},
+        {"id": job_id(2), "title": "Frontend", "skills": [S("react"), S("css")]},
+        {"id": job_id(3), "title": "Data", "skills": [S("python"), S("pandas"), S("sql")]},
+    ])
+    # Upserting a job again adds REQUIRES edges and keeps the old ones
+    store.upsert_jobs([{"id": job_id(1), "title": "Backend engineer", "skills": [S("sql")]}])
+    store.upsert_resumes([
+        {"id": resume_id(1), "name": "Ada", "file_id": "f1", "email": "ada@example.com", "phone": "1",
+         "summary": "Python developer", "skills": [S("python"), S("django")]},
+        {"id": resume_id(2), "name": "Bob", "file_id": "f2", "email": "bob@example.com", "phone": "2",
+         "summary": "Web developer", "skills": [S("vue"), S("css")]},
+        {"id": resume_id(3), "name": "Cy", "file_id": "f3", "email": "cy@example.com", "phone": "3",
+         "summary": "Analyst", "skills": [S("numpy"), S("sql")]},
+        {"id": resume_id(4), "name": "Dee", "file_id": "f4", "email": "dee@example.com", "phone": "4",
+         "summary": "To be deleted", "skills": [S("python")]},
+    ])
+    # Upserting a resume again replaces its HAS edges
+    store.upsert_resumes([{"id": resume_id(3), "name": "Cy", "file_id": "f3", "email": "cy@example.com",
+                           "phone": "3", "summary": "Analyst", "skills": [S("numpy"), S("sql"), S("python")]}])
+    store.delete_resume(resume_id(4))
+    written = store.add_relations([
+        {"from": S("django"), "to": S("flask"), "relation_type": "RELATED_TO", "confidence": 0.9},
+        {"from": S("flask"), "to": S("web framework"), "relation_type": "IS_A", "confidence": 0.95},
+        {"from": S("django"), "to": S("web framework"), "relation_type": "IS_A", "confidence": 0.9},
+        {"from": S("vue"), "to": S("react"), "relation_type": "RELATED_TO", "confidence": 0.8},
+        {"from": S("numpy"), "to": S("pandas"), "relation_type": "RELATED_TO", "confidence": 0.7},
+        {"from": S("pandas"), "to": S("python"), "relation_type": "IS_A", "confidence": 0.6},
+        # Same undirected pair: merges into the existing edge with the new confidence
+        {"from": S("pandas"), "to": S("numpy"), "relation_type": "RELATED_TO", "confidence": 0.75},
+        {"from": S("x"), "to": S("y"), "relation_type": "PART_OF", "confidence": 0.9},  # invalid type, ignored
+    ])
+    fixture_skills = [S(name) for name in ("python", "flask", "react", "css", "pandas", "sql", "django", "vue",
+                                           "numpy", "web framework")]
+    refreshed = store.refresh_similarity(fixture_skills, built_at="2024-01-01T00:00:00", **CLOSURE)
+    return written, refreshed
+
+
+def _round(rows):
+    return [{k: round(v, 6) if isinstance(v, float) else v for k, v in row.items()} for row in rows]
+
+
+def _scores(rows, key):
+    return [(row[key], round(row["weightedScore"], 6), row["directScore"], row["relatedScore"]) for row in rows]
+
+
+EXPECTED = {
+    "recommend_expanded_r1": [(job_id(1), 1.5, 1, 1), (job_id(3), 1.0, 1, 0)],
+    "recommend_direct_r3": [(job_id(1), 2.0, 2, 0), (job_id(3), 2.0, 2, 0)],  # tie: by id
+    "recommend_expanded_r2": [(job_id(2), 1.5, 1, 1)],
+    "recommend_multihop_r1": [(job_id(1), 1.45, 1, 1), (job_id(3), 1.0, 1, 0)],
+    "recommend_multihop_r3": [(job_id(3), 2.375, 2, 1), (job_id(1), 2.0, 2, 0)],
+    "eligible_expanded_j1": [(resume_id(3), 2.0, 2, 0), (resume_id(1), 1.5, 1, 1)],
+    "eligible_expanded_j3": [(resume_id(3), 2.5, 2, 1), (resume_id(1), 1.0, 1, 0)],
+    "eligible_multihop_j1": [(resume_id(3), 2.0, 2, 0), (resume_id(1), 1.45, 1, 1)],
+    "explain_r1_j1": [
+        {"candidateSkill": skill("python"), "jobSkill": skill("python"), "pathLength": 0, "relations": []},
+        {"candidateSkill": skill("django"), "jobSkill": skill("flask"), "pathLength": 1, "relations": ["RELATED_TO"]},
+    ],
+    "explore_pandas": [
+        {"skill": skill("python"), "type": "IS_A", "confidence": 0.6, "direction": "out"},
+        {"skill": skill("numpy"), "type": "RELATED_TO", "confidence": 0.75, "direction": "in"},
+    ],
+    "explore_web_framework": [
+        {"skill": skill("flask"), "type": "IS_A", "confidence": 0.95, "direction": "in"},
+        {"skill": skill("django"), "type": "IS_A", "confidence": 0.9, "direction": "in"},
+    ],
+}
+
+
+def run_checks(store):
+    """Returns a list of failure messages (empty = conformant)."""
+    failures = []
+
+    def check(name, actual, expected):
+        if actual != expected:
+            failures.append(f"{name}: expected {expected}, got {actual}")
+
+    written, refreshed = load_fixture(store)
+    check("add_relations count (invalid type skipped)", written, 7)
+    check("refresh_similarity sources", refreshed, 10)
+
+    # Ties are broken by id, so the order is part of the contract too
+    expanded_r1 = _scores(store.recommend(resume_id(1), limit=5, mode="expanded", **SCORING), "job_id")
+    check("recommend expanded r1", expanded_r1, EXPECTED["recommend_expanded_r1"])
+    check("recommend direct r3", _scores(store.recommend(resume_id(3), limit=5, mode="direct", **SCORING), "job_id"),
+          EXPECTED["recommend_direct_r3"])
+    check("recommend expanded r2", _scores(store.recommend(resume_id(2), limit=5, mode="expanded", **SCORING), "job_id"),
+          EXPECTED["recommend_expanded_r2"])
+    check("recommend limit", len(store.recommend(resume_id(3), limit=1, mode="expanded", **SCORING)), 1)
+    check("recommend multihop r1", _scores(store.recommend(resume_id(1), limit=5, mode="multihop", **SCORING), "job_id"),
+          EXPECTED["recommend_multihop_r1"])
+    check("recommend multihop r3", _scores(store.recommend(resume_id(3), limit=5, mode="multihop", **SCORING), "job_id"),
+          EXPECTED["recommend_multihop_r3"])
+    for mode in graph_store.SCORING_MODES:
+        ids = [resume_id(n) for n in (1, 2, 3, 4)]
+        check(f"recommend_many {mode}", store.recommend_many(ids, limit=5, mode=mode, **SCORING),
+              {rid: store.recommend(rid, limit=5, mode=mode, **SCORING) for rid in ids})
+    check("recommend deleted resume", store.recommend(resume_id(4), limit=5, mode="expanded", **SCORING), [])
+    check("recommend unknown resume", store.recommend("conformance-missing", limit=5, mode="expanded", **SCORING), [])
+
+    eligible_j1 = store.eligible(job_id(1), mode="expanded", **SCORING)
+    check("eligible expanded j1", _scores(eligible_j1, "resume_id"),
+          EXPECTED["eligible_expanded_j1"])
+    check("eligible resume fields", {k: eligible_j1[-1][k] for k in ("resume_name", "file_id", "email", "phone", "summary")},
+          {"resume_name": "Ada", "file_id": "f1", "email": "ada@example.com", "phone": "1", "summary": "Python developer"})
+    check("eligible expanded j3", _scores(store.eligible(job_id(3), mode="expanded", **SCORING), "resume_id"),
+          EXPECTED["eligible_expanded_j3"])
+    check("eligible multihop j1", _scores(store.eligible(job_id(1), mode="multihop", **SCORING), "resume_id"),
+          EXPECTED["eligible_multihop_j1"])
+    no_confidence = _scores(store.eligible(job_id(1), mode="multihop", **{**SCORING, "use_confidence": False}),
+                            "resume_id")
+    check("eligible multihop j1 without confidence", no_confidence,
+          [(resume_id(3), 2.0, 2, 0), (resume_id(1), 1.5, 1, 1)])
+
+    check("explain r1 j1", _round(store.explain(resume_id(1), job_id(1))), EXPECTED["explain_r1_j1"])
+    check("explain r2 j1", store.explain(resume_id(2), job_id(1)), [])
+    check("direct overlap r1 j1", store.direct_overlap(resume_id(1), job_id(1)), True)
+    check("direct overlap r2 j1", store.direct_overlap(resume_id(2), job_id(1)), False)
+    check("resume skill names", {rid: sorted(names) for rid, names in
+                                 store.resume_skill_names([resume_id(3), resume_id(4)]).items()},
+          {resume_id(3): sorted([skill("numpy"), skill("sql"), skill("python")])})
+    check("explore pandas", _round(store.explore(skill("pandas"))), EXPECTED["explore_pandas"])
+    check("explore web framework", _round(store.explore(skill("web framework"))), EXPECTED["explore_web_framework"])
+    check("explore limit", len(store.explore(skill("web framework"), limit=1)), 1)
+    check("explore unknown", store.explore(skill("unknown")), [])
+    return failures
+
+
+def cleanup_neo4j(driver):
+    with driver.session() as session:
+        session.run("""
+            MATCH (n) WHERE (n:Job OR n:Resume) AND n.id STARTS WITH 'conformance-'
+               OR n:Skill AND n.name STARTS WITH $prefix
+            DETACH DELETE n
+        """, prefix=f"{PREFIX} ").consume()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the GraphStore conformance checks.")
+    parser.add_argument("--backend", choices=["memory", "neo4j", "all"], default="memory")
+    args = parser.parse_args()
+
+    backends = ["memory", "neo4j"] if args.backend == "all" else [args.backend]
+    failed = False
+    for backend in backends:
+        if backend == "memory":
+            failures = run_checks(graph_store.InMemoryGraphStore())
+        else:
+            import connections
+            try:
+                cleanup_neo4j(connections.neo4j_driver)
+                failures = run_checks(graph_store.Neo4jGraphStore(connections.neo4j_driver))
+            finally:
+                cleanup_neo4j(connections.neo4j_driver)
+                connections.close_all()
+        print(f"{'❌' if failures else '✅'} {backend}: {'conformant' if not failures else f'{len(failures)} failures'}")
+        for failure in failures:
+            print(f"   - {failure}")
+        failed = failed or bool(failures)
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,86 @@
+"""
+Import-time budget check for the API module.
+
+Imports main.py in a fresh interpreter with no GEMINI_API_KEY and database URIs
+that point nowhere, then fails if the import is slower than the budget or if
+any client was created. Prints the slowest imports (python -X importtime) so a
+regression points at its cause.
+
+Usage (from the backend folder):
+    python check_import_time.py --budget 2.0 --runs 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROBE = (
+    "import time; t = time.perf_counter(); import main; elapsed = time.perf_counter() - t; "
+    "print(elapsed); "
+    "print(','.join(r._name for r in (main.mongo_client, main.db, main.fs, main.neo4j_driver) if r._initialized())); "
+    "print(main.connections.gemini_configured())"
+)
+
+
+def _offline_env():
+    env = dict(os.environ)
+    env.pop("GEMINI_API_KEY", None)
+    # Unreachable endpoints: if anything connects at import, the run hangs or errors
+    env["MONGO_URI"] = "mongodb://127.0.0.1:1"
+    env["NEO4J_URI"] = "bolt://127.0.0.1:1"
+    return env
+
+
+def measure_import(env):
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, timeout=60)
+    if out.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{out.stderr}")
+    elapsed, initialized, gemini = out.stdout.strip().splitlines()[-3:]
+    return float(elapsed), [name for name in initialized.split(",") if name], gemini == "True"
+
+
+def slowest_imports(env, top=10):
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         env=env, capture_output=True, text=True, timeout=60)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:   self [us] | cumulative | imported package"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if importing main.py exceeds the time budget.")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("IMPORT_BUDGET_SECONDS", "2.0")),
+                        help="max seconds for 'import main' (best of --runs)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    env = _offline_env()
+    results = [measure_import(env) for _ in range(args.runs)]
+    best = min(elapsed for elapsed, _, _ in results)
+    initialized = sorted({name for _, names, _ in results for name in names})
+    gemini_configured = any(gemini for _, _, gemini in results)
+
+    print("\n============================")
+    print(f" import main (best of {args.runs}): {best:.3f}s  budget: {args.budget:.3f}s")
+    print(" Slowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports(env):
+        print(f"   {cumulative_us / 1e6:7.3f}s  {name}")
+    print("============================")
+
+    failures = []
+    if best > args.budget:
+        failures.append(f"import took {best:.3f}s, over the {args.budget:.3f}s budget")
+    if initialized:
+        failures.append(f"clients created at import: {', '.join(initialized)}")
+    if gemini_configured:
+        failures.append("Gemini SDK configured at import")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Import is lazy and within budget")
@@ -0,0 +1,329 @@
+"""
+Shared MongoDB, Neo4j and Gemini clients for the API and the CLI tools.
+
+One pooled MongoClient and one Neo4j driver per process, created on first use
+and reused by every operation; Gemini model handles are cached per model name
+and generation config, and calls go through call_gemini() (per-attempt timeout,
+jittered retries, circuit breaker). Nothing connects at import time.
+
+Pool sizes and timeouts come from the environment:
+    MONGO_URI, MONGO_DB, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+    NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_MAX_POOL_SIZE,
+    NEO4J_CONNECTION_TIMEOUT, NEO4J_ACQUISITION_TIMEOUT,
+    GEMINI_API_KEY, GEMINI_TIMEOUT_SECONDS, GEMINI_DEADLINE_SECONDS, GEMINI_MAX_RETRIES,
+    GEMINI_RETRY_BASE_SECONDS, GEMINI_RETRY_MAX_SECONDS,
+    GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_RESET_SECONDS
+"""
+import json
+import os
+import random
+import threading
+import time
+
+import gridfs
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+from pymongo import MongoClient
+
+load_dotenv()
+
+# --- MongoDB ---
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB = os.getenv("MONGO_DB", "Resume_Matcher")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))  # 0 = no timeout
+
+# --- Neo4j ---
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "12345678")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "30"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+
+# --- Gemini ---
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+DEFAULT_GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))      # per attempt
+GEMINI_DEADLINE_SECONDS = float(os.getenv("GEMINI_DEADLINE_SECONDS", "120"))   # all attempts of one call
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_RETRY_BASE_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "1"))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "20"))
+GEMINI_BREAKER_FAILURES = int(os.getenv("GEMINI_BREAKER_FAILURES", "5"))        # consecutive transient failures
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "30"))
+
+
+class LazyResource:
+    """
+    Stand-in for a client that is created on first attribute/item access.
+    Keeps `db["..."]`, `fs.get(...)` and `neo4j_driver.session()` working unchanged.
+    """
+
+    def __init__(self, name, factory, close=None):
+        self._name = name
+        self._factory = factory
+        self._closer = close
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def _resource(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    print(f"🔌 Initializing {self._name} client...")
+                    self._instance = self._factory()
+        return self._instance
+
+    def _initialized(self):
+        return self._instance is not None
+
+    def _close(self):
+        with self._lock:
+            instance, self._instance = self._instance, None
+        if instance is not None and self._closer:
+            self._closer(instance)
+
+    def __getattr__(self, attr):
+        return getattr(self._resource(), attr)
+
+    def __getitem__(self, key):
+        return self._resource()[key]
+
+
+def _new_mongo_client(uri):
+    return MongoClient(
+        uri,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS or None,
+    )
+
+
+mongo_client = LazyResource("MongoDB", lambda: _new_mongo_client(MONGO_URI), close=lambda c: c.close())
+db = LazyResource("MongoDB database", lambda: mongo_client._resource()[MONGO_DB])
+fs = LazyResource("GridFS", lambda: gridfs.GridFS(db._resource()))
+neo4j_driver = LazyResource(
+    "Neo4j",
+    lambda: GraphDatabase.driver(
+        NEO4J_URI,
+        auth=(NEO4J_USER, NEO4J_PASSWORD),
+        max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+        connection_timeout=NEO4J_CONNECTION_TIMEOUT,
+        connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+    ),
+    close=lambda d: d.close(),
+)
+
+# Clients for URIs other than MONGO_URI (CLI tools can still point elsewhere)
+_extra_mongo_clients = {}
+_extra_mongo_lock = threading.Lock()
+
+
+def get_mongo_client(uri: str = None):
+    """The shared pooled client, or one cached client per non-default URI."""
+    if not uri or uri == MONGO_URI:
+        return mongo_client._resource()
+    with _extra_mongo_lock:
+        if uri not in _extra_mongo_clients:
+            _extra_mongo_clients[uri] = _new_mongo_client(uri)
+        return _extra_mongo_clients[uri]
+
+
+def get_database(name: str = None, uri: str = None):
+    return get_mongo_client(uri)[name or MONGO_DB]
+
+
+# --- Gemini model handles ---
+_gemini_configured = False
+_gemini_models = {}
+_gemini_lock = threading.Lock()
+
+
+def gemini_configured() -> bool:
+    return _gemini_configured
+
+
+def get_gemini_model(model_name: str = DEFAULT_GEMINI_MODEL, **kwargs):
+    """
+    Returns a cached GenerativeModel for this name + config, configuring the SDK on
+    first call. google.generativeai is imported here because it is the slowest import.
+    """
+    global _gemini_configured
+    import google.generativeai as genai
+    key = (model_name, json.dumps(kwargs, sort_keys=True, default=str))
+    with _gemini_lock:
+        if not _gemini_configured:
+            if not GEMINI_API_KEY:
+                raise Exception("❌ Missing GEMINI_API_KEY in environment variables")
+            genai.configure(api_key=GEMINI_API_KEY)
+            _gemini_configured = True
+        if key not in _gemini_models:
+            _gemini_models[key] = genai.GenerativeModel(model_name, **kwargs)
+        return _gemini_models[key]
+
+
+# --- Gemini call policy (deadlines, retries, circuit breaker) ---
+class GeminiUnavailable(Exception):
+    """Gemini is degraded: the circuit is open, or transient errors outlasted the retries/deadline."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. 'closed': calls go through and consecutive
+    transient failures are counted; 'open': calls fail fast for reset_seconds;
+    'half_open': a single probe call decides between closing and re-opening.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == "open":
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self._state, self._probe_in_flight = "half_open", False
+            if self._state == "half_open":
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state, self._failures, self._probe_in_flight = "closed", 0, False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._times_opened += 1
+                    print(f"🔌 Gemini circuit opened after {self._failures} consecutive failures; "
+                          f"failing fast for {self.reset_seconds:.0f}s.")
+                self._state, self._opened_at, self._probe_in_flight = "open", time.monotonic(), False
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 when calls are allowed)."""
+        with self._lock:
+            if self._state != "open":
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def snapshot(self):
+        retry_after = self.retry_after()
+        with self._lock:
+            return {"state": self._state, "consecutive_failures": self._failures,
+                    "failure_threshold": self.failure_threshold, "reset_seconds": self.reset_seconds,
+                    "retry_after_seconds": round(retry_after, 1), "times_opened": self._times_opened}
+
+
+gemini_breaker = CircuitBreaker(GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_RESET_SECONDS)
+_gemini_call_stats = {"calls": 0, "succeeded": 0, "retries": 0, "timeouts": 0,
+                      "transient_errors": 0, "other_errors": 0, "short_circuited": 0, "gave_up": 0}
+_gemini_stats_lock = threading.Lock()
+
+
+def _count(*names):
+    with _gemini_stats_lock:
+        for name in names:
+            _gemini_call_stats[name] += 1
+
+
+def _is_timeout(exc) -> bool:
+    return isinstance(exc, TimeoutError) or type(exc).__name__ in ("DeadlineExceeded", "GatewayTimeout")
+
+
+def _is_transient(exc) -> bool:
+    """Rate limits, 5xx, timeouts and dropped connections are worth retrying; bad requests are not."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        return False
+    return isinstance(exc, (api_exceptions.ServerError, api_exceptions.TooManyRequests,
+                            api_exceptions.ResourceExhausted, api_exceptions.DeadlineExceeded))
+
+
+def gemini_available() -> bool:
+    """False while the circuit is open (callers can defer optional work instead of queuing it)."""
+    return gemini_breaker.retry_after() == 0
+
+
+def call_gemini(model, prompt, timeout: float = None, deadline: float = None, max_retries: int = None, **kwargs):
+    """
+    model.generate_content(prompt, **kwargs) under the shared policy: each attempt
+    has a timeout, transient errors are retried with jittered exponential backoff
+    within an overall deadline, and the circuit breaker fails fast while Gemini is
+    degraded. Raises GeminiUnavailable in those cases; other errors (invalid
+    request, blocked prompt, ...) propagate unchanged.
+    """
+    timeout = timeout or GEMINI_TIMEOUT_SECONDS
+    deadline_at = time.monotonic() + (deadline or GEMINI_DEADLINE_SECONDS)
+    max_retries = GEMINI_MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        if not gemini_breaker.allow():
+            _count("short_circuited")
+            raise GeminiUnavailable(f"Gemini circuit is open (retry in {gemini_breaker.retry_after():.0f}s)")
+        _count("calls")
+        remaining = deadline_at - time.monotonic()
+        try:
+            response = model.generate_content(
+                prompt, request_options={"timeout": max(1.0, min(timeout, remaining))}, **kwargs)
+        except Exception as e:
+            if not _is_transient(e):
+                # Gemini answered; the request itself was the problem
+                gemini_breaker.record_success()
+                _count("other_errors")
+                raise
+            gemini_breaker.record_failure()
+            _count("transient_errors", *(["timeouts"] if _is_timeout(e) else []))
+            # Full jitter: spreads out retries from many workers hitting the same outage
+            delay = random.uniform(0, min(GEMINI_RETRY_MAX_SECONDS, GEMINI_RETRY_BASE_SECONDS * 2 ** attempt))
+            if attempt >= max_retries or not gemini_available() or time.monotonic() + delay >= deadline_at:
+                _count("gave_up")
+                raise GeminiUnavailable(f"Gemini failed after {attempt + 1} attempts: {type(e).__name__} - {e}") from e
+            attempt += 1
+            _count("retries")
+            print(f"⏳ Gemini {type(e).__name__}; retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        gemini_breaker.record_success()
+        _count("succeeded")
+        return response
+
+
+def get_gemini_stats():
+    """Breaker state and call counters for this process."""
+    with _gemini_stats_lock:
+        counters = dict(_gemini_call_stats)
+    return {"breaker": gemini_breaker.snapshot(), "calls": counters,
+            "policy": {"timeout_seconds": GEMINI_TIMEOUT_SECONDS, "deadline_seconds": GEMINI_DEADLINE_SECONDS,
+                       "max_retries": GEMINI_MAX_RETRIES}}
+
+
+def close_all():
+    """Closes every client this process opened (app shutdown / end of a CLI run)."""
+    for resource in (fs, db, mongo_client, neo4j_driver):
+        resource._close()
+    with _extra_mongo_lock:
+        for client in _extra_mongo_clients.values():
+            client.close()
+        _extra_mongo_clients.clear()
+    with _gemini_lock:
+        _gemini_models.clear()
@@ -1,24 +1,17 @@
-from pymongo import MongoClient
-from neo4j import GraphDatabase
 import json
 
+# Shared pooled clients (MONGO_URI / NEO4J_URI / NEO4J_USER / NEO4J_PASSWORD from .env)
+try:
+    from backend import connections
+except ImportError:  # run from inside backend/
+    import connections
+
 # --- MongoDB Config ---
-MONGO_URI = "mongodb://localhost:27017"
-DB_NAME = "Resume_Matcher"
 JOBS_COLLECTION = "JD_skills"        # job descriptions with skills
 RESUMES_COLLECTION = "resumes"  # resumes with extracted skills
 
-# --- Neo4j Config ---
-NEO4J_URI = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "vishal2004"
-
-# --- Connect to MongoDB ---
-mongo_client = MongoClient(MONGO_URI)
-db = mongo_client[DB_NAME]
-
-# --- Connect to Neo4j ---
-neo4j_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+db = connections.db
+neo4j_driver = connections.neo4j_driver
 
 
 # --- Function to Push Jobs and Skills to Neo4j ---
@@ -107,3 +100,4 @@ if __name__ == "__main__":
     recs = recommend_jobs(sample_resume_id)
     print("\n🎯 Recommended Jobs:")
     print(json.dumps(recs, indent=4))
+    connections.close_all()
@@ -0,0 +1,336 @@
+"""
+Compact binary snapshot of the matching graph: Skill, Job and Resume nodes,
+REQUIRES/HAS edges, the ontology relations (with confidence, source and
+timestamps) and the SIMILAR_TO closure.
+
+Everything is stored column by column as typed arrays: nodes are rows of a
+table, skills are referenced by their row number, and a node's skill list is
+a slice of one flat array (CSR layout). Columns are 8-byte aligned after a
+JSON header, so GraphSnapshot can mmap the file and use each column in place
+through a memoryview instead of parsing it. Pure stdlib; the Neo4j
+export/import lives in main.py.
+
+File layout:
+    MAGIC (8 bytes) | header length (uint32) | header JSON | columns...
+The header maps each column to [offset, count, typecode].
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+
+MAGIC = b"RGSNAP01"
+FORMAT_VERSION = 1
+_ALIGN = 8
+
+# Skill.ontology_processed is unset, false, true or 'failed'
+PROCESSED_CODES = {None: 0, False: 1, True: 2, "failed": 3}
+PROCESSED_VALUES = {code: value for value, code in PROCESSED_CODES.items()}
+RELATION_TYPES = ("RELATED_TO", "IS_A")
+MISSING_TIMESTAMP = -(2 ** 63)
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Fixed-size typecodes only, so a file reads back the same on every platform
+_ITEMSIZES = {"B": 1, "I": 4, "q": 8, "Q": 8, "d": 8}
+for _code, _size in _ITEMSIZES.items():
+    assert array(_code).itemsize == _size, f"array typecode {_code!r} is not {_size} bytes here"
+
+
+def encode_timestamp(value):
+    """ISO timestamp (as written by datetime.isoformat()) -> microseconds since the epoch."""
+    if not value:
+        return MISSING_TIMESTAMP
+    try:
+        moment = datetime.fromisoformat(str(value))
+    except ValueError:
+        return MISSING_TIMESTAMP
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def decode_timestamp(micros):
+    if micros == MISSING_TIMESTAMP:
+        return None
+    return (_EPOCH + micros * _MICROSECOND).isoformat()
+
+
+class StringColumn:
+    """Read-only sequence of strings stored as UTF-8 bytes plus an offsets column."""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class SnapshotBuilder:
+    """Collects graph rows in memory and writes them as one snapshot file."""
+
+    def __init__(self):
+        self.skill_ids = {}
+        self.skill_names = []
+        self.skill_processed = array("B")
+        self.skill_last_processed = array("q")
+        self.sources = []
+        self.tables = {
+            "job": {"id": [], "title": [], "skill_ptr": array("Q", [0]), "skill_idx": array("I")},
+            "resume": {"id": [], "name": [], "file_id": [], "email": [], "phone": [], "summary": [],
+                       "skill_ptr": array("Q", [0]), "skill_idx": array("I")},
+            "rel": {"from": array("I"), "to": array("I"), "type": array("B"), "confidence": array("d"),
+                    "source": array("B"), "updated_at": array("q")},
+            "sim": {"from": array("I"), "to": array("I"), "hops": array("B"), "confidence": array("d"),
+                    "score": array("d"), "built_at": array("q")},
+        }
+
+    def skill_id(self, name):
+        """Row number of the skill, adding it (with no ontology status) on first sight."""
+        idx = self.skill_ids.get(name)
+        if idx is None:
+            idx = self.skill_ids[name] = len(self.skill_names)
+            self.skill_names.append(name)
+            self.skill_processed.append(0)
+            self.skill_last_processed.append(MISSING_TIMESTAMP)
+        return idx
+
+    def add_skill(self, name, ontology_processed=None, last_processed=None):
+        idx = self.skill_id(name)
+        self.skill_processed[idx] = PROCESSED_CODES.get(ontology_processed, 0)
+        self.skill_last_processed[idx] = encode_timestamp(last_processed)
+        return idx
+
+    def _add_owner(self, table, fields, skills):
+        columns = self.tables[table]
+        for field, value in fields.items():
+            columns[field].append("" if value is None else str(value))
+        columns["skill_idx"].extend(self.skill_id(name) for name in dict.fromkeys(skills) if name)
+        columns["skill_ptr"].append(len(columns["skill_idx"]))
+
+    def add_job(self, job_id, title, skills):
+        self._add_owner("job", {"id": job_id, "title": title}, skills)
+
+    def add_resume(self, resume_id, skills, name=None, file_id=None, email=None, phone=None, summary=None):
+        self._add_owner("resume", {"id": resume_id, "name": name, "file_id": file_id, "email": email,
+                                   "phone": phone, "summary": summary}, skills)
+
+    def _source_code(self, source):
+        source = source or "LLM"
+        if source not in self.sources:
+            if len(self.sources) == 255:
+                raise ValueError("more than 255 distinct relation sources")
+            self.sources.append(source)
+        return self.sources.index(source)
+
+    def add_relation(self, from_skill, to_skill, relation_type, confidence=1.0, source=None, updated_at=None):
+        if relation_type not in RELATION_TYPES:
+            return
+        rel = self.tables["rel"]
+        rel["from"].append(self.skill_id(from_skill))
+        rel["to"].append(self.skill_id(to_skill))
+        rel["type"].append(RELATION_TYPES.index(relation_type))
+        rel["confidence"].append(1.0 if confidence is None else float(confidence))
+        rel["source"].append(self._source_code(source))
+        rel["updated_at"].append(encode_timestamp(updated_at))
+
+    def add_similar(self, from_skill, to_skill, hops, confidence, score, built_at=None):
+        sim = self.tables["sim"]
+        sim["from"].append(self.skill_id(from_skill))
+        sim["to"].append(self.skill_id(to_skill))
+        sim["hops"].append(min(255, int(hops or 0)))
+        sim["confidence"].append(float(confidence or 0.0))
+        sim["score"].append(float(score or 0.0))
+        sim["built_at"].append(encode_timestamp(built_at))
+
+    def counts(self):
+        return {
+            "skills": len(self.skill_names),
+            "jobs": len(self.tables["job"]["id"]),
+            "resumes": len(self.tables["resume"]["id"]),
+            "requires": len(self.tables["job"]["skill_idx"]),
+            "has": len(self.tables["resume"]["skill_idx"]),
+            "relations": len(self.tables["rel"]["from"]),
+            "similar": len(self.tables["sim"]["from"]),
+        }
+
+    def _columns(self):
+        """Every column as (name, array), string columns split into offsets + UTF-8 data."""
+        columns = {"skill.name": self.skill_names, "skill.processed": self.skill_processed,
+                   "skill.last_processed": self.skill_last_processed}
+        for table, fields in self.tables.items():
+            for field, values in fields.items():
+                columns[f"{table}.{field}"] = values
+        for name, values in columns.items():
+            if isinstance(values, array):
+                yield name, values
+                continue
+            offsets, data = array("Q", [0]), bytearray()
+            for value in values:
+                data += value.encode("utf-8")
+                offsets.append(len(data))
+            yield f"{name}.offsets", offsets
+            yield f"{name}.data", array("B", data)
+
+    def write(self, path, meta=None):
+        """Writes the snapshot atomically (temp file + rename). Returns (bytes written, counts)."""
+        columns = list(self._columns())
+        layout, offset = {}, 0
+        for name, values in columns:
+            layout[name] = [offset, len(values), values.typecode]
+            offset += -(-len(values) * values.itemsize // _ALIGN) * _ALIGN
+        header = json.dumps({
+            "format": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "created_at": datetime.now().isoformat(),
+            "counts": self.counts(),
+            "sources": self.sources,
+            "meta": meta or {},
+            "columns": layout,
+        }, default=str).encode("utf-8")
+        data_start = -(-(len(MAGIC) + 4 + len(header)) // _ALIGN) * _ALIGN
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            f.write(b"\0" * (data_start - f.tell()))
+            for name, values in columns:
+                raw = values.tobytes()
+                f.write(raw + b"\0" * (-len(raw) % _ALIGN))
+        os.replace(tmp_path, path)
+        return data_start + offset, self.counts()
+
+
+class GraphSnapshot:
+    """
+    A snapshot file mapped read-only. column()/strings() return views into the
+    mapping (no copy, pages are loaded on first touch); the iter_* helpers
+    decode rows for bulk loading.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = self._view = None
+        self._columns = {}
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a graph snapshot")
+            (header_len,) = struct.unpack_from("<I", self._map, len(MAGIC))
+            start = len(MAGIC) + 4
+            self.header = json.loads(self._map[start:start + header_len].decode("utf-8"))
+            if self.header.get("format") != FORMAT_VERSION:
+                raise ValueError(f"{path} has snapshot format {self.header.get('format')}, expected {FORMAT_VERSION}")
+        except Exception:
+            self.close()
+            raise
+        self._data_start = -(-(start + header_len) // _ALIGN) * _ALIGN
+        self._view = memoryview(self._map)
+        self._swapped = self.header["byteorder"] != sys.byteorder
+        self.counts = self.header["counts"]
+        self.meta = self.header.get("meta", {})
+        self.sources = self.header.get("sources", [])
+
+    def column(self, name):
+        """The column as a memoryview over the mapping (an array copy on a foreign byte order)."""
+        values = self._columns.get(name)
+        if values is None:
+            offset, count, typecode = self.header["columns"][name]
+            start = self._data_start + offset
+            raw = self._view[start:start + count * _ITEMSIZES[typecode]]
+            if self._swapped and _ITEMSIZES[typecode] > 1:
+                values = array(typecode, raw)
+                values.byteswap()
+            else:
+                values = raw.cast(typecode)
+            self._columns[name] = values
+        return values
+
+    def strings(self, name):
+        return StringColumn(self.column(f"{name}.offsets"), self.column(f"{name}.data"))
+
+    def skill_names(self):
+        return self.strings("skill.name")
+
+    def skill_slice(self, table, row):
+        """Skill row numbers of one job or resume (a view, no copy)."""
+        ptr = self.column(f"{table}.skill_ptr")
+        return self.column(f"{table}.skill_idx")[ptr[row]:ptr[row + 1]]
+
+    def iter_skills(self):
+        processed = self.column("skill.processed")
+        last_processed = self.column("skill.last_processed")
+        for i, name in enumerate(self.skill_names()):
+            yield {"name": name, "ontology_processed": PROCESSED_VALUES[processed[i]],
+                   "last_processed": decode_timestamp(last_processed[i])}
+
+    def _iter_owners(self, table, fields):
+        names = self.skill_names()
+        columns = {field: self.strings(f"{table}.{field}") for field in fields}
+        for row in range(len(columns["id"])):
+            item = {field: column[row] for field, column in columns.items()}
+            item["skills"] = [names[idx] for idx in self.skill_slice(table, row)]
+            yield item
+
+    def iter_jobs(self):
+        return self._iter_owners("job", ("id", "title"))
+
+    def iter_resumes(self):
+        return self._iter_owners("resume", ("id", "name", "file_id", "email", "phone", "summary"))
+
+    def iter_relations(self):
+        names = self.skill_names()
+        cols = [self.column(f"rel.{field}") for field in ("from", "to", "type", "confidence", "source", "updated_at")]
+        for a, b, rel_type, confidence, source, updated_at in zip(*cols):
+            yield {"from": names[a], "to": names[b], "relation_type": RELATION_TYPES[rel_type],
+                   "confidence": confidence, "source": self.sources[source],
+                   "updated_at": decode_timestamp(updated_at)}
+
+    def iter_similar(self):
+        names = self.skill_names()
+        cols = [self.column(f"sim.{field}") for field in ("from", "to", "hops", "confidence", "score", "built_at")]
+        for a, b, hops, confidence, score, built_at in zip(*cols):
+            yield {"from": names[a], "to": names[b], "hops": hops, "confidence": confidence, "score": score,
+                   "built_at": decode_timestamp(built_at)}
+
+    def stats(self):
+        return {"path": self.path, "bytes": len(self._map), "created_at": self.header.get("created_at"),
+                "counts": self.counts}
+
+    def close(self):
+        """Releases the mapping. Views handed out earlier must not be used afterwards."""
+        for values in self._columns.values():
+            if isinstance(values, memoryview):
+                values.release()
+        self._columns = {}
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # a caller still holds a view; the mapping goes away with it
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
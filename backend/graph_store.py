@@ -0,0 +1,964 @@
+"""
+Graph storage behind the matching endpoints.
+
+GraphStore is the set of graph operations the API needs: upsert jobs and
+resumes, add ontology relations, refresh the SIMILAR_TO closure, and the
+read side (recommend, eligible, explain, explore). Two implementations:
+
+- Neo4jGraphStore: the Cypher queries against the Neo4j server.
+- InMemoryGraphStore: the same operations over in-process arrays (skills are
+  interned to row numbers, each job/resume holds an array of skill rows),
+  loaded from MongoDB rows or straight from a graph snapshot. For small
+  deployments and tests that should not need a Neo4j server. It has no
+  ontology builder: relations come only from the snapshot (main.py skips
+  Gemini ontology expansion in memory mode).
+
+Both return the same rows for the same graph; check_graph_store.py is the
+shared conformance check. Scores follow main.py's modes:
+- 'direct':   number of required skills held.
+- 'expanded': direct = 1.0 each; related = 0.5 per (held skill, required
+  skill) relation, RELATED_TO either way, IS_A only child -> parent.
+- 'multihop': related skills scored from the SIMILAR_TO closure with per-hop
+  decay and (optionally) the product of edge confidences.
+"""
+import heapq
+from abc import ABC, abstractmethod
+import threading
+from array import array
+
+RELATION_TYPES = ("RELATED_TO", "IS_A")
+SCORING_MODES = ("expanded", "direct", "multihop")
+
+
+def relation_merge_pattern(rel_type):
+    """
+    MERGE pattern between bound nodes s1 (from) and s2 (to), binding the edge as r.
+    Relations are ONE edge per skill pair: RELATED_TO is symmetric, so it is
+    merged and matched without a direction; IS_A always points child -> parent.
+    """
+    if rel_type == "IS_A":
+        return "(s1)-[r:IS_A]->(s2)"
+    return f"(s1)-[r:{rel_type}]-(s2)"
+
+
+def skill_closure(source, adjacency, max_hops, decay, top_k):
+    """
+    Shortest path per reachable skill within max_hops, and the best confidence
+    product among paths of that length. The search is layered, so a skill is
+    kept at the first hop count it is reached with: a better-scoring longer
+    path never replaces it (scoring filters on hops, so a longer count could
+    push it past SCORING_MAX_HOPS). Each layer's frontier is pruned to keep hub
+    skills from exploding the search.
+    Returns [(skill, hops, confidence_product, score)] for the top_k scores.
+    """
+    best = {}
+    frontier = {source: 1.0}
+    for hops in range(1, max_hops + 1):
+        reached = {}
+        for node, confidence in frontier.items():
+            for neighbour, edge_confidence in adjacency.get(node, ()):
+                if neighbour == source:
+                    continue
+                product = confidence * edge_confidence
+                if product > reached.get(neighbour, 0.0):
+                    reached[neighbour] = product
+        for neighbour, product in reached.items():
+            score = (decay ** (hops - 1)) * product
+            if neighbour not in best:
+                best[neighbour] = (hops, product, score)
+        frontier = dict(heapq.nlargest(top_k * 4, reached.items(), key=lambda kv: kv[1]))
+        if not frontier:
+            break
+    ranked = heapq.nlargest(top_k, best.items(), key=lambda kv: kv[1][2])
+    return [(skill, hops, product, score) for skill, (hops, product, score) in ranked]
+
+
+def local_adjacency(skills, radius, incident_edges):
+    """
+    Adjacency restricted to the skills within `radius` undirected hops of
+    `skills`, fetched layer by layer through incident_edges(names), which
+    yields (from, to, rel_type, confidence) for every relation touching one of
+    the names. An incremental closure refresh needs radius 2 * max_hops: the
+    sources within max_hops of a changed skill, and max_hops around each.
+    """
+    adjacency = {}
+    edges = set()
+    seen, frontier = set(skills), set(skills)
+    for _ in range(radius):
+        if not frontier:
+            break
+        reached = set()
+        for a, b, rel_type, confidence in incident_edges(sorted(frontier)):
+            if (a, b, rel_type) in edges:
+                continue  # both ends were in the frontier
+            edges.add((a, b, rel_type))
+            adjacency.setdefault(a, []).append((b, confidence))
+            if rel_type == "RELATED_TO":
+                adjacency.setdefault(b, []).append((a, confidence))
+            reached.update((a, b))
+        frontier = reached - seen
+        seen |= reached
+    return adjacency
+
+
+def closure_rows(adjacency, changed_skills, max_hops, decay, top_k):
+    """
+    SIMILAR_TO rows to (re)write: [{"source", "neighbours": [{name, hops, confidence, score}]}].
+    With changed_skills, only skills within max_hops of a changed skill are
+    recomputed (their neighbour lists are the only ones a new relation can
+    affect), and adjacency only needs to cover local_adjacency(changed_skills,
+    2 * max_hops); otherwise every skill with a relation is.
+    """
+    if changed_skills is None:
+        sources = set(adjacency)
+    else:
+        # Reverse reachability: anyone who can reach a changed skill in max_hops
+        undirected = {}
+        for a, neighbours in adjacency.items():
+            for b, _ in neighbours:
+                undirected.setdefault(a, set()).add(b)
+                undirected.setdefault(b, set()).add(a)
+        sources, frontier = set(changed_skills), set(changed_skills)
+        for _ in range(max_hops):
+            frontier = {n for node in frontier for n in undirected.get(node, ())} - sources
+            sources |= frontier
+    return [{"source": source, "neighbours": [
+        {"name": skill, "hops": hops, "confidence": product, "score": score}
+        for skill, hops, product, score in skill_closure(source, adjacency, max_hops, decay, top_k)
+    ]} for source in sources]
+
+
+def _relation_rows(relations):
+    """Valid relations grouped by type: {rel_type: [{from, to, confidence, source, updated_at}]}."""
+    by_type = {}
+    for rel in relations:
+        if rel.get("relation_type") not in RELATION_TYPES:
+            continue
+        by_type.setdefault(rel["relation_type"], []).append({
+            "from": rel["from"],
+            "to": rel["to"],
+            "confidence": 1.0 if rel.get("confidence") is None else rel["confidence"],
+            "source": rel.get("source") or "LLM",
+            "updated_at": rel.get("updated_at"),
+        })
+    return by_type
+
+
+class GraphStore(ABC):
+    """
+    The graph operations used by the API. Rows in and out are plain dicts:
+    job rows {id, title, skills}, resume rows {id, name, file_id, email,
+    phone, summary, skills}, relations {from, to, relation_type, confidence,
+    source, updated_at}. Results are ordered by weightedScore descending.
+    Every operation below except recommend_many must be implemented.
+    """
+    name = "abstract"
+
+    @abstractmethod
+    def upsert_jobs(self, rows, batch_size=500):
+        """Creates/updates Job nodes and adds their REQUIRES edges (existing ones are kept)."""
+
+    @abstractmethod
+    def upsert_resumes(self, rows, batch_size=500):
+        """Creates/updates Resume nodes and replaces their HAS edges."""
+
+    @abstractmethod
+    def delete_resume(self, resume_id):
+        """Removes a Resume node and its HAS edges (no-op if missing)."""
+
+    @abstractmethod
+    def resume_skill_names(self, resume_ids):
+        """The skills each resume currently HAS: {resume_id: [names]}, resumes not in the graph omitted."""
+
+    @abstractmethod
+    def add_relations(self, relations, batch_size=500):
+        """Merges ontology relations (one edge per pair, see relation_merge_pattern). Returns the count."""
+
+    @abstractmethod
+    def refresh_similarity(self, changed_skills=None, max_hops=3, top_k=25, decay=0.5, batch_size=500,
+                           built_at=None):
+        """Rebuilds the SIMILAR_TO closure (all of it, or around changed_skills). Returns the sources refreshed."""
+
+    @abstractmethod
+    def recommend(self, resume_id, limit=5, mode="expanded", max_hops=2, hop_decay=0.5, related_weight=0.5,
+                  use_confidence=True):
+        """Top jobs for a resume: [{job_id, job_title, weightedScore, directScore, relatedScore}]."""
+
+    def recommend_many(self, resume_ids, limit=5, mode="expanded", max_hops=2, hop_decay=0.5, related_weight=0.5,
+                       use_confidence=True):
+        """recommend() for several resumes: {resume_id: rows}, same rows and order as one call each."""
+        return {resume_id: self.recommend(resume_id, limit=limit, mode=mode, max_hops=max_hops, hop_decay=hop_decay,
+                                          related_weight=related_weight, use_confidence=use_confidence)
+                for resume_id in resume_ids}
+
+    @abstractmethod
+    def eligible(self, job_id, mode="expanded", max_hops=2, hop_decay=0.5, related_weight=0.5,
+                 use_confidence=True):
+        """Every matching resume for a job: [{resume_id, resume_name, file_id, email, phone, summary, scores...}]."""
+
+    @abstractmethod
+    def explain(self, resume_id, job_id, limit=10):
+        """
+        Direct (pathLength 0) and 1-hop related (pathLength 1) skill links:
+        [{candidateSkill, jobSkill, pathLength, relations}], shortest first.
+        """
+
+    @abstractmethod
+    def direct_overlap(self, resume_id, job_id):
+        """True if the resume holds at least one of the job's required skills."""
+
+    @abstractmethod
+    def explore(self, skill_name, limit=25):
+        """A skill's relations: [{skill, type, confidence, direction}], by type then confidence."""
+
+
+# --- Neo4j ---
+
+# 'expanded' recommendation: for each required skill the resume lacks, one
+# related point per relation to a skill the resume has
+_RECOMMEND_EXPANDED = """
+    MATCH (r:Resume {id:$resume_id})-[:HAS]->(rs:Skill) // Candidate's skills
+    WITH r, collect(DISTINCT rs) AS candidateSkills
+    MATCH (j:Job)-[:REQUIRES]->(js:Skill) // Job's required skills
+
+    // Calculate direct matches
+    WITH r, j, candidateSkills, js,
+         CASE WHEN js IN candidateSkills THEN 1 ELSE 0 END AS directMatch
+
+    // Calculate related matches (1-hop)
+    WITH r, j, candidateSkills, js, directMatch
+    // RELATED_TO in either direction; IS_A only when the candidate's skill is the child
+    OPTIONAL MATCH (rs_related)-[rel:RELATED_TO|IS_A]-(js)
+    WHERE rs_related IN candidateSkills AND directMatch = 0 // Check for 1-hop relation, only if not a direct match
+      AND (type(rel) = 'RELATED_TO' OR startNode(rel) = rs_related)
+    WITH r, j, js, directMatch,
+         CASE WHEN rs_related IS NOT NULL THEN 1 ELSE 0 END AS relatedMatch
+
+    // Aggregate scores
+    WITH j,
+         SUM(directMatch) AS directScore,
+         SUM(relatedMatch) AS relatedScore
+    WHERE directScore + relatedScore > 0
+
+    RETURN j.id AS job_id,
+           j.title AS job_title,
+           (directScore * 1.0) + (relatedScore * 0.5) AS weightedScore,
+           directScore,
+           relatedScore
+    ORDER BY weightedScore DESC, job_id
+    LIMIT $limit
+"""
+
+_RECOMMEND_DIRECT = """
+    MATCH (r:Resume {id:$resume_id})-[:HAS]->(s:Skill)<-[:REQUIRES]-(j:Job)
+    WITH j, count(s) AS directScore
+    RETURN j.id AS job_id,
+           j.title AS job_title,
+           directScore * 1.0 AS weightedScore,
+           directScore,
+           0 AS relatedScore
+    ORDER BY directScore DESC, job_id
+    LIMIT $limit
+"""
+
+# Start from the candidate's skills, fan out through SIMILAR_TO, then keep the
+# best-scoring way each job skill is covered
+_RECOMMEND_MULTIHOP = """
+    MATCH (r:Resume {id:$resume_id})-[:HAS]->(rs:Skill)
+    WITH DISTINCT rs
+    CALL {
+        WITH rs
+        RETURN rs AS js, 1.0 AS score, 1 AS direct
+        UNION
+        WITH rs
+        MATCH (rs)-[sim:SIMILAR_TO]->(js:Skill)
+        WHERE sim.hops <= $max_hops
+        RETURN js,
+               $related_weight * ($hop_decay ^ (sim.hops - 1))
+                 * CASE WHEN $use_confidence THEN sim.confidence ELSE 1.0 END AS score,
+               0 AS direct
+    }
+    WITH js, max(score) AS best, max(direct) AS direct
+    MATCH (j:Job)-[:REQUIRES]->(js)
+    WITH j,
+         sum(direct) AS directScore,
+         sum(1 - direct) AS relatedScore,
+         sum(CASE WHEN direct = 1 THEN 1.0 ELSE best END) AS weightedScore
+    RETURN j.id AS job_id,
+           j.title AS job_title,
+           weightedScore,
+           directScore,
+           relatedScore
+    ORDER BY weightedScore DESC, job_id
+    LIMIT $limit
+"""
+
+_RECOMMEND_QUERIES = {"expanded": _RECOMMEND_EXPANDED, "direct": _RECOMMEND_DIRECT, "multihop": _RECOMMEND_MULTIHOP}
+
+# The same queries for many resumes in one round-trip: each runs per resume
+# id in a subquery, so scoring, tie-break and LIMIT stay exactly the same.
+_RECOMMEND_MANY = """
+    UNWIND $resume_ids AS rid
+    CALL {{
+        WITH rid
+        {query}
+    }}
+    RETURN rid, job_id, job_title, weightedScore, directScore, relatedScore
+"""
+
+# Applicant scoring, job-first. Candidates are generated from the job side:
+# the job is found by its indexed id, its required skills and their 1-hop
+# related skills are reached through relationships, and only resumes that HAVE
+# one of them are visited and scored. Starting from
+# MATCH (r:Resume)-[:HAS]->(rs:Skill) instead would visit every HAS edge in the
+# graph per call. Scores: direct = required skills held, related = (held skill,
+# required skill) relation pairs for held skills that are not required
+# themselves. Each body expects `jid` in scope and leaves r, weightedScore,
+# directScore, relatedScore.
+APPLICANT_SCORING = {
+    "expanded": """
+        MATCH (j:Job {id: jid})-[:REQUIRES]->(js:Skill)
+        WITH collect(DISTINCT js) AS jobSkills
+        CALL {
+            WITH jobSkills
+            UNWIND jobSkills AS js
+            MATCH (r:Resume)-[:HAS]->(js)
+            RETURN r, 1 AS direct, 0 AS related
+            UNION ALL
+            WITH jobSkills
+            UNWIND jobSkills AS js
+            // RELATED_TO in either direction; IS_A only when the candidate's skill is the child
+            MATCH (rs:Skill)-[rel:RELATED_TO|IS_A]-(js)
+            WHERE NOT rs IN jobSkills AND (type(rel) = 'RELATED_TO' OR startNode(rel) = rs)
+            MATCH (r:Resume)-[:HAS]->(rs)
+            RETURN r, 0 AS direct, 1 AS related
+        }
+        WITH r, sum(direct) AS directScore, sum(related) AS relatedScore
+        WITH r, (directScore * 1.0) + (relatedScore * 0.5) AS weightedScore, directScore, relatedScore
+    """,
+    "multihop": """
+        MATCH (j:Job {id: jid})-[:REQUIRES]->(js:Skill)
+        WITH DISTINCT js
+        CALL {
+            WITH js
+            RETURN js AS rs, 1.0 AS score, 1 AS direct
+            UNION
+            WITH js
+            MATCH (rs:Skill)-[sim:SIMILAR_TO]->(js)
+            WHERE sim.hops <= $max_hops
+            RETURN rs,
+                   $related_weight * ($hop_decay ^ (sim.hops - 1))
+                     * CASE WHEN $use_confidence THEN sim.confidence ELSE 1.0 END AS score,
+                   0 AS direct
+        }
+        MATCH (r:Resume)-[:HAS]->(rs)
+        // Best way each job skill is covered by this candidate
+        WITH r, js, max(score) AS best, max(direct) AS direct
+        WITH r,
+             sum(CASE WHEN direct = 1 THEN 1.0 ELSE best END) AS weightedScore,
+             sum(direct) AS directScore,
+             sum(1 - direct) AS relatedScore
+    """,
+}
+
+_ELIGIBLE = """
+    WITH $job_id AS jid
+    {scoring}
+    WHERE directScore + relatedScore > 0
+    RETURN r.id AS resume_id,
+           r.name AS resume_name,
+           r.file_id AS file_id,
+           r.email AS email,
+           r.phone AS phone,
+           r.summary AS summary,
+           weightedScore,
+           directScore,
+           relatedScore
+    ORDER BY weightedScore DESC, resume_id
+"""
+
+_SCORE_FIELDS = ("weightedScore", "directScore", "relatedScore")
+_RESUME_FIELDS = ("resume_id", "resume_name", "file_id", "email", "phone", "summary")
+
+
+class Neo4jGraphStore(GraphStore):
+    """GraphStore over a Neo4j driver (connections.neo4j_driver)."""
+    name = "neo4j"
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def upsert_jobs(self, rows, batch_size=500):
+        rows = list(rows)
+        with self.driver.session() as session:
+            for start in range(0, len(rows), batch_size):
+                session.run("""
+                    UNWIND $rows AS row
+                    MERGE (j:Job {id: row.id})
+                    SET j.title = row.title
+                    WITH j, row
+                    UNWIND row.skills AS skillName
+                    MERGE (s:Skill {name: skillName})
+                    MERGE (j)-[:REQUIRES]->(s)
+                """, rows=rows[start:start + batch_size])
+        return len(rows)
+
+    def upsert_resumes(self, rows, batch_size=500):
+        rows = list(rows)
+        with self.driver.session() as session:
+            for start in range(0, len(rows), batch_size):
+                session.run("""
+                    UNWIND $rows AS row
+                    MERGE (r:Resume {id: row.id})
+                    SET r.name = row.name, r.file_id = row.file_id, r.email = row.email,
+                        r.phone = row.phone, r.summary = row.summary
+                    WITH r, row
+                    // Clear existing HAS relationships before adding new ones
+                    OPTIONAL MATCH (r)-[old:HAS]->()
+                    DELETE old
+                    WITH DISTINCT r, row
+                    UNWIND row.skills AS skillName
+                    MERGE (s:Skill {name: skillName})
+                    MERGE (r)-[:HAS]->(s)
+                """, rows=rows[start:start + batch_size])
+        return len(rows)
+
+    def delete_resume(self, resume_id):
+        with self.driver.session() as session:
+            session.run("MATCH (r:Resume {id: $resume_id}) DETACH DELETE r", resume_id=resume_id)
+
+    def resume_skill_names(self, resume_ids):
+        with self.driver.session() as session:
+            result = session.run("""
+                UNWIND $ids AS id
+                MATCH (r:Resume {id: id})
+                OPTIONAL MATCH (r)-[:HAS]->(s:Skill)
+                RETURN id, collect(s.name) AS skills
+            """, ids=list(resume_ids))
+            return {record["id"]: record["skills"] for record in result}
+
+    def add_relations(self, relations, batch_size=500):
+        written = 0
+        with self.driver.session() as session:
+            for rel_type, rows in _relation_rows(relations).items():
+                for start in range(0, len(rows), batch_size):
+                    session.run(f"""
+                        UNWIND $rows AS row
+                        MERGE (s1:Skill {{name: row.from}})
+                        MERGE (s2:Skill {{name: row.to}})
+                        MERGE {relation_merge_pattern(rel_type)}
+                        SET r.source = row.source,
+                            r.confidence = row.confidence,
+                            r.updated_at = row.updated_at
+                    """, rows=rows[start:start + batch_size])
+                    written += len(rows[start:start + batch_size])
+        return written
+
+    def load_adjacency(self, session):
+        """Returns {skill: [(neighbour, confidence), ...]}: RELATED_TO both ways, IS_A child -> parent."""
+        adjacency = {}
+        result = session.run("""
+            MATCH (a:Skill)-[r:RELATED_TO|IS_A]->(b:Skill)
+            RETURN a.name AS a, b.name AS b, type(r) AS relType, coalesce(r.confidence, 1.0) AS confidence
+        """)
+        for record in result:
+            adjacency.setdefault(record["a"], []).append((record["b"], record["confidence"]))
+            if record["relType"] == "RELATED_TO":
+                adjacency.setdefault(record["b"], []).append((record["a"], record["confidence"]))
+        return adjacency
+
+    def incident_relations(self, session, names):
+        """(from, to, rel_type, confidence) of every relation touching one of the named skills."""
+        result = session.run("""
+            UNWIND $names AS name
+            MATCH (:Skill {name: name})-[r:RELATED_TO|IS_A]-(:Skill)
+            RETURN startNode(r).name AS a, endNode(r).name AS b, type(r) AS relType,
+                   coalesce(r.confidence, 1.0) AS confidence
+        """, names=names)
+        return [(record["a"], record["b"], record["relType"], record["confidence"]) for record in result]
+
+    def refresh_similarity(self, changed_skills=None, max_hops=3, top_k=25, decay=0.5, batch_size=500,
+                           built_at=None):
+        with self.driver.session() as session:
+            if changed_skills is None:
+                adjacency = self.load_adjacency(session)
+            else:
+                # Only the neighbourhood a change can affect, not every relation in the graph
+                adjacency = local_adjacency(changed_skills, 2 * max_hops,
+                                            lambda names: self.incident_relations(session, names))
+            if changed_skills is None:
+                session.run("MATCH (:Skill)-[sim:SIMILAR_TO]->(:Skill) DELETE sim")
+            rows = closure_rows(adjacency, changed_skills, max_hops, decay, top_k)
+            for start in range(0, len(rows), batch_size):
+                session.run("""
+                    UNWIND $rows AS row
+                    MATCH (s:Skill {name: row.source})
+                    OPTIONAL MATCH (s)-[old:SIMILAR_TO]->()
+                    DELETE old
+                    WITH DISTINCT s, row
+                    UNWIND row.neighbours AS n
+                    MATCH (t:Skill {name: n.name})
+                    MERGE (s)-[sim:SIMILAR_TO]->(t)
+                    SET sim.hops = n.hops, sim.confidence = n.confidence, sim.score = n.score, sim.built_at = $built_at
+                """, rows=rows[start:start + batch_size], built_at=built_at)
+        return len(rows)
+
+    def recommend(self, resume_id, limit=5, mode="expanded", max_hops=2, hop_decay=0.5, related_weight=0.5,
+                  use_confidence=True):
+        query = _RECOMMEND_QUERIES.get(mode, _RECOMMEND_EXPANDED)
+        with self.driver.session() as session:
+            result = session.run(query, resume_id=resume_id, limit=limit, max_hops=max_hops, hop_decay=hop_decay,
+                                 related_weight=related_weight, use_confidence=use_confidence)
+            return [{field: record[field] for field in ("job_id", "job_title") + _SCORE_FIELDS} for record in result]
+
+    def recommend_many(self, resume_ids, limit=5, mode="expanded", max_hops=2, hop_decay=0.5, related_weight=0.5,
+                       use_confidence=True):
+        query = _RECOMMEND_QUERIES.get(mode, _RECOMMEND_EXPANDED).replace("$resume_id", "rid")
+        batch = {resume_id: [] for resume_id in resume_ids}
+        with self.driver.session() as session:
+            result = session.run(_RECOMMEND_MANY.format(query=query), resume_ids=list(batch), limit=limit,
+                                 max_hops=max_hops, hop_decay=hop_decay, related_weight=related_weight,
+                                 use_confidence=use_confidence)
+            for record in result:
+                batch[record["rid"]].append(
+                    {field: record[field] for field in ("job_id", "job_title") + _SCORE_FIELDS})
+        for rows in batch.values():
+            rows.sort(key=lambda row: (-row["weightedScore"], row["job_id"]))
+        return batch
+
+    def eligible(self, job_id, mode="expanded", max_hops=2, hop_decay=0.5, related_weight=0.5,
+                 use_confidence=True):
+        scoring = APPLICANT_SCORING["multihop" if mode == "multihop" else "expanded"]
+        with self.driver.session() as session:
+            result = session.run(_ELIGIBLE.format(scoring=scoring), job_id=job_id, max_hops=max_hops,
+                                 hop_decay=hop_decay, related_weight=related_weight, use_confidence=use_confidence)
+            return [{field: record[field] for field in _RESUME_FIELDS + _SCORE_FIELDS} for record in result]
+
+    def explain(self, resume_id, job_id, limit=10):
+        with self.driver.session() as session:
+            result = session.run("""
+                MATCH (r:Resume {id: $resume_id})-[:HAS]->(rs:Skill)
+                MATCH (j:Job {id: $job_id})-[:REQUIRES]->(js:Skill)
+
+                // Find all paths (direct and 1-hop related)
+                // 0..1 hops: 0 = direct match (rs == js), 1 = related match
+                // Relations are single undirected edges; IS_A only counts child -> parent
+                OPTIONAL MATCH p = shortestPath((rs)-[:RELATED_TO|IS_A*0..1]-(js))
+                WHERE all(rel IN relationships(p) WHERE type(rel) = 'RELATED_TO' OR startNode(rel) = rs)
+                WITH p WHERE p IS NOT NULL
+
+                WITH p, nodes(p)[0] AS candidateSkillNode, nodes(p)[-1] AS jobSkillNode
+                RETURN
+                    candidateSkillNode.name AS candidateSkill,
+                    jobSkillNode.name AS jobSkill,
+                    length(p) AS pathLength,
+                    [rel in relationships(p) | type(rel)] AS relations
+                ORDER BY pathLength, candidateSkill, jobSkill
+                LIMIT $limit // Limit explanations for brevity
+            """, resume_id=resume_id, job_id=job_id, limit=limit)
+            return [{"candidateSkill": record["candidateSkill"], "jobSkill": record["jobSkill"],
+                     "pathLength": record["pathLength"], "relations": record["relations"]} for record in result]
+
+    def direct_overlap(self, resume_id, job_id):
+        with self.driver.session() as session:
+            return session.run("""
+                MATCH (r:Resume {id: $resume_id})-[:HAS]->(s:Skill)<-[:REQUIRES]-(j:Job {id: $job_id})
+                RETURN count(s) > 0 AS hasOverlap
+            """, resume_id=resume_id, job_id=job_id).single()["hasOverlap"]
+
+    def explore(self, skill_name, limit=25):
+        with self.driver.session() as session:
+            result = session.run("""
+                MATCH (s:Skill {name: $skill_name})-[r:RELATED_TO|IS_A]-(s2:Skill)
+                RETURN s2.name AS relatedSkill, type(r) AS relationType, r.confidence as confidence,
+                       CASE WHEN startNode(r) = s THEN 'out' ELSE 'in' END AS direction
+                ORDER BY relationType, confidence DESC, relatedSkill
+                LIMIT $limit
+            """, skill_name=skill_name, limit=limit)
+            return [{"skill": record["relatedSkill"], "type": record["relationType"],
+                     "confidence": record["confidence"],
+                     "direction": record["direction"]}  # for IS_A: 'out' = parent category, 'in' = sub-skill
+                    for record in result]
+
+
+# --- In-process ---
+
+class InMemoryGraphStore(GraphStore):
+    """
+    GraphStore held in process memory. Skills are interned to row numbers;
+    each job/resume keeps an array of its skill rows, and per-skill sets of
+    job/resume rows are the inverted index the scorers start from, so a query
+    touches only the jobs/resumes sharing (or related to) a skill. Relations
+    are parallel arrays with a per-skill incidence list. Thread-safe.
+    """
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.skill_names = []
+        self.skill_ids = {}
+        self.job_ids, self.job_titles, self.job_skills = [], [], []
+        self.job_rows = {}
+        self.resume_ids, self.resume_props, self.resume_skills = [], [], []
+        self.resume_rows = {}
+        self.skill_jobs = []      # skill row -> set of job rows
+        self.skill_resumes = []   # skill row -> set of resume rows
+        self.rel_from, self.rel_to, self.rel_type = array("I"), array("I"), array("B")
+        self.rel_confidence, self.rel_source, self.rel_updated_at = array("d"), [], []
+        self.rel_keys = {}        # merge key -> relation row
+        self.skill_rels = []      # skill row -> [relation rows touching it]
+        self.similar = {}         # skill row -> [(target row, hops, confidence)]
+        self.similar_to = {}      # the same, reversed: target row -> [(source row, hops, confidence)]
+
+    # -- loading --
+
+    def _skill(self, name):
+        idx = self.skill_ids.get(name)
+        if idx is None:
+            idx = self.skill_ids[name] = len(self.skill_names)
+            self.skill_names.append(name)
+            self.skill_jobs.append(set())
+            self.skill_resumes.append(set())
+            self.skill_rels.append([])
+        return idx
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Builds the store from a graph_snapshot.GraphSnapshot, reusing its skill numbering and closure."""
+        store = cls()
+        with store._lock:
+            for name in snapshot.skill_names():
+                store._skill(name)
+            titles = snapshot.strings("job.title")
+            for row, job_id in enumerate(snapshot.strings("job.id")):
+                store._put_job(job_id, titles[row], snapshot.skill_slice("job", row))
+            fields = {field: snapshot.strings(f"resume.{field}") for field in ("name", "file_id", "email", "phone", "summary")}
+            for row, resume_id in enumerate(snapshot.strings("resume.id")):
+                store._put_resume(resume_id, {field: column[row] for field, column in fields.items()},
+                                  snapshot.skill_slice("resume", row))
+            for rel in snapshot.iter_relations():
+                store._append_relation(rel["relation_type"], store.skill_ids[rel["from"]], store.skill_ids[rel["to"]],
+                                       rel["confidence"], rel["source"], rel["updated_at"])
+            columns = [snapshot.column(f"sim.{field}") for field in ("from", "to", "hops", "confidence")]
+            for a, b, hops, confidence in zip(*columns):
+                store.similar.setdefault(a, []).append((b, hops, confidence))
+            store._index_similar()
+        return store
+
+    def _put_job(self, job_id, title, skills):
+        row = self.job_rows.get(job_id)
+        if row is None:
+            row = self.job_rows[job_id] = len(self.job_ids)
+            self.job_ids.append(job_id)
+            self.job_titles.append(title)
+            self.job_skills.append(array("I"))
+        self.job_titles[row] = title
+        current = self.job_skills[row]
+        for idx in skills:
+            if row not in self.skill_jobs[idx]:
+                current.append(idx)
+                self.skill_jobs[idx].add(row)
+
+    def _put_resume(self, resume_id, props, skills):
+        row = self.resume_rows.get(resume_id)
+        if row is None:
+            row = self.resume_rows[resume_id] = len(self.resume_ids)
+            self.resume_ids.append(resume_id)
+            self.resume_props.append(props)
+            self.resume_skills.append(array("I"))
+        for idx in self.resume_skills[row]:
+            self.skill_resumes[idx].discard(row)
+        self.resume_props[row] = props
+        self.resume_skills[row] = array("I", dict.fromkeys(skills))
+        for idx in self.resume_skills[row]:
+            self.skill_resumes[idx].add(row)
+
+    def _append_relation(self, rel_type, a, b, confidence, source, updated_at):
+        row = len(self.rel_from)
+        self.rel_from.append(a)
+        self.rel_to.append(b)
+        self.rel_type.append(RELATION_TYPES.index(rel_type))
+        self.rel_confidence.append(confidence)
+        self.rel_source.append(source)
+        self.rel_updated_at.append(updated_at)
+        self.skill_rels[a].append(row)
+        if b != a:
+            self.skill_rels[b].append(row)
+        key = (rel_type, a, b) if rel_type == "IS_A" else (rel_type, min(a, b), max(a, b))
+        self.rel_keys.setdefault(key, row)
+        return row
+
+    # -- writes --
+
+    def upsert_jobs(self, rows, batch_size=500):
+        count = 0
+        with self._lock:
+            for row in rows:
+                self._put_job(row["id"], row.get("title"), [self._skill(name) for name in row.get("skills") or []])
+                count += 1
+        return count
+
+    def upsert_resumes(self, rows, batch_size=500):
+        count = 0
+        with self._lock:
+            for row in rows:
+                props = {field: row.get(field) for field in ("name", "file_id", "email", "phone", "summary")}
+                self._put_resume(row["id"], props, [self._skill(name) for name in row.get("skills") or []])
+                count += 1
+        return count
+
+    def delete_resume(self, resume_id):
+        with self._lock:
+            row = self.resume_rows.pop(resume_id, None)
+            if row is None:
+                return
+            for idx in self.resume_skills[row]:
+                self.skill_resumes[idx].discard(row)
+            # The row stays allocated (rows are never renumbered) but is unreachable
+            self.resume_ids[row] = None
+            self.resume_skills[row] = array("I")
+
+    def resume_skill_names(self, resume_ids):
+        with self._lock:
+            return {resume_id: [self.skill_names[idx] for idx in self.resume_skills[self.resume_rows[resume_id]]]
+                    for resume_id in resume_ids if resume_id in self.resume_rows}
+
+    def add_relations(self, relations, batch_size=500):
+        written = 0
+        with self._lock:
+            for rel_type, rows in _relation_rows(relations).items():
+                for rel in rows:
+                    a, b = self._skill(rel["from"]), self._skill(rel["to"])
+                    key = (rel_type, a, b) if rel_type == "IS_A" else (rel_type, min(a, b), max(a, b))
+                    existing = self.rel_keys.get(key)
+                    if existing is None:
+                        self._append_relation(rel_type, a, b, rel["confidence"], rel["source"], rel["updated_at"])
+                    else:
+                        self.rel_confidence[existing] = rel["confidence"]
+                        self.rel_source[existing] = rel["source"]
+                        self.rel_updated_at[existing] = rel["updated_at"]
+                    written += 1
+        return written
+
+    def adjacency(self):
+        """{skill: [(neighbour, confidence), ...]}: RELATED_TO both ways, IS_A child -> parent."""
+        names = self.skill_names
+        adjacency = {}
+        for row in range(len(self.rel_from)):
+            a, b, confidence = names[self.rel_from[row]], names[self.rel_to[row]], self.rel_confidence[row]
+            adjacency.setdefault(a, []).append((b, confidence))
+            if RELATION_TYPES[self.rel_type[row]] == "RELATED_TO":
+                adjacency.setdefault(b, []).append((a, confidence))
+        return adjacency
+
+    def incident_relations(self, names):
+        """(from, to, rel_type, confidence) of every relation touching one of the named skills."""
+        skill_names = self.skill_names
+        for name in names:
+            idx = self.skill_ids.get(name)
+            if idx is None:
+                continue
+            for row in self.skill_rels[idx]:
+                yield (skill_names[self.rel_from[row]], skill_names[self.rel_to[row]],
+                       RELATION_TYPES[self.rel_type[row]], self.rel_confidence[row])
+
+    def refresh_similarity(self, changed_skills=None, max_hops=3, top_k=25, decay=0.5, batch_size=500,
+                           built_at=None):
+        with self._lock:
+            if changed_skills is None:
+                adjacency = self.adjacency()
+            else:
+                adjacency = local_adjacency(changed_skills, 2 * max_hops, self.incident_relations)
+            rows = closure_rows(adjacency, changed_skills, max_hops, decay, top_k)
+            if changed_skills is None:
+                self.similar = {}
+            for row in rows:
+                self.similar[self.skill_ids[row["source"]]] = [
+                    (self.skill_ids[n["name"]], n["hops"], n["confidence"]) for n in row["neighbours"]]
+            self._index_similar()
+        return len(rows)
+
+    def _index_similar(self):
+        self.similar_to = {}
+        for source, targets in self.similar.items():
+            for target, hops, confidence in targets:
+                self.similar_to.setdefault(target, []).append((source, hops, confidence))
+
+    # -- reads --
+
+    def _neighbours(self, idx):
+        return {self.rel_to[row] if self.rel_from[row] == idx else self.rel_from[row] for row in self.skill_rels[idx]}
+
+    def _related_pairs(self, js):
+        """(candidate skill, count) for relations a holder of the candidate skill gets related credit for js."""
+        counts = {}
+        for row in self.skill_rels[js]:
+            a, b = self.rel_from[row], self.rel_to[row]
+            if RELATION_TYPES[self.rel_type[row]] == "RELATED_TO":
+                other = b if a == js else a
+            elif b == js:
+                other = a  # IS_A counts only when the candidate's skill is the child
+            else:
+                continue
+            counts[other] = counts.get(other, 0) + 1
+        return counts
+
+    def _multihop_score(self, hops, confidence, max_hops, hop_decay, related_weight, use_confidence):
+        if hops > max_hops:
+            return None
+        return related_weight * (hop_decay ** (hops - 1)) * (confidence if use_confidence else 1.0)
+
+    @staticmethod
+    def _ranked(rows, key):
+        return sorted(rows, key=lambda row: (-row["weightedScore"], row[key]))
+
+    def recommend(self, resume_id, limit=5, mode="expanded", max_hops=2, hop_decay=0.5, related_weight=0.5,
+                  use_confidence=True):
+        with self._lock:
+            row = self.resume_rows.get(resume_id)
+            if row is None:
+                return []
+            held = set(self.resume_skills[row])
+            scores = {}  # job row -> [weighted, direct, related]
+
+            if mode == "multihop":
+                # Best way each job skill is covered: itself (1.0) or through SIMILAR_TO from a held skill
+                covered = {idx: (1.0, 1) for idx in held}
+                for rs in held:
+                    for js, hops, confidence in self.similar.get(rs, ()):
+                        score = self._multihop_score(hops, confidence, max_hops, hop_decay, related_weight,
+                                                     use_confidence)
+                        if score is None or js in held:
+                            continue
+                        if score > covered.get(js, (0.0, 0))[0]:
+                            covered[js] = (score, 0)
+                for js, (score, direct) in covered.items():
+                    for job in self.skill_jobs[js]:
+                        entry = scores.setdefault(job, [0.0, 0, 0])
+                        entry[0] += 1.0 if direct else score
+                        entry[1] += direct
+                        entry[2] += 1 - direct
+            else:
+                for rs in held:
+                    for job in self.skill_jobs[rs]:
+                        entry = scores.setdefault(job, [0.0, 0, 0])
+                        entry[1] += 1
+                if mode != "direct":
+                    # Required skills the resume lacks, reached through a relation from a held skill
+                    for js in {other for rs in held for other in self._neighbours(rs)} - held:
+                        related = sum(count for rs, count in self._related_pairs(js).items() if rs in held)
+                        if not related:
+                            continue
+                        for job in self.skill_jobs[js]:
+                            scores.setdefault(job, [0.0, 0, 0])[2] += related
+                for entry in scores.values():
+                    entry[0] = entry[1] * 1.0 + (entry[2] * 0.5 if mode != "direct" else 0)
+
+            results = [{"job_id": self.job_ids[job], "job_title": self.job_titles[job], "weightedScore": weighted,
+                        "directScore": direct, "relatedScore": related}
+                       for job, (weighted, direct, related) in scores.items()]
+            return self._ranked(results, "job_id")[:limit]
+
+    def eligible(self, job_id, mode="expanded", max_hops=2, hop_decay=0.5, related_weight=0.5,
+                 use_confidence=True):
+        with self._lock:
+            row = self.job_rows.get(job_id)
+            if row is None:
+                return []
+            job_skills = set(self.job_skills[row])
+            scores = {}  # resume row -> [weighted, direct, related]
+
+            if mode == "multihop":
+                # Best way each candidate covers each job skill
+                for js in job_skills:
+                    best = dict.fromkeys(self.skill_resumes[js], 1.0)  # direct holders
+                    for rs, hops, confidence in self.similar_to.get(js, ()):
+                        score = self._multihop_score(hops, confidence, max_hops, hop_decay, related_weight,
+                                                     use_confidence)
+                        if score is None:
+                            continue
+                        for resume in self.skill_resumes[rs]:
+                            if score > best.get(resume, 0.0):
+                                best[resume] = score
+                    for resume, score in best.items():
+                        entry = scores.setdefault(resume, [0.0, 0, 0])
+                        entry[0] += score
+                        if score == 1.0 and resume in self.skill_resumes[js]:
+                            entry[1] += 1
+                        else:
+                            entry[2] += 1
+            else:
+                for js in job_skills:
+                    for resume in self.skill_resumes[js]:
+                        scores.setdefault(resume, [0.0, 0, 0])[1] += 1
+                    for rs, count in self._related_pairs(js).items():
+                        if rs in job_skills:
+                            continue
+                        for resume in self.skill_resumes[rs]:
+                            scores.setdefault(resume, [0.0, 0, 0])[2] += count
+                for entry in scores.values():
+                    entry[0] = entry[1] * 1.0 + entry[2] * 0.5
+
+            results = []
+            for resume, (weighted, direct, related) in scores.items():
+                if direct + related <= 0:
+                    continue
+                props = self.resume_props[resume]
+                results.append({"resume_id": self.resume_ids[resume], "resume_name": props.get("name"),
+                                "file_id": props.get("file_id"), "email": props.get("email"),
+                                "phone": props.get("phone"), "summary": props.get("summary"),
+                                "weightedScore": weighted, "directScore": direct, "relatedScore": related})
+            return self._ranked(results, "resume_id")
+
+    def explain(self, resume_id, job_id, limit=10):
+        with self._lock:
+            resume, job = self.resume_rows.get(resume_id), self.job_rows.get(job_id)
+            if resume is None or job is None:
+                return []
+            held, required = set(self.resume_skills[resume]), set(self.job_skills[job])
+            names = self.skill_names
+            paths = []
+            for rs in held:
+                for js in required:
+                    if rs == js:
+                        paths.append((0, names[rs], names[js], []))
+                        continue
+                    # One qualifying edge is a shortest path; IS_A sorts first like a stable pick
+                    types = sorted(RELATION_TYPES[self.rel_type[row]] for row in self.skill_rels[rs]
+                                   if {self.rel_from[row], self.rel_to[row]} == {rs, js}
+                                   and (RELATION_TYPES[self.rel_type[row]] == "RELATED_TO" or self.rel_from[row] == rs))
+                    if types:
+                        paths.append((1, names[rs], names[js], types[:1]))
+            paths.sort(key=lambda path: path[:3])
+            return [{"candidateSkill": candidate, "jobSkill": job_skill, "pathLength": length, "relations": relations}
+                    for length, candidate, job_skill, relations in paths[:limit]]
+
+    def direct_overlap(self, resume_id, job_id):
+        with self._lock:
+            resume, job = self.resume_rows.get(resume_id), self.job_rows.get(job_id)
+            if resume is None or job is None:
+                return False
+            return not set(self.resume_skills[resume]).isdisjoint(self.job_skills[job])
+
+    def explore(self, skill_name, limit=25):
+        with self._lock:
+            idx = self.skill_ids.get(skill_name)
+            if idx is None:
+                return []
+            relations = []
+            for row in self.skill_rels[idx]:
+                a, b = self.rel_from[row], self.rel_to[row]
+                relations.append({"skill": self.skill_names[b if a == idx else a],
+                                  "type": RELATION_TYPES[self.rel_type[row]],
+                                  "confidence": self.rel_confidence[row],
+                                  "direction": "out" if a == idx else "in"})
+            relations.sort(key=lambda rel: (rel["type"], -rel["confidence"], rel["skill"]))
+            return relations[:limit]
+
+    def stats(self):
+        with self._lock:
+            return {"skills": len(self.skill_names), "jobs": len(self.job_rows), "resumes": len(self.resume_rows),
+                    "requires": sum(len(skills) for skills in self.job_skills),
+                    "has": sum(len(skills) for skills in self.resume_skills),
+                    "relations": len(self.rel_from),
+                    "similar": sum(len(targets) for targets in self.similar.values())}
@@ -1,4 +1,7 @@
-from pymongo import MongoClient
-client = MongoClient("mongodb://localhost:27017")
-db = client["Resume_Matcher"]
+try:
+    from backend import connections
+except ImportError:  # run from inside backend/
+    import connections
+
+db = connections.get_database("Resume_Matcher")
 print(db.list_collection_names())
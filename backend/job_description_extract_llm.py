@@ -1,16 +1,11 @@
-import google.generativeai as genai
-import os
 import json
 import sys
-from pymongo import MongoClient
-from dotenv import load_dotenv
 
-# --- 1. Load .env and Configure Gemini ---
-load_dotenv()
-api_key = os.environ.get("GEMINI_API_KEY")
-if not api_key:
-    raise Exception("Missing GEMINI_API_KEY in environment.")
-genai.configure(api_key=api_key)
+# --- 1. Shared clients (.env is loaded there; Gemini is configured on first use) ---
+try:
+    from backend import connections
+except ImportError:  # run from inside backend/
+    import connections
 
 # --- 2. Extract Skills from Job Description ---
 def extract_skills_with_gemini(job_description):
@@ -31,10 +26,9 @@ def extract_skills_with_gemini(job_description):
     JSON Output:
     """
 
-    model = genai.GenerativeModel('gemini-2.5-flash-latest')
-
     try:
-        response = model.generate_content(prompt)
+        model = connections.get_gemini_model('gemini-2.5-flash-latest')
+        response = connections.call_gemini(model, prompt)
         response_text = response.text.strip()
 
         start_index = response_text.find('{')
@@ -53,10 +47,9 @@ def extract_skills_with_gemini(job_description):
         return []
 
 # --- 3. Save Data to MongoDB (Different Collection) ---
-def save_to_mongodb(data, db_name="Resume_Matcher", collection_name="JD_skills", mongo_uri="mongodb://localhost:27017"):
+def save_to_mongodb(data, db_name="Resume_Matcher", collection_name="JD_skills", mongo_uri=None):
     try:
-        client = MongoClient(mongo_uri)
-        db = client[db_name]
+        db = connections.get_database(db_name, mongo_uri)
         collection = db[collection_name]
         result = collection.insert_one(data)
         print(f"Saved to MongoDB with _id: {result.inserted_id}")
@@ -0,0 +1,391 @@
+"""
+End-to-end HTTP load test for the FastAPI app.
+
+Launches main:app locally with Gemini replaced by a stub (fixed latency,
+canned JSON) and drives it with an async load generator using scripted
+traffic mixes and ramp profiles. Reports throughput, latency percentiles and
+error rates per endpoint, and flags event-loop blocking using a loop-lag
+monitor installed inside the stubbed server.
+
+Usage (from the backend folder, with MongoDB and Neo4j running):
+    python synthetic_data.py --resumes 2000 --jobs 300      # seed data first
+    python load_test.py --mix read_heavy --profile ramp
+    python load_test.py --mix mixed --profile spike --stub-latency 1.5 --json report.json
+    python load_test.py --base-url http://127.0.0.1:8000 --no-launch   # existing server, no loop-lag data
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+
+# ---------------------------------------------------------------------------
+# Traffic mixes (relative weights) and ramp profiles (seconds, concurrency)
+# ---------------------------------------------------------------------------
+
+TRAFFIC_MIXES = {
+    "read_heavy": {"recommend_jobs": 60, "my_resume": 36, "parse_resume": 2, "extract_jd_skills": 2},
+    "mixed": {"recommend_jobs": 45, "my_resume": 30, "parse_resume": 15, "extract_jd_skills": 10},
+    "reads_only": {"recommend_jobs": 60, "my_resume": 40},
+    "writes_only": {"parse_resume": 60, "extract_jd_skills": 40},
+}
+
+RAMP_PROFILES = {
+    "smoke": [(10, 2)],
+    "steady": [(60, 20)],
+    "ramp": [(20, 5), (20, 20), (20, 50), (20, 100)],
+    "spike": [(20, 10), (10, 150), (20, 10)],
+}
+
+LOOP_LAG_PATH = "/__loadtest/loop_lag"
+BLOCKING_THRESHOLD_MS = 100.0
+
+STUB_SKILLS = ["Python", "Sql", "Docker", "React", "Mongodb", "Neo4j", "Fastapi", "Kubernetes", "Aws", "Communication"]
+
+
+# ---------------------------------------------------------------------------
+# Stubbed server
+# ---------------------------------------------------------------------------
+
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGenerativeModel:
+    """
+    Drop-in for genai.GenerativeModel. Sleeps for STUB_LATENCY seconds (a blocking
+    sleep, exactly like the real client) and answers each of the app's three prompt
+    kinds with canned JSON.
+    """
+    latency = 0.5
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        rng = random.Random(hash(prompt))
+        if "knowledge graph builder" in prompt:
+            match = re.search(r'For the \*single\* skill "(.+?)"', prompt)
+            skill = match.group(1) if match else "Python"
+            related = [s for s in STUB_SKILLS if s != skill]
+            return _StubResponse(json.dumps({"relations": [
+                {"from": skill, "to": to, "relation_type": "RELATED_TO", "confidence": 0.8}
+                for to in rng.sample(related, 2)
+            ]}))
+        if "resume parser" in prompt:
+            return _StubResponse(json.dumps({
+                "name": "Load Test", "email": "load@test.dev", "phone": "+1 555 0100", "location": "Remote",
+                "summary": "Synthetic candidate.",
+                "skills": rng.sample(STUB_SKILLS, 5),
+                "professional_experience": [{"title": "Engineer", "company": "Acme", "dates": "2020 - 2023", "responsibilities": ["Built things"]}],
+                "projects": [{"title": "Benchmark", "details": ["Generated load"]}],
+                "education": [{"degree": "BSc Computer Science", "institution": "Test University", "start": "2016",
+                               "end": "2020", "grade": ""}],
+            }))
+        return _StubResponse(json.dumps({"skills": rng.sample(STUB_SKILLS, 6)}))
+
+
+def serve_stubbed_app(host: str, port: int, stub_latency: float):
+    """Runs main:app with Gemini stubbed and a loop-lag monitor route. Called in the child process."""
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    import google.generativeai as genai
+    StubGenerativeModel.latency = stub_latency
+    genai.GenerativeModel = StubGenerativeModel
+    genai.configure = lambda **kwargs: None
+
+    import uvicorn
+    import main
+
+    lag = {"max_ms": 0.0, "samples": 0, "over_threshold": 0, "total_ms": 0.0}
+
+    async def monitor_loop_lag(interval: float = 0.05):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            late_ms = (loop.time() - start - interval) * 1000
+            lag["samples"] += 1
+            lag["total_ms"] += late_ms
+            lag["max_ms"] = max(lag["max_ms"], late_ms)
+            if late_ms > BLOCKING_THRESHOLD_MS:
+                lag["over_threshold"] += 1
+
+    # main.app uses lifespan=, which makes on_event("startup") hooks dead code, so
+    # the monitor is started by wrapping the app's own lifespan instead.
+    app_lifespan = main.app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan_with_lag_monitor(app):
+        monitor = asyncio.get_running_loop().create_task(monitor_loop_lag())
+        try:
+            async with app_lifespan(app) as state:
+                yield state
+        finally:
+            monitor.cancel()
+
+    main.app.router.lifespan_context = lifespan_with_lag_monitor
+
+    @main.app.get(LOOP_LAG_PATH, include_in_schema=False)
+    async def loop_lag(reset: bool = False):
+        snapshot = dict(lag, mean_ms=lag["total_ms"] / lag["samples"] if lag["samples"] else 0.0)
+        if reset:
+            lag.update(max_ms=0.0, samples=0, over_threshold=0, total_ms=0.0)
+        return snapshot
+
+    uvicorn.run(main.app, host=host, port=port, log_level="warning")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_ready(client, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("App did not become ready in time.")
+
+
+# ---------------------------------------------------------------------------
+# Requests
+# ---------------------------------------------------------------------------
+
+def _tiny_pdf(text: str) -> bytes:
+    import fitz  # PyMuPDF
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text, fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TrafficScript:
+    """Builds one request per call for the chosen endpoint, drawing ids from the seeded data."""
+
+    def __init__(self, resumes, rng: random.Random):
+        self.resumes = resumes
+        self.rng = rng
+        self.pdf = _tiny_pdf("Load Test\nload@test.dev\nSkills: Python, SQL, Docker\nExperience: Engineer at Acme")
+        self.writer_seq = 0
+
+    async def recommend_jobs(self, client):
+        resume = self.rng.choice(self.resumes)
+        mode = "direct" if self.rng.random() < 0.2 else "expanded"
+        return await client.get("/recommend_jobs/", params={"resume_id": resume["id"], "mode": mode})
+
+    async def my_resume(self, client):
+        resume = self.rng.choice(self.resumes)
+        return await client.get("/my_resume/", params={"username": resume["username"]})
+
+    async def parse_resume(self, client):
+        self.writer_seq += 1
+        files = {"file": ("loadtest.pdf", self.pdf, "application/pdf")}
+        data = {"username": f"loadtest_writer_{self.writer_seq % 50}"}
+        return await client.post("/parse_resume/", files=files, data=data)
+
+    async def extract_jd_skills(self, client):
+        self.writer_seq += 1
+        data = {
+            "job_title": f"Load Test Engineer {self.writer_seq}",
+            "company_portal_link": "https://careers.example.com/loadtest",
+            "job_description": "We need Python, SQL and Docker experience to build graph services.",
+        }
+        return await client.post("/extract_jd_skills/", data=data)
+
+
+def _load_seed_resumes(limit: int = 2000):
+    """Reads resume ids/usernames straight from MongoDB so reads hit real documents."""
+    from pymongo import MongoClient
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"), serverSelectionTimeoutMS=5000)
+    cursor = client["Resume_Matcher"]["resumes"].find({"username": {"$exists": True}}, {"_id": 1, "username": 1}).limit(limit)
+    return [{"id": str(d["_id"]), "username": d["username"]} for d in cursor]
+
+
+# ---------------------------------------------------------------------------
+# Load generator
+# ---------------------------------------------------------------------------
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.status_codes = {}
+
+    def record(self, endpoint, latency_s, status):
+        self.latencies.setdefault(endpoint, []).append(latency_s)
+        codes = self.status_codes.setdefault(endpoint, {})
+        codes[status] = codes.get(status, 0) + 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+async def run_load(base_url, mix_name, profile_name, resumes, seed=7, timeout=60.0, sample_loop_lag=True):
+    import httpx
+
+    mix = TRAFFIC_MIXES[mix_name]
+    stages = RAMP_PROFILES[profile_name]
+    endpoints, weights = list(mix), list(mix.values())
+    if not resumes and any(e in endpoints for e in ("recommend_jobs", "my_resume")):
+        raise RuntimeError("No resumes found in MongoDB; run synthetic_data.py first or use --mix writes_only.")
+
+    rng = random.Random(seed)
+    script = TrafficScript(resumes, rng)
+    stats = Stats()
+    stage_reports = []
+    target = {"concurrency": 0}
+    stop = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=max(c for _, c in stages) + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await _wait_until_ready(client)
+        if sample_loop_lag:
+            await client.get(LOOP_LAG_PATH, params={"reset": True})
+
+        async def virtual_user(slot):
+            while not stop.is_set():
+                if slot >= target["concurrency"]:
+                    await asyncio.sleep(0.05)
+                    continue
+                endpoint = rng.choices(endpoints, weights=weights)[0]
+                start = time.perf_counter()
+                try:
+                    response = await getattr(script, endpoint)(client)
+                    status = response.status_code
+                except Exception as e:
+                    status = type(e).__name__
+                stats.record(endpoint, time.perf_counter() - start, status)
+
+        users = [asyncio.create_task(virtual_user(i)) for i in range(max(c for _, c in stages))]
+        t0 = time.perf_counter()
+        for duration, concurrency in stages:
+            target["concurrency"] = concurrency
+            before = sum(len(v) for v in stats.latencies.values())
+            await asyncio.sleep(duration)
+            report = {"concurrency": concurrency, "duration_s": duration,
+                      "requests": sum(len(v) for v in stats.latencies.values()) - before}
+            if sample_loop_lag:
+                lag = (await client.get(LOOP_LAG_PATH, params={"reset": True})).json()
+                report["loop_lag_max_ms"] = round(lag["max_ms"], 1)
+                report["loop_lag_mean_ms"] = round(lag["mean_ms"], 1)
+                report["loop_blocked_samples"] = lag["over_threshold"]
+                report["loop_lag_samples"] = lag["samples"]
+            stage_reports.append(report)
+            print(f"  stage c={concurrency:<4} {duration}s -> {report['requests']} requests"
+                  + (f", loop lag max {report['loop_lag_max_ms']} ms" if sample_loop_lag else ""))
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        await asyncio.gather(*users, return_exceptions=True)
+
+    endpoints_report = {}
+    for endpoint, values in stats.latencies.items():
+        values.sort()
+        errors = stats.errors.get(endpoint, 0)
+        endpoints_report[endpoint] = {
+            "requests": len(values),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "error_rate": round(errors / len(values), 4),
+            "p50_ms": round(_percentile(values, 50) * 1000, 1),
+            "p90_ms": round(_percentile(values, 90) * 1000, 1),
+            "p99_ms": round(_percentile(values, 99) * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1),
+            "status_codes": {str(k): v for k, v in stats.status_codes[endpoint].items()},
+        }
+
+    blocked_stages = [s for s in stage_reports if s.get("loop_lag_max_ms", 0) > BLOCKING_THRESHOLD_MS]
+    # A stage without samples means the monitor never ran; that is "not measured", not "no blocking".
+    lag_measured = sample_loop_lag and all(s["loop_lag_samples"] > 0 for s in stage_reports)
+    return {
+        "mix": mix_name,
+        "profile": profile_name,
+        "elapsed_s": round(elapsed, 1),
+        "endpoints": endpoints_report,
+        "stages": stage_reports,
+        "event_loop_blocking": bool(blocked_stages) if lag_measured else None,
+        "loop_lag_monitored": lag_measured,
+    }
+
+
+def print_report(report):
+    print("\n" + "=" * 96)
+    print(f" Mix: {report['mix']}   Profile: {report['profile']}   Elapsed: {report['elapsed_s']}s")
+    print("=" * 96)
+    print(f" {'endpoint':<20}{'reqs':>8}{'rps':>9}{'err%':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for endpoint, r in sorted(report["endpoints"].items()):
+        print(f" {endpoint:<20}{r['requests']:>8}{r['throughput_rps']:>9}{r['error_rate'] * 100:>7.1f}%"
+              f"{r['p50_ms']:>10}{r['p90_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+    if report["event_loop_blocking"]:
+        print(f"\n⚠️  Event loop blocked for more than {BLOCKING_THRESHOLD_MS:.0f} ms during: "
+              + ", ".join(f"c={s['concurrency']} (max {s['loop_lag_max_ms']} ms)" for s in report["stages"]
+                          if s.get("loop_lag_max_ms", 0) > BLOCKING_THRESHOLD_MS))
+        print("   Look for blocking calls (Gemini, PyMuPDF, Mongo/Neo4j drivers) inside 'async def' endpoints.")
+    elif report["event_loop_blocking"] is False:
+        print("\n✅ No event-loop blocking detected.")
+    elif report["stages"] and "loop_lag_samples" in report["stages"][0]:
+        print("\n⚠️  The loop-lag monitor collected no samples; event-loop blocking was not measured.")
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mixed-traffic HTTP load test for the Resume Matcher API.")
+    parser.add_argument("--mix", choices=sorted(TRAFFIC_MIXES), default="read_heavy")
+    parser.add_argument("--profile", choices=sorted(RAMP_PROFILES), default="ramp")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="seconds each stubbed Gemini call blocks for")
+    parser.add_argument("--base-url", help="target URL (default: launch a stubbed app on a free port)")
+    parser.add_argument("--no-launch", action="store_true", help="do not launch the app; requires --base-url")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the full report to this file")
+    parser.add_argument("--serve-stub", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        serve_stubbed_app("127.0.0.1", args.port, args.stub_latency)
+        sys.exit(0)
+
+    server = None
+    base_url = args.base_url
+    if not args.no_launch:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve-stub", "--port", str(port),
+                                   "--stub-latency", str(args.stub_latency)], cwd=os.path.dirname(os.path.abspath(__file__)))
+        print(f"🚀 Launched stubbed app at {base_url} (Gemini latency {args.stub_latency}s)")
+    elif not base_url:
+        parser.error("--no-launch requires --base-url")
+
+    try:
+        resumes = _load_seed_resumes()
+        print(f"📦 Using {len(resumes)} seeded resumes for read traffic.")
+        report = asyncio.run(run_load(base_url, args.mix, args.profile, resumes, seed=args.seed,
+                                      sample_loop_lag=not args.no_launch))
+        print_report(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=4)
+            print(f"💾 Report written to {args.json}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
@@ -1,55 +1,127 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse, StreamingResponse
-from pymongo import MongoClient
+from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, Request, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from pymongo import UpdateOne, ReplaceOne, DeleteOne
 import gridfs
 from bson.objectid import ObjectId
+from bson.binary import Binary
 from fastapi.middleware.cors import CORSMiddleware
-from passlib.context import CryptContext
-from neo4j import GraphDatabase
-import google.generativeai as genai
+from starlette.concurrency import run_in_threadpool
 import fitz  # PyMuPDF
 import os
 import json
-from dotenv import load_dotenv
 import tempfile
 import traceback
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import hashlib
+import threading
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+import heapq
+import socket
 import time
+import zlib
 
 # ---------------------------------------------------------------------------
 # 1️⃣ Load environment & configure Gemini + MongoDB + Neo4j
 # ---------------------------------------------------------------------------
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Clients live in connections.py (shared with the CLI tools): pooled, created on
+# first use and closed by the app lifespan, so importing this module stays cheap
+# and works without any service up.
+try:
+    from backend import connections
+except ImportError:  # started from inside backend/ (uvicorn main:app)
+    import connections
+
+GEMINI_API_KEY = connections.GEMINI_API_KEY
 if not GEMINI_API_KEY:
-    raise Exception("❌ Missing GEMINI_API_KEY in environment variables")
-
-genai.configure(api_key=GEMINI_API_KEY)
-
-# MongoDB Config
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-mongo_client = MongoClient(MONGO_URI)
-db = mongo_client["Resume_Matcher"]
-fs = gridfs.GridFS(db)
-
-# Neo4j Config
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "12345678")
-neo4j_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    print("⚠️ WARNING: GEMINI_API_KEY not set; Gemini-backed endpoints will fail until it is.")
+
+mongo_client = connections.mongo_client
+db = connections.db
+fs = connections.fs
+neo4j_driver = connections.neo4j_driver
+get_gemini_model = connections.get_gemini_model
+# Every Gemini request goes through call_gemini (timeouts, retries, circuit breaker)
+call_gemini = connections.call_gemini
+GeminiUnavailable = connections.GeminiUnavailable
+
+# Upper bound for each dependency check in /ready
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+
+# Password hashing (bcrypt in a dedicated process pool) + signed session tokens
+try:
+    from backend import security
+except ImportError:  # started from inside backend/ (uvicorn main:app)
+    import security
+
+# Resume text pre-processing for prompts (section detection, boilerplate, token budget)
+try:
+    from backend import resume_parser
+except ImportError:  # started from inside backend/ (uvicorn main:app)
+    import resume_parser
+
+# In-process BM25 index behind the "text" matching mode
+try:
+    from backend import text_index
+except ImportError:  # started from inside backend/ (uvicorn main:app)
+    import text_index
+
+# Graph operations behind the matching endpoints (Neo4j or in-process, see GRAPH_STORE)
+try:
+    from backend import graph_store
+except ImportError:  # started from inside backend/ (uvicorn main:app)
+    import graph_store
+
+# Columnar graph snapshots (export/import and the startup memory map)
+try:
+    from backend import graph_snapshot
+except ImportError:  # started from inside backend/ (uvicorn main:app)
+    import graph_snapshot
+
+# When true, user endpoints only accept a session token, not a bare username
+REQUIRE_SESSION_TOKEN = os.getenv("REQUIRE_SESSION_TOKEN", "false").lower() == "true"
 
 # ---------------------------------------------------------------------------
 # 2️⃣ Initialize FastAPI + CORS
 # ---------------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app):
+    # Startup never waits on a connection; /ready reports when dependencies are reachable
+    print("🚀 API started (clients connect on first use)")
+    if GRAPH_INDEXES_ON_STARTUP and GRAPH_STORE != "memory":
+        threading.Thread(target=ensure_graph_indexes, kwargs={"quiet_failure": True}, daemon=True).start()
+    if GRAPH_SNAPSHOT_PATH:
+        try:
+            map_graph_snapshot()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ WARNING: Could not map graph snapshot {GRAPH_SNAPSHOT_PATH}: {e}")
+    if GRAPH_STORE == "memory" and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        # Each process would hold its own graph, and outbox entries reach only one of them
+        raise RuntimeError("GRAPH_STORE=memory needs a single worker process (WEB_CONCURRENCY=1)")
+    if not security.SESSION_SECRET_CONFIGURED and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        # Each worker would sign with its own random secret and reject the others' tokens
+        raise RuntimeError("SESSION_SECRET must be set when running more than one worker (WEB_CONCURRENCY > 1)")
+    if GRAPH_OUTBOX_WORKER:
+        start_graph_outbox_worker()
+    yield
+    print("🛑 Shutting down: saving text indexes, closing clients and the bcrypt pool")
+    stop_graph_outbox_worker()
+    save_text_indexes()
+    close_graph_snapshot()
+    security.shutdown_bcrypt_pool()
+    connections.close_all()
+
+
 app = FastAPI(
     title="Resume & JD Analyzer API with Neo4j Integration",
     description="FastAPI + Gemini + MongoDB + Neo4j + Dynamic Ontology + XAI",
-    version="4.5"  # Version bump for Cypher syntax fix
+    version="4.5",  # Version bump for Cypher syntax fix
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -164,19 +236,7 @@ def normalize_parsed_resume(parsed):
         elif isinstance(raw_skills, str):
             skills = [s.strip() for s in raw_skills.split(",") if s.strip()]
 
-        seen = set()
-        clean_skills = []
-        for s in skills:
-            # Simple normalization: capitalize first letter, rest lower
-            s_normalized = s.strip().capitalize()
-            # 🚀 Avoid empty strings after normalization
-            if not s_normalized:
-                continue
-            key = s_normalized.lower()
-            if key not in seen and s_normalized:
-                seen.add(key)
-                clean_skills.append(s_normalized)
-        out['skills'] = clean_skills
+        out['skills'] = _clean_skill_list(skills)
 
         # --- Professional Experience normalization ---
         pro = parsed.get("professional_experience") or parsed.get("work_experience") or parsed.get("experience") or []
@@ -259,6 +319,174 @@ def normalize_parsed_resume(parsed):
         return {"error": "normalization_failed", "parsed_raw": parsed}
 
 
+def _clean_skill_list(skills):
+    """Capitalize, drop empties and de-duplicate case-insensitively (order kept)."""
+    seen = set()
+    clean_skills = []
+    for s in skills:
+        # Simple normalization: capitalize first letter, rest lower
+        s_normalized = str(s).strip().capitalize()
+        # 🚀 Avoid empty strings after normalization
+        if not s_normalized:
+            continue
+        key = s_normalized.lower()
+        if key not in seen:
+            seen.add(key)
+            clean_skills.append(s_normalized)
+    return clean_skills
+
+
+# --- Schema-constrained Gemini output ---
+# Resume and JD prompts send a response_schema, so Gemini answers in exactly
+# our normalized shape. validate_resume_response() checks that shape in one
+# pass; only answers that violate it go through the heuristic
+# normalize_parsed_resume(). Counters expose how often that happens.
+GEMINI_RESPONSE_SCHEMA = os.getenv("GEMINI_RESPONSE_SCHEMA", "true").lower() == "true"
+
+_STRING = {"type": "STRING"}
+_STRING_LIST = {"type": "ARRAY", "items": _STRING}
+
+RESUME_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "name": _STRING,
+        "email": _STRING,
+        "phone": _STRING,
+        "location": _STRING,
+        "summary": _STRING,
+        "skills": _STRING_LIST,
+        "professional_experience": {"type": "ARRAY", "items": {
+            "type": "OBJECT",
+            "properties": {"title": _STRING, "company": _STRING, "dates": _STRING, "responsibilities": _STRING_LIST},
+            "required": ["title", "company", "dates", "responsibilities"],
+        }},
+        "projects": {"type": "ARRAY", "items": {
+            "type": "OBJECT",
+            "properties": {"title": _STRING, "details": _STRING_LIST},
+            "required": ["title", "details"],
+        }},
+        "education": {"type": "ARRAY", "items": {
+            "type": "OBJECT",
+            "properties": {"degree": _STRING, "institution": _STRING, "start": _STRING, "end": _STRING,
+                           "grade": _STRING},
+            "required": ["degree", "institution", "start", "end", "grade"],
+        }},
+    },
+    "required": ["name", "email", "phone", "location", "summary", "skills", "professional_experience", "projects",
+                 "education"],
+}
+
+JD_RESPONSE_SCHEMA = {"type": "OBJECT", "properties": {"skills": _STRING_LIST}, "required": ["skills"]}
+
+_schema_stats = {}
+_schema_stats_lock = threading.Lock()
+
+
+def _json_generation_config(schema=None):
+    config = {"response_mime_type": "application/json"}
+    if schema and GEMINI_RESPONSE_SCHEMA:
+        config["response_schema"] = schema
+    return config
+
+
+def _record_schema_result(kind: str, violation: Optional[str]):
+    """Counts schema hits and fallbacks (with the first violation found) per prompt kind."""
+    with _schema_stats_lock:
+        stats = _schema_stats.setdefault(kind, {"schema_ok": 0, "fallback": 0, "violations": {}})
+        if violation is None:
+            stats["schema_ok"] += 1
+        else:
+            stats["fallback"] += 1
+            stats["violations"][violation] = stats["violations"].get(violation, 0) + 1
+
+
+def get_schema_stats():
+    with _schema_stats_lock:
+        result = {}
+        for kind, stats in _schema_stats.items():
+            total = stats["schema_ok"] + stats["fallback"]
+            result[kind] = {**stats, "violations": dict(stats["violations"]), "total": total,
+                            "fallback_rate": round(stats["fallback"] / total, 4) if total else 0.0}
+        return result
+
+
+def _is_str_list(value):
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+_EDUCATION_FIELDS = ("degree", "institution", "start", "end", "grade")
+
+
+def _schema_violation(parsed):
+    """Returns None if parsed matches RESUME_RESPONSE_SCHEMA, else a short reason."""
+    if not isinstance(parsed, dict):
+        return "not_an_object"
+    for field in ("name", "email", "phone", "location", "summary"):
+        if not isinstance(parsed.get(field), str):
+            return f"{field}_not_string"
+    if not _is_str_list(parsed.get("skills")):
+        return "skills_not_string_list"
+    experience = parsed.get("professional_experience")
+    if not isinstance(experience, list):
+        return "professional_experience_not_list"
+    for item in experience:
+        if not isinstance(item, dict) or not all(isinstance(item.get(k), str) for k in ("title", "company", "dates")) \
+                or not _is_str_list(item.get("responsibilities")):
+            return "professional_experience_item_invalid"
+    projects = parsed.get("projects")
+    if not isinstance(projects, list):
+        return "projects_not_list"
+    for item in projects:
+        if not isinstance(item, dict) or not isinstance(item.get("title"), str) or not _is_str_list(item.get("details")):
+            return "projects_item_invalid"
+    education = parsed.get("education")
+    if not isinstance(education, list):
+        return "education_not_list"
+    for item in education:
+        if not isinstance(item, dict) or not all(isinstance(item.get(k), str) for k in _EDUCATION_FIELDS):
+            return "education_item_invalid"
+    return None
+
+
+def normalize_gemini_resume(parsed, record_stats: bool = True):
+    """
+    Fast path for schema-shaped Gemini output: a single validation pass and a
+    direct copy into the normalized document, no heuristic walk. Anything that
+    violates the schema (or pre-schema parsed_raw) falls back to normalize_parsed_resume.
+    record_stats=False keeps stored documents (the 'normalize' reparse) out of the
+    schema counters, which only describe live Gemini responses.
+    """
+    violation = _schema_violation(parsed)
+    if record_stats:
+        _record_schema_result("resume", violation)
+    if violation:
+        return normalize_parsed_resume(parsed)
+    return {
+        "parsed_raw": parsed,
+        "name": parsed["name"],
+        "email": parsed["email"],
+        "phone": parsed["phone"],
+        "summary": parsed["summary"],
+        "skills": _clean_skill_list(parsed["skills"]),
+        "professional_experience": [
+            {k: item[k] for k in ("title", "company", "dates", "responsibilities")}
+            for item in parsed["professional_experience"]
+        ],
+        "projects": [{"title": item["title"], "details": item["details"]} for item in parsed["projects"]],
+        "education": [{k: item[k] for k in _EDUCATION_FIELDS} for item in parsed["education"]],
+        "personal_information": {"name": parsed["name"],
+                                 "contact_details": {"email": parsed["email"], "phone": parsed["phone"],
+                                                     "location": parsed["location"]},
+                                 "summary": parsed["summary"]},
+    }
+
+
+# Ontology relations are stored as ONE edge per skill pair. RELATED_TO is
+# symmetric, so it is merged and matched without a direction; IS_A always
+# points child -> parent ("Flask" IS_A "Web framework").
+_relation_merge_pattern = graph_store.relation_merge_pattern
+
+
 # 🚀 --- ROBUST ONTOLOGY BUILDER with ENHANCED LOGGING --- 🚀
 def _get_relations_for_single_skill(skill_name: str):
     """
@@ -289,12 +517,12 @@ def _get_relations_for_single_skill(skill_name: str):
     """
     raw_text = "" # Initialize raw_text
     try:
-        model = genai.GenerativeModel(
+        model = get_gemini_model(
             "gemini-2.5-flash",
             generation_config={"response_mime_type": "application/json"}
         )
         print(f"      - Sending prompt to Gemini for '{skill_name}'...") # LOGGING
-        response = model.generate_content(prompt)
+        response = call_gemini(model, prompt)
         print(f"      - Received response from Gemini for '{skill_name}'.") # LOGGING
 
         # LOGGING: Get raw response text for debugging
@@ -312,6 +540,8 @@ def _get_relations_for_single_skill(skill_name: str):
              print(f"      - Gemini returned {len(relations)} relations for '{skill_name}'.")
 
         return relations
+    except GeminiUnavailable:
+        raise  # the caller defers the skill instead of marking it 'failed'
     # LOGGING: Catch and print specific errors
     except json.JSONDecodeError as json_err:
         print(f"❌ JSON Parsing Error for skill '{skill_name}': {json_err}")
@@ -322,6 +552,166 @@ def _get_relations_for_single_skill(skill_name: str):
         traceback.print_exc(limit=1) # Print concise traceback
         return []
 
+# --- Single-flight skill expansion ---
+# Two uploads with the same new skill would otherwise both find it unprocessed
+# and both pay for a Gemini call. Each skill is claimed before it is expanded:
+# in-process through _ontology_inflight, across workers through a lease on the
+# Skill node (ontology_claimed_until / ontology_claimed_by). The lease is
+# cleared when the status is recorded and simply expires if the worker dies.
+ONTOLOGY_CLAIM_LEASE_SECONDS = int(os.getenv("ONTOLOGY_CLAIM_LEASE_SECONDS", "300"))
+_ONTOLOGY_CLAIM_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+_ontology_inflight = set()
+_ontology_inflight_lock = threading.Lock()
+
+
+def _claim_skill_lease(session, skill_name: str, only_unprocessed: bool = True) -> bool:
+    """Atomically takes the skill's lease if it is free or expired; True if this worker now holds it."""
+    now = datetime.now()
+    record = session.run("""
+        MATCH (s:Skill {name: $skillName})
+        // Writing first takes the node's write lock, so the checks below cannot
+        // race with another worker claiming the same skill
+        SET s._claim_lock = true
+        REMOVE s._claim_lock
+        WITH s
+        WHERE (s.ontology_claimed_until IS NULL OR s.ontology_claimed_until < $now)
+          AND (NOT $only_unprocessed
+               OR s.ontology_processed IS NULL
+               OR s.ontology_processed = false
+               OR s.ontology_processed = 'failed')
+        SET s.ontology_claimed_until = $until, s.ontology_claimed_by = $owner
+        RETURN s.name AS skillName
+    """, skillName=skill_name, now=now.isoformat(), only_unprocessed=only_unprocessed,
+        until=(now + timedelta(seconds=ONTOLOGY_CLAIM_LEASE_SECONDS)).isoformat(),
+        owner=_ONTOLOGY_CLAIM_OWNER).single()
+    return record is not None
+
+
+def _release_skill_lease(session, skill_name: str):
+    try:
+        session.run("""
+            MATCH (s:Skill {name: $skillName}) WHERE s.ontology_claimed_by = $owner
+            REMOVE s.ontology_claimed_until, s.ontology_claimed_by
+        """, skillName=skill_name, owner=_ONTOLOGY_CLAIM_OWNER)
+    except Exception as neo_err:
+        print(f"      - ❌ Neo4j Error releasing claim on '{skill_name}': {neo_err}")
+
+
+@contextmanager
+def _ontology_claim(session, skill_name: str, only_unprocessed: bool = True):
+    """
+    Yields True when this caller owns the skill and should expand it, False when
+    another thread or worker is already on it (or it got processed meanwhile).
+    """
+    with _ontology_inflight_lock:
+        owned = skill_name not in _ontology_inflight
+        if owned:
+            _ontology_inflight.add(skill_name)
+    if not owned:
+        yield False
+        return
+    try:
+        yield _claim_skill_lease(session, skill_name, only_unprocessed)
+    finally:
+        with _ontology_inflight_lock:
+            _ontology_inflight.discard(skill_name)
+
+
+def _expand_single_skill(session, skill_name: str):
+    """
+    Asks Gemini for the relations of one skill, writes the valid ones and
+    records the skill's status. Returns (processed_status, relations_added).
+    Shared by the request-path builder and the parallel rebuild workers.
+    Returns ('deferred', 0) without recording anything when Gemini is unavailable.
+    """
+    print(f"  -> Processing skill: '{skill_name}'")
+    try:
+        relations = _get_relations_for_single_skill(skill_name)
+    except GeminiUnavailable as e:
+        # Gemini is degraded: leave the skill unprocessed so a later run picks it up
+        print(f"      - ⏸️ Deferring '{skill_name}': {e}")
+        _release_skill_lease(session, skill_name)
+        return 'deferred', 0
+    processed_status = 'failed' # Default status unless relations found & processed
+
+    relations_found_count = len(relations)
+    relations_added_count = 0
+
+    if relations_found_count > 0:
+        for rel in relations:
+            # Basic validation
+            confidence = rel.get("confidence", 0)
+            rel_type = rel.get("relation_type")
+            from_skill = rel.get("from", "").strip().capitalize()
+            to_skill = rel.get("to", "").strip().capitalize()
+
+            if confidence < 0.6:
+                print(f"      - Skipping relation due to low confidence ({confidence}): {rel}")
+                continue
+            if rel_type not in ["IS_A", "RELATED_TO"]:
+                 print(f"      - Skipping relation due to invalid type ({rel_type}): {rel}")
+                 continue
+            if not from_skill or not to_skill:
+                 print(f"      - Skipping relation due to missing 'from' or 'to': {rel}")
+                 continue
+            # Ensure 'from' matches the skill we are processing
+            if from_skill != skill_name:
+                 print(f"      - Skipping relation where 'from' ({from_skill}) doesn't match processed skill ({skill_name}): {rel}")
+                 continue
+            # Avoid self-loops
+            if from_skill == to_skill:
+                 print(f"      - Skipping self-loop relation: {rel}")
+                 continue
+
+
+            # If validation passes, attempt to write to Neo4j
+            try:
+                session.run(f"""
+                    MERGE (s1:Skill {{name: $from_skill}})
+                    MERGE (s2:Skill {{name: $to_skill}})
+                    MERGE {_relation_merge_pattern(rel_type)}
+                    SET r.source = 'LLM',
+                        r.confidence = $confidence,
+                        r.updated_at = $timestamp
+                """,
+                from_skill=from_skill,
+                to_skill=to_skill,
+                confidence=confidence, # Use validated confidence
+                timestamp=datetime.now().isoformat())
+                relations_added_count += 1
+            except Exception as neo_err:
+                print(f"      - ❌ Neo4j Error writing relation {rel}: {neo_err}")
+                # Don't mark the whole skill as failed just for one bad relation write
+
+        # If at least one relation was successfully added, mark skill as success
+        if relations_added_count > 0:
+             processed_status = True # Use boolean true for success
+             print(f"      - Successfully added {relations_added_count} relations for '{skill_name}'.")
+        else:
+             # Gemini returned relations, but none were valid or writable
+             print(f"      - No valid relations added for '{skill_name}' despite Gemini returning {relations_found_count}.")
+             processed_status = 'failed' # Mark as failed if no relations actually got written
+
+    else:
+         # Gemini returned [] or API failed
+         processed_status = 'failed' # Mark as failed
+
+
+    # Mark this *one* skill as processed (True, False, or 'failed') and release our lease
+    try:
+        session.run("""
+            MATCH (s:Skill {name: $skillName})
+            SET s.ontology_processed = $status, s.last_processed = $timestamp
+            WITH s WHERE s.ontology_claimed_by = $owner
+            REMOVE s.ontology_claimed_until, s.ontology_claimed_by
+        """, skillName=skill_name, status=processed_status, timestamp=datetime.now().isoformat(),
+            owner=_ONTOLOGY_CLAIM_OWNER)
+    except Exception as neo_err:
+         print(f"      - ❌ Neo4j Error updating processed status for '{skill_name}': {neo_err}")
+
+    return processed_status, relations_added_count
+
+
 def expand_skill_ontology_with_gemini(skills: list):
     """
     MODIFIED (ROBUST): Calls Gemini to find related skills *one by one*.
@@ -330,6 +720,10 @@ def expand_skill_ontology_with_gemini(skills: list):
     """
     if not skills:
         return {"status": "no_skills_provided"}
+    if GRAPH_STORE == "memory":
+        # Skill status, leases and the closure refresh live on Skill nodes in Neo4j
+        print("ℹ️ Ontology expansion skipped: the in-memory graph store takes its ontology from the snapshot.")
+        return {"status": "skipped_in_memory_store"}
 
     unprocessed_skills = []
     with neo4j_driver.session() as session:
@@ -349,360 +743,1902 @@ def expand_skill_ontology_with_gemini(skills: list):
         print("✅ Ontology: All listed skills already processed successfully.")
         return {"status": "all_skills_already_processed"}
 
+    if not connections.gemini_available():
+        print(f"⏸️ Ontology: Gemini circuit is open; deferring {len(unprocessed_skills)} skills.")
+        return {"status": "deferred", "skills_deferred": len(unprocessed_skills)}
+
     print(f"🛠️ Expanding ontology for {len(unprocessed_skills)} skills (one by one)...")
 
     total_relations_added = 0
     successful_skills = 0
     failed_skills = 0
+    expanded_skills = []
+    skipped_skills = 0
+    deferred_skills = 0
 
     with neo4j_driver.session() as session:
-        for skill_name in unprocessed_skills:
-            print(f"  -> Processing skill: '{skill_name}'")
-            relations = _get_relations_for_single_skill(skill_name)
-            processed_status = 'failed' # Default status unless relations found & processed
-
-            relations_found_count = len(relations)
-            relations_added_count = 0
-
-            if relations_found_count > 0:
-                for rel in relations:
-                    # Basic validation
-                    confidence = rel.get("confidence", 0)
-                    rel_type = rel.get("relation_type")
-                    from_skill = rel.get("from", "").strip().capitalize()
-                    to_skill = rel.get("to", "").strip().capitalize()
-
-                    if confidence < 0.6:
-                        print(f"      - Skipping relation due to low confidence ({confidence}): {rel}")
-                        continue
-                    if rel_type not in ["IS_A", "RELATED_TO"]:
-                         print(f"      - Skipping relation due to invalid type ({rel_type}): {rel}")
-                         continue
-                    if not from_skill or not to_skill:
-                         print(f"      - Skipping relation due to missing 'from' or 'to': {rel}")
-                         continue
-                    # Ensure 'from' matches the skill we are processing
-                    if from_skill != skill_name:
-                         print(f"      - Skipping relation where 'from' ({from_skill}) doesn't match processed skill ({skill_name}): {rel}")
-                         continue
-                    # Avoid self-loops
-                    if from_skill == to_skill:
-                         print(f"      - Skipping self-loop relation: {rel}")
-                         continue
-
-
-                    # If validation passes, attempt to write to Neo4j
-                    try:
-                        session.run(f"""
-                            MERGE (s1:Skill {{name: $from_skill}})
-                            MERGE (s2:Skill {{name: $to_skill}})
-                            MERGE (s1)-[r:{rel_type}]->(s2)
-                            SET r.source = 'LLM',
-                                r.confidence = $confidence,
-                                r.updated_at = $timestamp
-                            MERGE (s2)-[r_inv:{rel_type}]->(s1)
-                            SET r_inv.source = 'LLM',
-                                r_inv.confidence = $confidence,
-                                r_inv.updated_at = $timestamp
-                        """,
-                        from_skill=from_skill,
-                        to_skill=to_skill,
-                        confidence=confidence, # Use validated confidence
-                        timestamp=datetime.now().isoformat())
-                        relations_added_count += 1
-                    except Exception as neo_err:
-                        print(f"      - ❌ Neo4j Error writing relation {rel}: {neo_err}")
-                        # Don't mark the whole skill as failed just for one bad relation write
-
-                # If at least one relation was successfully added, mark skill as success
-                if relations_added_count > 0:
-                     processed_status = True # Use boolean true for success
-                     total_relations_added += relations_added_count
-                     print(f"      - Successfully added {relations_added_count} relations for '{skill_name}'.")
-                else:
-                     # Gemini returned relations, but none were valid or writable
-                     print(f"      - No valid relations added for '{skill_name}' despite Gemini returning {relations_found_count}.")
-                     processed_status = 'failed' # Mark as failed if no relations actually got written
-
-            else:
-                 # Gemini returned [] or API failed
-                 processed_status = 'failed' # Mark as failed
-
-
-            # Mark this *one* skill as processed (True, False, or 'failed')
-            try:
-                session.run("""
-                    MATCH (s:Skill {name: $skillName})
-                    SET s.ontology_processed = $status, s.last_processed = $timestamp
-                """, skillName=skill_name, status=processed_status, timestamp=datetime.now().isoformat())
-            except Exception as neo_err:
-                 print(f"      - ❌ Neo4j Error updating processed status for '{skill_name}': {neo_err}")
-
+        for index, skill_name in enumerate(unprocessed_skills):
+            with _ontology_claim(session, skill_name) as owned:
+                if not owned:
+                    print(f"  -> Skipping skill '{skill_name}': already expanded or being expanded elsewhere.")
+                    skipped_skills += 1
+                    continue
+                processed_status, relations_added_count = _expand_single_skill(session, skill_name)
+            if processed_status == 'deferred':
+                # Retries are exhausted or the circuit is open: leave the rest for later
+                deferred_skills = len(unprocessed_skills) - index
+                break
+            expanded_skills.append(skill_name)
 
             if processed_status is True:
                 successful_skills += 1
+                total_relations_added += relations_added_count
             else:
                 failed_skills += 1
 
             # Keep rate limit
             time.sleep(1.1) # Slightly increased delay
 
+    if total_relations_added > 0:
+        _refresh_closure_safely(expanded_skills)
+
     print(f"✅ Ontology expansion attempt finished.")
     print(f"   - Total Relations Added: {total_relations_added}")
     print(f"   - Skills Marked Successful: {successful_skills}")
     print(f"   - Skills Marked Failed/No Relations: {failed_skills}")
+    print(f"   - Skills Skipped (claimed elsewhere): {skipped_skills}")
+    print(f"   - Skills Deferred (Gemini unavailable): {deferred_skills}")
 
     return {
         "status": "finished",
         "relations_added": total_relations_added,
         "skills_processed_successfully": successful_skills,
-        "skills_failed": failed_skills
+        "skills_failed": failed_skills,
+        "skills_skipped_in_flight": skipped_skills,
+        "skills_deferred": deferred_skills
     }
 # --- END OF ONTOLOGY BUILDER ---
 
 
-def rebuild_ontology():
+# --- RESUMABLE ONTOLOGY REBUILD ---
+# Progress lives in two places: each Skill's last_processed timestamp (the
+# per-skill checkpoint) and one document per run in the "ontology_rebuilds"
+# collection (counters, cutoff, heartbeat). Nothing is wiped up front: the
+# skills due for reprocessing are tagged with the run id when it starts, and a
+# run that dies halfway is resumed by picking up its tagged, not-yet-done skills.
+
+ONTOLOGY_REBUILD_STALE_AFTER_SECONDS = 600  # a 'running' run without a heartbeat for this long is treated as crashed
+ONTOLOGY_REBUILD_MAX_WORKERS = 16  # each worker makes its own rate-limited Gemini calls
+ONTOLOGY_REBUILD_MAX_BATCH_SIZE = 500
+
+
+def _tag_rebuild_skills(run_id: str, cutoff: str):
+    """Tags the skills this run must process, so relations discovered mid-run don't grow the work set."""
+    with neo4j_driver.session() as session:
+        record = session.run("""
+            MATCH (s:Skill)
+            WHERE s.last_processed IS NULL
+               OR s.last_processed < $cutoff
+               OR s.ontology_processed IS NULL
+               OR s.ontology_processed = false
+               OR s.ontology_processed = 'failed'
+            SET s.rebuild_run = $run_id
+            RETURN count(s) AS total
+        """, cutoff=cutoff, run_id=run_id).single()
+    return record["total"] if record else 0
+
+
+def _next_rebuild_batch(run_id: str, run_started: str, batch_size: int, exclude: list):
+    with neo4j_driver.session() as session:
+        result = session.run("""
+            MATCH (s:Skill {rebuild_run: $run_id})
+            WHERE (s.last_processed IS NULL OR s.last_processed < $run_started)
+              AND NOT s.name IN $exclude
+            RETURN s.name AS skillName
+            ORDER BY skillName
+            LIMIT $limit
+        """, run_id=run_id, run_started=run_started, exclude=exclude, limit=batch_size)
+        return [record["skillName"] for record in result]
+
+
+def _rebuild_worker(skill_name: str):
+    """Runs in a pool thread; sessions are not thread-safe, so each call opens its own."""
+    try:
+        with neo4j_driver.session() as session:
+            with _ontology_claim(session, skill_name, only_unprocessed=False) as owned:
+                if not owned:
+                    # Being expanded by a request right now; it records its own status
+                    print(f"  -> Skipping skill '{skill_name}': being expanded elsewhere.")
+                    return 'claimed', 0
+                status, added = _expand_single_skill(session, skill_name)
+    except Exception as e:
+        print(f"      - ❌ Rebuild worker error for '{skill_name}': {e}")
+        status, added = 'failed', 0
+    time.sleep(1.1) # Keep per-worker rate limit
+    return status, added
+
+
+def get_ontology_rebuild_status(rebuild_id: Optional[str] = None):
+    """Returns the given (or latest) rebuild run with progress and ETA; None for an unknown or malformed id."""
+    if rebuild_id and not ObjectId.is_valid(rebuild_id):
+        return None
+    query = {"_id": ObjectId(rebuild_id)} if rebuild_id else {}
+    run = db["ontology_rebuilds"].find_one(query, sort=[("started_at", -1)])
+    if not run:
+        return None
+
+    run = dict(run)
+    run["_id"] = str(run["_id"])
+    total, done = run.get("total", 0), run.get("done", 0)
+    run["progress"] = round(done / total, 4) if total else 1.0
+    run["eta_seconds"] = None
+    if run.get("status") == "running" and done:
+        elapsed = (datetime.now() - datetime.fromisoformat(run["resumed_at"])).total_seconds()
+        rate = run.get("done_since_resume", 0) / elapsed if elapsed > 0 else 0
+        run["eta_seconds"] = round(max(total - done, 0) / rate, 1) if rate else None
+    return run
+
+
+def rebuild_ontology(mode: str = "full", ttl_hours: float = 24 * 7, workers: int = 4, batch_size: int = 20,
+                     resume: bool = True, rebuild_id: Optional[str] = None):
     """
-    Fetches ALL skills from Neo4j and re-runs the ontology expansion.
+    Re-expands the skill ontology in parallel batches with a checkpoint per run.
+    - 'full': reprocess every skill not yet processed during this run.
+    - 'stale': reprocess only skills whose last_processed is older than ttl_hours,
+      never processed, or marked 'failed'.
+    With resume=True an interrupted run (status 'running' with no recent heartbeat,
+    or 'interrupted' after an error) or one paused because Gemini was unavailable
+    is picked up where it left off instead of starting over.
     """
-    all_skills = []
+    rebuilds = db["ontology_rebuilds"]
+    now = datetime.now()
+
+    if rebuild_id and not ObjectId.is_valid(rebuild_id):
+        raise ValueError(f"Invalid rebuild_id: {rebuild_id}")
+    run = rebuilds.find_one({"_id": ObjectId(rebuild_id)}) if rebuild_id else None
+    if run is None and resume:
+        run = rebuilds.find_one({"status": {"$in": ["running", "paused", "interrupted"]}}, sort=[("started_at", -1)])
+        if run and run["status"] == "running":
+            heartbeat = datetime.fromisoformat(run.get("updated_at") or run["started_at"])
+            if (now - heartbeat).total_seconds() < ONTOLOGY_REBUILD_STALE_AFTER_SECONDS:
+                return {"status": "already_running", "rebuild_id": str(run["_id"])}
+        if run:
+            print(f"♻️ Resuming interrupted ontology rebuild {run['_id']} ({run.get('done', 0)}/{run.get('total', 0)} done).")
+
+    if run is None:
+        run_started = now.isoformat()
+        cutoff = run_started if mode == "full" else (now - timedelta(hours=ttl_hours)).isoformat()
+        run = {
+            "mode": mode,
+            "ttl_hours": ttl_hours if mode == "stale" else None,
+            "cutoff": cutoff,
+            "started_at": run_started,
+            "updated_at": run_started,
+            "status": "running",
+            "total": 0,
+            "done": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "skipped": 0,
+            "relations_added": 0,
+        }
+        run["_id"] = rebuilds.insert_one(run).inserted_id
+        run["total"] = _tag_rebuild_skills(str(run["_id"]), cutoff)
+        rebuilds.update_one({"_id": run["_id"]}, {"$set": {"total": run["total"]}})
+        print(f"🛠️ Ontology rebuild {run['_id']} ({mode}): {run['total']} skills to process with {workers} workers.")
+
+    run_id, run_started = run["_id"], run["started_at"]
+    rebuilds.update_one({"_id": run_id}, {"$set": {"status": "running", "resumed_at": now.isoformat(),
+                                                   "done_since_resume": 0, "updated_at": now.isoformat()}})
+
+    # Failed skills whose status write also failed would otherwise be selected forever
+    failed_this_pass = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                batch = _next_rebuild_batch(str(run_id), run_started, batch_size, failed_this_pass)
+                if not batch:
+                    break
+                results = list(pool.map(_rebuild_worker, batch))
+                succeeded = sum(1 for status, _ in results if status is True)
+                skipped = sum(1 for status, _ in results if status == 'claimed')
+                deferred = sum(1 for status, _ in results if status == 'deferred')
+                failed_this_pass.extend(name for name, (status, _) in zip(batch, results) if status is not True)
+                # The skills' own last_processed timestamps are the real checkpoint;
+                # these counters only drive the progress/ETA endpoint.
+                rebuilds.update_one({"_id": run_id}, {
+                    "$inc": {"done": len(batch) - deferred, "done_since_resume": len(batch) - deferred,
+                             "succeeded": succeeded, "failed": len(batch) - succeeded - skipped - deferred,
+                             "skipped": skipped,
+                             "relations_added": sum(added for _, added in results)},
+                    "$set": {"updated_at": datetime.now().isoformat(), "last_skill": batch[-1]}
+                })
+                if deferred:
+                    # Stop rather than skip through the rest; the next rebuild resumes this run
+                    raise GeminiUnavailable(f"{deferred} skills deferred, Gemini is unavailable")
+    except GeminiUnavailable as e:
+        rebuilds.update_one({"_id": run_id}, {"$set": {"status": "paused", "error": str(e),
+                                                       "updated_at": datetime.now().isoformat()}})
+        print(f"⏸️ Ontology rebuild {run_id} paused: {e}")
+        return {"status": "paused", "rebuild_id": str(run_id), "error": str(e)}
+    except Exception as e:
+        rebuilds.update_one({"_id": run_id}, {"$set": {"status": "interrupted", "error": str(e),
+                                                       "updated_at": datetime.now().isoformat()}})
+        raise
+
     with neo4j_driver.session() as session:
-        # MODIFIED: Clear existing processing flags AND failed flags
-        session.run("MATCH (s:Skill) SET s.ontology_processed = false, s.last_processed = null")
+        session.run("MATCH (s:Skill {rebuild_run: $run_id}) REMOVE s.rebuild_run", run_id=str(run_id))
+    _refresh_closure_safely()
+    rebuilds.update_one({"_id": run_id}, {"$set": {"status": "completed", "finished_at": datetime.now().isoformat(),
+                                                   "updated_at": datetime.now().isoformat()}})
+    status = get_ontology_rebuild_status(str(run_id))
+    print(f"✅ Ontology rebuild {run_id} finished: {status['succeeded']} succeeded, {status['failed']} failed.")
+    return {"status": "rebuild_complete", "rebuild_id": str(run_id), "total_skills": status["total"],
+            "skills_processed_successfully": status["succeeded"], "skills_failed": status["failed"],
+            "relations_added": status["relations_added"]}
+
+
+def collapse_mirrored_relations(batch_size: int = 1000):
+    """
+    One-off migration from the old storage format, where every relation was
+    written twice (s1->s2 and s2->s1). Collapses each mirrored pair into one edge:
+    - RELATED_TO: keeps one edge with the higher confidence and latest updated_at.
+    - IS_A: keeps the edge pointing at the node with more IS_A edges (the
+      category hub), since the mirrored copies carry no direction information.
+    Runs in batches so it is safe on large graphs and can be re-run.
+    """
+    removed = {"RELATED_TO": 0, "IS_A": 0}
+    with neo4j_driver.session() as session:
+        while True:
+            record = session.run("""
+                MATCH (a:Skill)-[r1:RELATED_TO]->(b:Skill)-[r2:RELATED_TO]->(a)
+                WHERE elementId(a) < elementId(b)
+                WITH r1, r2 LIMIT $batch_size
+                SET r1.confidence = CASE WHEN coalesce(r2.confidence, 0) > coalesce(r1.confidence, 0)
+                                         THEN r2.confidence ELSE r1.confidence END,
+                    r1.updated_at = CASE WHEN coalesce(r2.updated_at, '') > coalesce(r1.updated_at, '')
+                                         THEN r2.updated_at ELSE r1.updated_at END
+                DELETE r2
+                RETURN count(*) AS removed
+            """, batch_size=batch_size).single()
+            if not record or record["removed"] == 0:
+                break
+            removed["RELATED_TO"] += record["removed"]
+
+        while True:
+            record = session.run("""
+                MATCH (a:Skill)-[r1:IS_A]->(b:Skill)-[r2:IS_A]->(a)
+                WHERE elementId(a) < elementId(b)
+                WITH a, b, r1, r2 LIMIT $batch_size
+                WITH r1, r2,
+                     COUNT { (a)-[:IS_A]-() } AS degreeA,
+                     COUNT { (b)-[:IS_A]-() } AS degreeB
+                // The parent is the better-connected end; drop the edge pointing away from it
+                WITH CASE WHEN degreeB >= degreeA THEN r2 ELSE r1 END AS wrongWay,
+                     CASE WHEN degreeB >= degreeA THEN r1 ELSE r2 END AS kept
+                SET kept.confidence = CASE WHEN coalesce(wrongWay.confidence, 0) > coalesce(kept.confidence, 0)
+                                           THEN wrongWay.confidence ELSE kept.confidence END
+                DELETE wrongWay
+                RETURN count(*) AS removed
+            """, batch_size=batch_size).single()
+            if not record or record["removed"] == 0:
+                break
+            removed["IS_A"] += record["removed"]
+
+    _refresh_closure_safely()
+    print(f"✅ Collapsed mirrored relations: {removed['RELATED_TO']} RELATED_TO and {removed['IS_A']} IS_A edges removed.")
+    return {"status": "migration_complete", "edges_removed": removed}
+
+
+# --- ORPHAN SKILL GC ---
+# Skills that no resume HAS and no job REQUIRES (left behind by resume deletes,
+# re-parses and ontology expansion) are deleted with their relations. Ontology
+# hubs, skills with at least keep_hubs_min_degree RELATED_TO/IS_A edges, can be
+# kept since they bridge multi-hop matches between referenced skills.
+_ORPHAN_SKILL_FILTER = """
+    MATCH (s:Skill)
+    WHERE NOT EXISTS { (s)<-[:HAS|REQUIRES]-() }
+      AND ($hub_degree <= 0 OR COUNT { (s)-[:RELATED_TO|IS_A]-() } < $hub_degree)
+"""
+
+
+def _delete_orphan_skill_batch(tx, hub_degree: int, batch_size: int):
+    """
+    Deletes up to batch_size orphan skills in one write transaction. The
+    candidates are write-locked first and the orphan check is repeated under the
+    lock, so a resume or job that links a candidate concurrently either commits
+    first (and the skill is kept) or waits for the lock and then fails on the
+    deleted node, and the graph outbox retries it. Returns None when there were
+    no candidates.
+    """
+    names = tx.run(_ORPHAN_SKILL_FILTER + """
+        WITH s LIMIT $batch_size
+        SET s.gc_lock = true
+        RETURN collect(s.name) AS names
+    """, hub_degree=hub_degree, batch_size=batch_size).single()["names"]
+    if not names:
+        return None
+    record = tx.run("""
+        MATCH (s:Skill) WHERE s.name IN $names AND NOT EXISTS { (s)<-[:HAS|REQUIRES]-() }
+        OPTIONAL MATCH (s)-[r]-(n)
+        WITH s, count(r) AS edges, collect(DISTINCT n.name) AS names
+        WITH s, s.name AS name, edges, names
+        DETACH DELETE s
+        RETURN count(*) AS nodes, sum(edges) AS edges, collect(name) AS deleted, collect(names) AS neighbours
+    """, names=names).single()
+    tx.run("MATCH (s:Skill) WHERE s.name IN $names REMOVE s.gc_lock", names=names)
+    return record
+
+
+def garbage_collect_orphan_skills(batch_size: int = 200, pause_seconds: float = 0.1, keep_hubs_min_degree: int = 5,
+                                  max_batches: Optional[int] = None, dry_run: bool = False):
+    """
+    Deletes unreferenced Skill nodes in small transactions of batch_size, sleeping
+    pause_seconds between them so the GC never monopolises the database. Progress
+    and the final report go to ontology_meta (_id 'skill_gc'). Neo4j only.
+    """
+    if GRAPH_STORE == "memory":
+        raise RuntimeError("Skill GC works on Neo4j only; it is not available with GRAPH_STORE=memory")
+    meta = db["ontology_meta"]
+    started_at = datetime.now().isoformat()
+    t0 = time.time()
+    with neo4j_driver.session() as session:
+        candidates = session.run(_ORPHAN_SKILL_FILTER + " RETURN count(s) AS n",
+                                 hub_degree=keep_hubs_min_degree).single()["n"]
+        report = {"status": "running", "dry_run": dry_run, "started_at": started_at, "orphans_found": candidates,
+                  "keep_hubs_min_degree": keep_hubs_min_degree, "nodes_deleted": 0, "edges_deleted": 0, "batches": 0}
+        meta.replace_one({"_id": "skill_gc"}, report, upsert=True)
+        if dry_run:
+            report.update(status="dry_run_complete", finished_at=datetime.now().isoformat())
+            meta.replace_one({"_id": "skill_gc"}, report, upsert=True)
+            print(f"🧹 Skill GC dry run: {candidates} orphan skills would be deleted.")
+            return report
+
+        neighbours, deleted_names = set(), set()
+        try:
+            while max_batches is None or report["batches"] < max_batches:
+                with session.begin_transaction() as tx:
+                    record = _delete_orphan_skill_batch(tx, keep_hubs_min_degree, batch_size)
+                    tx.commit()
+                if record is None:
+                    break
+                if record["nodes"] == 0:
+                    continue  # every candidate gained a reference before it was locked
+                report["nodes_deleted"] += record["nodes"]
+                report["edges_deleted"] += record["edges"]
+                report["batches"] += 1
+                deleted_names.update(record["deleted"])
+                neighbours.update(name for names in record["neighbours"] for name in names)
+                meta.update_one({"_id": "skill_gc"}, {"$set": {
+                    "nodes_deleted": report["nodes_deleted"], "edges_deleted": report["edges_deleted"],
+                    "batches": report["batches"], "updated_at": datetime.now().isoformat()}})
+                if pause_seconds:
+                    time.sleep(pause_seconds)
+        except Exception as e:
+            report.update(status="interrupted", error=str(e))
+            meta.replace_one({"_id": "skill_gc"}, report, upsert=True)
+            traceback.print_exc()
+            raise
+
+    # Surviving neighbours lost paths through the deleted skills
+    survivors = sorted(neighbours - deleted_names)
+    if report["nodes_deleted"]:
+        _refresh_closure_safely(survivors)
+    report.update(status="completed", finished_at=datetime.now().isoformat(), elapsed_s=round(time.time() - t0, 1),
+                  closure_refreshed_for=len(survivors))
+    meta.replace_one({"_id": "skill_gc"}, report, upsert=True)
+    print(f"🧹 Skill GC: {report['nodes_deleted']} orphan skills and {report['edges_deleted']} edges deleted "
+          f"in {report['batches']} batches ({report['elapsed_s']}s).")
+    return report
+
+
+def _job_graph_row(job):
+    """Flattens a JD_skills document into the row shape used by the bulk Neo4j writers."""
+    skills = []
+    for skill in job.get("skills") or []:
+        # Ensure skill is capitalized before merging
+        skill_name = str(skill).strip().capitalize()
+        if skill_name:
+            skills.append(skill_name)
+    return {
+        "id": str(job["_id"]),
+        "title": job.get("job_title", "Unknown Job"),
+        "skills": skills
+    }
+
+
+def _resume_graph_row(resume):
+    """Flattens a resumes document into the row shape used by the bulk Neo4j writers."""
+    parsed_raw = resume.get("parsed_raw") if isinstance(resume.get("parsed_raw"), dict) else {}
+
+    # prefer normalized fields when available
+    skills = resume.get("skills") or []
+    if isinstance(skills, dict): # Should not happen after normalization, but defensive check
+        flat_skills = []
+        for skill_list in skills.values():
+            if isinstance(skill_list, list):
+                flat_skills.extend(skill_list)
+        skills = flat_skills
+
+    clean_skills = []
+    for skill in skills:
+        # Ensure skill is capitalized before merging
+        skill_name = skill.strip().capitalize() if isinstance(skill, str) else ""
+        if skill_name:
+            clean_skills.append(skill_name)
+
+    return {
+        "id": str(resume.get("_id")),
+        "file_id": resume.get("gridfs_file_id", ""),
+        "name": resume.get("name") or parsed_raw.get("name") or "Unknown",
+        "email": resume.get("email") or parsed_raw.get("email") or "N/A",
+        "phone": resume.get("phone") or parsed_raw.get("phone") or "N/A",
+        "summary": resume.get("summary") or parsed_raw.get("summary") or "No summary available.",
+        "skills": clean_skills
+    }
 
-        result = session.run("MATCH (s:Skill) RETURN s.name AS skillName")
-        all_skills = [record["skillName"] for record in result]
 
-    if all_skills:
-        # This will now call the new, robust, one-by-one function
-        expand_skill_ontology_with_gemini(all_skills)
+# Every lookup starts from a node id or a skill name; without these indexes
+# each MATCH/MERGE on them is a label scan.
+GRAPH_INDEXES = {
+    "job_id": "CREATE INDEX job_id IF NOT EXISTS FOR (j:Job) ON (j.id)",
+    "resume_id": "CREATE INDEX resume_id IF NOT EXISTS FOR (r:Resume) ON (r.id)",
+    "skill_name": "CREATE INDEX skill_name IF NOT EXISTS FOR (s:Skill) ON (s.name)",
+}
+GRAPH_INDEXES_ON_STARTUP = os.getenv("GRAPH_INDEXES_ON_STARTUP", "true").lower() == "true"
 
-    return {"status": "rebuild_complete", "total_skills": len(all_skills)}
+
+def ensure_graph_indexes(quiet_failure: bool = False):
+    """Creates the lookup indexes if missing (idempotent). Returns the index names."""
+    try:
+        with neo4j_driver.session() as session:
+            for statement in GRAPH_INDEXES.values():
+                session.run(statement).consume()
+        print(f"✅ Neo4j indexes ensured: {', '.join(GRAPH_INDEXES)}")
+        return list(GRAPH_INDEXES)
+    except Exception as e:
+        if not quiet_failure:
+            raise
+        print(f"⚠️ WARNING: Could not ensure Neo4j indexes (will retry on next start): {e}")
+        return []
 
 
+# --- GRAPH STORE ---
+# Every graph read and write of the matching path goes through a GraphStore
+# (graph_store.py). GRAPH_STORE=neo4j (default) is the Neo4j server;
+# GRAPH_STORE=memory keeps the graph in process memory, loaded from the mapped
+# graph snapshot (GRAPH_SNAPSHOT_PATH) or, without one, from MongoDB (no
+# ontology relations then). A snapshot is reconciled with MongoDB right after
+# loading: resumes and jobs named in the change log (see TEXT_CHANGES_COLLECTION)
+# since shortly before the export are re-read and upserted, or removed if they
+# are gone; a snapshot older than the log's retention gets a full pass instead.
+# The ontology builder, rebuilds, GC, snapshot export and the nightly rankings
+# sweep work on Neo4j only. In memory mode ontology expansion is skipped, so the
+# ontology is whatever the snapshot holds and skills first seen after it have no
+# relations until the next export; the app must also run as a single worker
+# process (each process would hold its own copy of the graph).
+GRAPH_STORE = os.getenv("GRAPH_STORE", "neo4j").lower()
+neo4j_graph_store = graph_store.Neo4jGraphStore(neo4j_driver)
+_memory_graph_store = None
+_memory_graph_store_lock = threading.Lock()
+# How far before the snapshot's created_at the reconcile starts: covers the
+# export itself and the graph outbox lag between MongoDB and Neo4j.
+GRAPH_SNAPSHOT_RECONCILE_MARGIN_SECONDS = int(os.getenv("GRAPH_SNAPSHOT_RECONCILE_MARGIN_SECONDS", "900"))
+
+
+def _reconcile_memory_graph_store(store, since: str):
+    """Brings a snapshot-loaded store up to date with MongoDB. Returns counts."""
+    retention_cutoff = (datetime.now() - timedelta(days=TEXT_CHANGE_RETENTION_DAYS)).isoformat()
+    if since < retention_cutoff:
+        # The change log no longer reaches back this far: compare against every document
+        job_query, resume_query, resume_ids = {}, {}, set(store.resume_rows)
+    else:
+        changed = {"jobs": set(), "resumes": set()}
+        for change in db[TEXT_CHANGES_COLLECTION].find({"at": {"$gt": since}}, {"kind": 1, "doc_id": 1}):
+            changed[change["kind"]].add(change["doc_id"])
+        resume_ids = changed["resumes"]
+        job_query = {"_id": {"$in": [ObjectId(job_id) for job_id in changed["jobs"]]}}
+        resume_query = {"_id": {"$in": [ObjectId(resume_id) for resume_id in resume_ids]}}
+    jobs = store.upsert_jobs(_job_graph_row(job) for job in db["JD_skills"].find(job_query, {"job_title": 1, "skills": 1}))
+    found = set()
+    for resume in db["resumes"].find(resume_query, RESUME_GRAPH_PROJECTION):
+        found.add(str(resume["_id"]))
+        store.upsert_resumes([_resume_graph_row(resume)])
+    for resume_id in resume_ids - found:
+        store.delete_resume(resume_id)
+    return {"jobs_upserted": jobs, "resumes_upserted": len(found), "resumes_deleted": len(resume_ids - found)}
+
+
+def _load_memory_graph_store():
+    snapshot = get_mapped_graph_snapshot()
+    if snapshot is not None:
+        store = graph_store.InMemoryGraphStore.from_snapshot(snapshot)
+        print(f"🧠 In-memory graph store loaded from snapshot {snapshot.path}: {store.stats()}")
+        since = (datetime.fromisoformat(snapshot.header["created_at"])
+                 - timedelta(seconds=GRAPH_SNAPSHOT_RECONCILE_MARGIN_SECONDS)).isoformat()
+        print(f"🧠 Reconciled with MongoDB changes since {since}: {_reconcile_memory_graph_store(store, since)}")
+        return store
+    store = graph_store.InMemoryGraphStore()
+    store.upsert_jobs(_job_graph_row(job) for job in db["JD_skills"].find({}, {"job_title": 1, "skills": 1}))
+    store.upsert_resumes(_resume_graph_row(resume) for resume in db["resumes"].find({}, RESUME_GRAPH_PROJECTION))
+    print(f"🧠 In-memory graph store loaded from MongoDB: {store.stats()}")
+    return store
+
+
+def get_graph_store():
+    """The GraphStore selected by GRAPH_STORE (the in-memory one is loaded on first use)."""
+    global _memory_graph_store
+    if GRAPH_STORE != "memory":
+        return neo4j_graph_store
+    if _memory_graph_store is None:
+        with _memory_graph_store_lock:
+            if _memory_graph_store is None:
+                _memory_graph_store = _load_memory_graph_store()
+    return _memory_graph_store
+
+
+def bulk_push_jobs_to_neo4j(jobs, batch_size: int = 500):
+    """
+    Bulk path: upserts Job nodes and their REQUIRES edges with one UNWIND query
+    per batch instead of three round-trips per skill (into the active graph store).
+    """
+    rows = [_job_graph_row(job) for job in jobs]
+    count = get_graph_store().upsert_jobs(rows, batch_size=batch_size)
+    if count:
+        bump_cache_versions("jobs", *[f"job:{row['id']}" for row in rows])
+    return count
+
+
+def bulk_push_resumes_to_neo4j(resumes, batch_size: int = 500):
+    """
+    Bulk path: upserts Resume nodes, clears their old HAS edges and writes the
+    new ones with one UNWIND query per batch (into the active graph store).
+    """
+    rows = [_resume_graph_row(resume) for resume in resumes]
+    store = get_graph_store()
+    # Skills the resumes had before and after: the rankings of jobs these reach are outdated
+    skills = {name for names in store.resume_skill_names([row["id"] for row in rows]).values() for name in names}
+    store.upsert_resumes(rows, batch_size=batch_size)
+    skills.update(name for row in rows for name in row["skills"])
+    bump_cache_versions(*[f"resume:{row['id']}" for row in rows], *[f"skill:{name}" for name in skills])
+    return len(rows)
+
+
+def bulk_push_skill_relations_to_neo4j(relations, batch_size: int = 500, mark_processed: bool = False):
+    """
+    Bulk path for ontology relations that did not come from a live Gemini call
+    (synthetic data, imports). Each relation is a dict with "from", "to",
+    "relation_type" and "confidence", already validated and capitalized.
+    With mark_processed=True the touched skills are flagged so the ontology
+    builder will not spend Gemini calls on them.
+    """
+    timestamp = datetime.now().isoformat()
+    relations = [{**rel, "updated_at": rel.get("updated_at") or timestamp} for rel in relations]
+    written = get_graph_store().add_relations(relations, batch_size=batch_size)
+
+    if mark_processed and GRAPH_STORE == "neo4j":
+        names = sorted({name for rel in relations if rel.get("relation_type") in graph_store.RELATION_TYPES
+                        for name in (rel["from"], rel["to"])})
+        with neo4j_driver.session() as session:
+            for start in range(0, len(names), batch_size):
+                session.run("""
+                    UNWIND $names AS skillName
+                    MATCH (s:Skill {name: skillName})
+                    SET s.ontology_processed = true, s.last_processed = $timestamp
+                """, names=names[start:start + batch_size], timestamp=timestamp)
+
+    if written:
+        _refresh_closure_safely(sorted({rel["from"] for rel in relations
+                                        if rel.get("relation_type") in graph_store.RELATION_TYPES}))
+    return written
+
+
+# Full re-syncs of every job/resume; the endpoints go through the graph outbox
+# below, so these are only needed to rebuild a graph from scratch.
 def push_jobs_to_neo4j():
-    jobs = list(db["JD_skills"].find())
-    with neo4j_driver.session() as session:
-        for job in jobs:
-            job_id = str(job["_id"])
-            job_title = job.get("job_title", "Unknown Job")
-            skills = job.get("skills", [])
-
-            session.run("""
-                MERGE (j:Job {id:$job_id})
-                SET j.title=$job_title
-            """, job_id=job_id, job_title=job_title)
-
-            for skill in skills:
-                # Ensure skill is capitalized before merging
-                skill_name = skill.strip().capitalize()
-                if skill_name:
-                    session.run("MERGE (s:Skill {name:$skill})", skill=skill_name)
-                    session.run("""
-                        MATCH (j:Job {id:$job_id}), (s:Skill {name:$skill})
-                        MERGE (j)-[:REQUIRES]->(s)
-                    """, job_id=job_id, skill=skill_name)
-    print("✅ Jobs pushed to Neo4j.")
+    count = bulk_push_jobs_to_neo4j(db["JD_skills"].find())
+    print(f"✅ Jobs pushed to Neo4j ({count}).")
 
 
 def push_resumes_to_neo4j():
-    resumes = list(db["resumes"].find())
+    count = bulk_push_resumes_to_neo4j(db["resumes"].find({}, RESUME_GRAPH_PROJECTION))
+    print(f"✅ Resumes (with corrected flat details & HAS rels) pushed to Neo4j ({count}).")
+
+
+# --- GRAPH OUTBOX ---
+# MongoDB is the source of truth and the graph a projection of it. Endpoints
+# do not write the graph themselves: around each Mongo write they record an
+# entry in "graph_outbox" (one document per entity, _id "resume:<id>" or
+# "job:<id>"), and a background worker drains the outbox in batches into the
+# active graph store. An entry only names the entity and the intended op; the
+# worker reads its current Mongo state and upserts it, or removes it from the
+# graph when it is gone, so applying an entry twice or late is harmless.
+# The entry is written *held* before the Mongo write and released right after
+# it, so no drain can see it before the write lands, without needing a
+# multi-document transaction (and so a replica set). A held entry whose
+# release never comes (crash in between) becomes due when the hold expires
+# and syncs whatever Mongo then holds. As a safety net, a young entry whose
+# document does not (yet) match its op is retried rather than completed.
+# Every change bumps the entry's seq and the worker only removes entries whose
+# seq it synced, so a write landing mid-sync is synced again. available_at is
+# the hold, the claim lease and the retry backoff: a worker that dies
+# mid-batch only delays its entries.
+# With GRAPH_STORE=memory only the process that drains an entry updates its
+# in-process store, so memory mode must run as a single worker process.
+GRAPH_OUTBOX_COLLECTION = "graph_outbox"
+GRAPH_OUTBOX_WORKER = os.getenv("GRAPH_OUTBOX_WORKER", "true").lower() == "true"
+GRAPH_OUTBOX_BATCH_SIZE = int(os.getenv("GRAPH_OUTBOX_BATCH_SIZE", "200"))
+GRAPH_OUTBOX_POLL_SECONDS = float(os.getenv("GRAPH_OUTBOX_POLL_SECONDS", "1"))
+GRAPH_OUTBOX_LEASE_SECONDS = int(os.getenv("GRAPH_OUTBOX_LEASE_SECONDS", "120"))
+GRAPH_OUTBOX_RESPONSE_WAIT_SECONDS = float(os.getenv("GRAPH_OUTBOX_RESPONSE_WAIT_SECONDS", "3"))
+GRAPH_OUTBOX_MAX_BACKOFF_SECONDS = 300
+GRAPH_OUTBOX_OPS = ("upsert", "delete")
+
+_graph_outbox_wakeup = threading.Event()
+_graph_outbox_stop = threading.Event()
+_graph_outbox_thread = None
+_graph_outbox_stats = {"batches": 0, "synced": 0, "deferred": 0, "failed_batches": 0, "last_error": None,
+                       "last_synced_at": None}
+
+
+def record_graph_change(kind: str, entity_id, op: str = "upsert"):
+    """
+    Marks a resume or job as needing a graph sync ('upsert' or 'delete'). Call
+    it before the Mongo write it describes and release_graph_changes() after;
+    until then the entry is held (for at most GRAPH_OUTBOX_LEASE_SECONDS).
+    Returns the outbox key (for release_graph_changes / wait_for_graph_sync).
+    """
+    if op not in GRAPH_OUTBOX_OPS:
+        raise ValueError(f"Unknown graph outbox op '{op}'")
+    key = f"{kind}:{entity_id}"
+    now = datetime.now()
+    db[GRAPH_OUTBOX_COLLECTION].update_one(
+        {"_id": key},
+        {"$inc": {"seq": 1},
+         "$set": {"op": op, "updated_at": now.isoformat(),
+                  "available_at": (now + timedelta(seconds=GRAPH_OUTBOX_LEASE_SECONDS)).isoformat()},
+         "$setOnInsert": {"kind": kind, "entity_id": str(entity_id), "created_at": now.isoformat(), "attempts": 0}},
+        upsert=True)
+    return key
+
+
+def release_graph_changes(*keys):
+    """Makes held outbox entries due now (their Mongo write has landed) and wakes the worker."""
+    db[GRAPH_OUTBOX_COLLECTION].update_many({"_id": {"$in": list(keys)}, "claim": {"$exists": False}},
+                                            {"$set": {"available_at": datetime.now().isoformat()}})
+    _graph_outbox_wakeup.set()
+
+
+def _claim_graph_outbox(batch_size: int):
+    """Leases up to batch_size due entries to this caller. Returns (claim, entries)."""
+    now = datetime.now()
+    due = {"available_at": {"$lte": now.isoformat()}}
+    outbox = db[GRAPH_OUTBOX_COLLECTION]
+    keys = [doc["_id"] for doc in outbox.find(due, {"_id": 1}).sort("available_at", 1).limit(batch_size)]
+    if not keys:
+        return None, []
+    claim = str(ObjectId())
+    # Re-checking 'due' makes the claim atomic per entry: a concurrent drainer gets the rest
+    outbox.update_many({"_id": {"$in": keys}, **due}, {"$set": {
+        "claim": claim, "available_at": (now + timedelta(seconds=GRAPH_OUTBOX_LEASE_SECONDS)).isoformat()}})
+    return claim, list(outbox.find({"claim": claim}))
+
+
+def _graph_outbox_entry_is_young(entry):
+    young_after = datetime.now() - timedelta(seconds=GRAPH_OUTBOX_LEASE_SECONDS)
+    return datetime.fromisoformat(entry["updated_at"]) > young_after
+
+
+def _apply_graph_outbox_entries(entries):
+    """
+    Brings the graph in line with the current Mongo state of each entry's
+    entity. Returns the keys of young entries whose document does not match
+    their op yet (the Mongo write is still in flight); those are retried.
+    """
+    deferred = set()
+    resume_entries = [entry for entry in entries if entry["kind"] == "resume"]
+    job_entries = [entry for entry in entries if entry["kind"] == "job"]
+    if resume_entries:
+        object_ids = [ObjectId(entry["entity_id"]) for entry in resume_entries if ObjectId.is_valid(entry["entity_id"])]
+        resumes = {str(resume["_id"]): resume
+                   for resume in db["resumes"].find({"_id": {"$in": object_ids}}, RESUME_GRAPH_PROJECTION)}
+        upserts, deletes = [], []
+        for entry in resume_entries:
+            exists = entry["entity_id"] in resumes
+            if exists != (entry.get("op", "upsert") == "upsert") and _graph_outbox_entry_is_young(entry):
+                deferred.add(entry["_id"])
+            elif exists:
+                upserts.append(resumes[entry["entity_id"]])
+            else:
+                deletes.append(entry["entity_id"])
+        if upserts:
+            bulk_push_resumes_to_neo4j(upserts)
+        store = get_graph_store()
+        skills = {name for names in store.resume_skill_names(deletes).values() for name in names}
+        for resume_id in deletes:
+            store.delete_resume(resume_id)
+        bump_cache_versions(*[f"resume:{resume_id}" for resume_id in deletes], *[f"skill:{name}" for name in skills])
+    if job_entries:
+        object_ids = [ObjectId(entry["entity_id"]) for entry in job_entries if ObjectId.is_valid(entry["entity_id"])]
+        jobs = {str(job["_id"]): job
+                for job in db["JD_skills"].find({"_id": {"$in": object_ids}}, {"job_title": 1, "skills": 1})}
+        # Jobs are never deleted, so a JD missing for good (deleted by hand) is left alone
+        deferred.update(entry["_id"] for entry in job_entries
+                        if entry["entity_id"] not in jobs and _graph_outbox_entry_is_young(entry))
+        if jobs:
+            bulk_push_jobs_to_neo4j(jobs.values())
+    return deferred
+
+
+def drain_graph_outbox(batch_size: Optional[int] = None, max_batches: Optional[int] = None):
+    """
+    Syncs due outbox entries to the graph store, batch by batch, until none are
+    due (or max_batches). A failed batch is retried later with exponential
+    backoff and ends the drain. Returns the number of entries synced.
+    """
+    outbox = db[GRAPH_OUTBOX_COLLECTION]
+    synced = batches = 0
+    while max_batches is None or batches < max_batches:
+        claim, entries = _claim_graph_outbox(batch_size or GRAPH_OUTBOX_BATCH_SIZE)
+        if not entries:
+            break
+        batches += 1
+        try:
+            deferred = _apply_graph_outbox_entries(entries)
+        except Exception as e:
+            attempts = max(entry.get("attempts", 0) for entry in entries) + 1
+            backoff = min(GRAPH_OUTBOX_MAX_BACKOFF_SECONDS, GRAPH_OUTBOX_POLL_SECONDS * 2 ** attempts)
+            outbox.update_many({"claim": claim}, {
+                "$inc": {"attempts": 1}, "$unset": {"claim": ""},
+                "$set": {"last_error": str(e)[:500],
+                         "available_at": (datetime.now() + timedelta(seconds=backoff)).isoformat()}})
+            _graph_outbox_stats["failed_batches"] += 1
+            _graph_outbox_stats["last_error"] = str(e)[:500]
+            print(f"⚠️ WARNING: Graph outbox batch of {len(entries)} failed (retry in {backoff:.0f}s): {e}")
+            break
+        done = [entry for entry in entries if entry["_id"] not in deferred]
+        if done:
+            outbox.bulk_write([DeleteOne({"_id": entry["_id"], "seq": entry["seq"], "claim": claim})
+                               for entry in done], ordered=False)
+        if deferred:
+            outbox.update_many({"_id": {"$in": list(deferred)}, "claim": claim}, {
+                "$set": {"available_at": (datetime.now() + timedelta(seconds=GRAPH_OUTBOX_POLL_SECONDS)).isoformat()},
+                "$unset": {"claim": ""}})
+        # Entries changed since they were claimed keep their new seq and are due again at once
+        outbox.update_many({"claim": claim}, {"$set": {"available_at": datetime.now().isoformat()},
+                                              "$unset": {"claim": ""}})
+        synced += len(done)
+        _graph_outbox_stats["batches"] += 1
+        _graph_outbox_stats["synced"] += len(done)
+        _graph_outbox_stats["deferred"] += len(deferred)
+        _graph_outbox_stats["last_synced_at"] = datetime.now().isoformat()
+    return synced
+
+
+def wait_for_graph_sync(keys, timeout: Optional[float] = None):
+    """
+    Waits (at most GRAPH_OUTBOX_RESPONSE_WAIT_SECONDS) until these outbox entries
+    have been applied, so a response can read its own write. True if they were.
+    """
+    deadline = time.monotonic() + (GRAPH_OUTBOX_RESPONSE_WAIT_SECONDS if timeout is None else timeout)
+    while db[GRAPH_OUTBOX_COLLECTION].count_documents({"_id": {"$in": list(keys)}}, limit=1):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def _graph_outbox_worker():
+    print(f"🔁 Graph outbox worker started (batch {GRAPH_OUTBOX_BATCH_SIZE}, poll {GRAPH_OUTBOX_POLL_SECONDS}s)")
+    while not _graph_outbox_stop.is_set():
+        try:
+            drain_graph_outbox()
+        except Exception as e:
+            # Mongo itself is unreachable: keep polling, entries wait in the outbox
+            _graph_outbox_stats["last_error"] = str(e)[:500]
+            print(f"⚠️ WARNING: Graph outbox drain failed: {e}")
+        _graph_outbox_wakeup.wait(GRAPH_OUTBOX_POLL_SECONDS)
+        _graph_outbox_wakeup.clear()
+
+
+def start_graph_outbox_worker():
+    global _graph_outbox_thread
+    if _graph_outbox_thread is not None and _graph_outbox_thread.is_alive():
+        return
+    _graph_outbox_stop.clear()
+    _graph_outbox_thread = threading.Thread(target=_graph_outbox_worker, name="graph-outbox", daemon=True)
+    _graph_outbox_thread.start()
+
+
+def stop_graph_outbox_worker(timeout: float = 10):
+    global _graph_outbox_thread
+    if _graph_outbox_thread is None:
+        return
+    _graph_outbox_stop.set()
+    _graph_outbox_wakeup.set()
+    _graph_outbox_thread.join(timeout)
+    _graph_outbox_thread = None
+
+
+def get_graph_outbox_status():
+    outbox = db[GRAPH_OUTBOX_COLLECTION]
+    oldest = outbox.find_one({}, {"created_at": 1}, sort=[("created_at", 1)])
+    return {
+        "pending": outbox.count_documents({}),
+        "retrying": outbox.count_documents({"attempts": {"$gt": 0}}),
+        "oldest_created_at": oldest.get("created_at") if oldest else None,
+        "worker_running": _graph_outbox_thread is not None and _graph_outbox_thread.is_alive(),
+        **_graph_outbox_stats,
+    }
+
+
+# --- MULTI-HOP SCORING & SKILL-SIMILARITY CLOSURE ---
+# 'multihop' mode scores a related (non-direct) skill match as
+#     RELATED_WEIGHT * HOP_DECAY ** (hops - 1) * product(edge confidences)
+# against a precomputed closure: for every skill, its top-k reachable skills
+# within SIMILARITY_MAX_HOPS, stored as (s)-[:SIMILAR_TO {hops, confidence, score}]->(t).
+# Query time is then a single-hop lookup instead of a variable-length path expansion.
+# RELATED_TO is walked both ways; IS_A only child -> parent.
+
+SCORING_RELATED_WEIGHT = float(os.getenv("SCORING_RELATED_WEIGHT", "0.5"))
+SCORING_HOP_DECAY = float(os.getenv("SCORING_HOP_DECAY", "0.5"))
+SCORING_MAX_HOPS = int(os.getenv("SCORING_MAX_HOPS", "2"))
+SIMILARITY_MAX_HOPS = int(os.getenv("SIMILARITY_MAX_HOPS", "3"))
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "25"))
+
+
+def refresh_skill_similarity_closure(changed_skills: Optional[list] = None, max_hops: int = None,
+                                     top_k: int = None, decay: float = None, batch_size: int = 500):
+    """
+    Rebuilds SIMILAR_TO edges. With changed_skills, only skills within max_hops
+    of a changed skill are recomputed (their neighbour lists are the only ones
+    a new relation can affect); otherwise every skill is.
+    """
+    max_hops = max_hops or SIMILARITY_MAX_HOPS
+    top_k = top_k or SIMILARITY_TOP_K
+    decay = SCORING_HOP_DECAY if decay is None else decay
+    t0 = time.time()
+    built_at = datetime.now().isoformat()
+    refreshed = get_graph_store().refresh_similarity(changed_skills, max_hops=max_hops, top_k=top_k, decay=decay,
+                                                     batch_size=batch_size, built_at=built_at)
+
+    db["ontology_meta"].update_one({"_id": "similarity_closure"}, {"$set": {
+        "built_at": built_at, "max_hops": max_hops, "top_k": top_k, "decay": decay,
+        "last_refresh": "full" if changed_skills is None else "incremental",
+        "last_refresh_sources": refreshed
+    }}, upsert=True)
+    bump_cache_versions("ontology")
+    print(f"✅ Skill similarity closure refreshed for {refreshed} skills in {time.time() - t0:.1f}s.")
+    return {"status": "closure_refreshed", "skills_refreshed": refreshed, "max_hops": max_hops, "top_k": top_k}
+
+
+def _refresh_closure_safely(changed_skills: Optional[list] = None):
+    """Closure refresh triggered by ontology writes; never fails the caller."""
+    try:
+        refresh_skill_similarity_closure(changed_skills)
+    except Exception as e:
+        print(f"⚠️ WARNING: Skill similarity closure refresh failed: {e}")
+        traceback.print_exc(limit=1)
+        # Relations still changed, so cached scores are stale either way
+        bump_cache_versions("ontology")
+
+
+# --- GRAPH SNAPSHOTS ---
+# Rebuilding the graph from MongoDB and re-running the ontology takes hours and
+# many Gemini calls. export_graph_snapshot() writes the whole matching graph to
+# one columnar file (graph_snapshot.py); import_graph_snapshot() bulk-loads it
+# back with one UNWIND query per batch. With GRAPH_SNAPSHOT_PATH set, the file
+# is also memory-mapped at startup for in-process matching.
+GRAPH_SNAPSHOT_PATH = os.getenv("GRAPH_SNAPSHOT_PATH", "")
+GRAPH_SNAPSHOT_BATCH_SIZE = int(os.getenv("GRAPH_SNAPSHOT_BATCH_SIZE", "5000"))
+_mapped_snapshot = None
+
+
+def export_graph_snapshot(path: str):
+    """Writes Skill/Job/Resume nodes, their edges, the ontology and the SIMILAR_TO closure to path."""
+    t0 = time.time()
+    builder = graph_snapshot.SnapshotBuilder()
     with neo4j_driver.session() as session:
-        for resume in resumes:
-            resume_id = str(resume.get("_id"))
-            file_id = resume.get("gridfs_file_id", "")
-
-            # prefer normalized fields when available
-            name = resume.get("name") or resume.get("parsed_raw", {}).get("name") or "Unknown"
-            email = resume.get("email") or resume.get("parsed_raw", {}).get("email") or "N/A"
-            phone = resume.get("phone") or resume.get("parsed_raw", {}).get("phone") or "N/A"
-            summary = resume.get("summary") or resume.get("parsed_raw", {}).get("summary") or "No summary available."
-
-            skills = resume.get("skills") or []
-            if isinstance(skills, dict): # Should not happen after normalization, but defensive check
-                flat_skills = []
-                for skill_list in skills.values():
-                    if isinstance(skill_list, list):
-                        flat_skills.extend(skill_list)
-                skills = flat_skills
-
-            session.run("""
-                MERGE (r:Resume {id:$resume_id})
-                SET r.name=$name, r.file_id=$file_id, r.email=$email, r.phone=$phone, r.summary=$summary
-            """, resume_id=resume_id, name=name, file_id=file_id, email=email, phone=phone, summary=summary)
-
-            # Clear existing HAS relationships before adding new ones
-            session.run("MATCH (r:Resume {id:$resume_id})-[rel:HAS]->() DELETE rel", resume_id=resume_id)
-
-            for skill in skills:
-                # Ensure skill is capitalized before merging
-                skill_name = skill.strip().capitalize()
-                if isinstance(skill_name, str) and skill_name:
-                    session.run("MERGE (s:Skill {name:$skill})", skill=skill_name)
-                    session.run("""
-                        MATCH (r:Resume {id:$resume_id}), (s:Skill {name:$skill})
-                        MERGE (r)-[:HAS]->(s)
-                    """, resume_id=resume_id, skill=skill_name)
-    print("✅ Resumes (with corrected flat details & HAS rels) pushed to Neo4j.")
-
-
-def recommend_jobs(resume_id, limit=5, mode: str = "expanded"):
+        for record in session.run("""
+            MATCH (s:Skill) WHERE s.name IS NOT NULL
+            RETURN s.name AS name, s.ontology_processed AS processed, s.last_processed AS last_processed
+        """):
+            builder.add_skill(record["name"], record["processed"], record["last_processed"])
+        for record in session.run("""
+            MATCH (j:Job) WHERE j.id IS NOT NULL
+            OPTIONAL MATCH (j)-[:REQUIRES]->(s:Skill)
+            RETURN j.id AS id, j.title AS title, collect(DISTINCT s.name) AS skills
+        """):
+            builder.add_job(record["id"], record["title"], record["skills"])
+        for record in session.run("""
+            MATCH (r:Resume) WHERE r.id IS NOT NULL
+            OPTIONAL MATCH (r)-[:HAS]->(s:Skill)
+            RETURN r.id AS id, r.name AS name, r.file_id AS file_id, r.email AS email, r.phone AS phone,
+                   r.summary AS summary, collect(DISTINCT s.name) AS skills
+        """):
+            builder.add_resume(record["id"], record["skills"], name=record["name"], file_id=record["file_id"],
+                               email=record["email"], phone=record["phone"], summary=record["summary"])
+        for record in session.run("""
+            MATCH (a:Skill)-[r:RELATED_TO|IS_A]->(b:Skill)
+            RETURN a.name AS a, b.name AS b, type(r) AS relType, r.confidence AS confidence,
+                   r.source AS source, r.updated_at AS updated_at
+        """):
+            builder.add_relation(record["a"], record["b"], record["relType"], record["confidence"],
+                                 record["source"], record["updated_at"])
+        for record in session.run("""
+            MATCH (a:Skill)-[r:SIMILAR_TO]->(b:Skill)
+            RETURN a.name AS a, b.name AS b, r.hops AS hops, r.confidence AS confidence, r.score AS score,
+                   r.built_at AS built_at
+        """):
+            builder.add_similar(record["a"], record["b"], record["hops"], record["confidence"], record["score"],
+                                record["built_at"])
+
+    closure_meta = db["ontology_meta"].find_one({"_id": "similarity_closure"}, {"_id": 0})
+    size, counts = builder.write(path, meta={"similarity_closure": closure_meta})
+    elapsed = round(time.time() - t0, 1)
+    print(f"📦 Graph snapshot written to {path}: {size / 1e6:.1f} MB, {counts} in {elapsed}s.")
+    return {"status": "exported", "path": path, "bytes": size, "counts": counts, "elapsed_s": elapsed}
+
+
+def _delete_in_batches(session, match_clause: str, batch_size: int, detach: bool = False):
+    """Deletes whatever match_clause binds as x, batch_size per transaction. Returns the count."""
+    delete = "DETACH DELETE" if detach else "DELETE"
+    deleted = 0
+    while True:
+        count = session.run(f"{match_clause} WITH x LIMIT $batch_size {delete} x RETURN count(*) AS n",
+                            batch_size=batch_size).single()["n"]
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def _run_in_batches(session, query: str, rows, batch_size: int, **params):
+    batch, written = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            session.run(query, rows=batch, **params).consume()
+            written, batch = written + len(batch), []
+    if batch:
+        session.run(query, rows=batch, **params).consume()
+        written += len(batch)
+    return written
+
+
+def import_graph_snapshot(path: str, replace: bool = False, batch_size: Optional[int] = None):
+    """
+    Bulk-loads a snapshot. Nodes are merged; each snapshot job/resume gets
+    exactly its snapshot edges. With replace=True the existing Skill/Job/Resume
+    graph is deleted first (in batches) and edges are created without MERGE.
+    The SIMILAR_TO closure is replaced by the snapshot's, or rebuilt if it has none.
+    """
+    batch_size = batch_size or GRAPH_SNAPSHOT_BATCH_SIZE
+    t0 = time.time()
+    ensure_graph_indexes()
+    report = {"status": "imported", "path": path, "replace": replace}
+    with graph_snapshot.GraphSnapshot(path) as snapshot, neo4j_driver.session() as session:
+        if replace:
+            # Edges first, so no single node deletion drags a hub's edges into one transaction
+            report["edges_deleted"] = _delete_in_batches(
+                session, "MATCH (n)-[x]->() WHERE n:Skill OR n:Job OR n:Resume", batch_size)
+            report["nodes_deleted"] = _delete_in_batches(
+                session, "MATCH (x) WHERE x:Skill OR x:Job OR x:Resume", batch_size, detach=True)
+        elif snapshot.counts["similar"]:
+            _delete_in_batches(session, "MATCH (:Skill)-[x:SIMILAR_TO]->()", batch_size)
+
+        report["skills"] = _run_in_batches(session, """
+            UNWIND $rows AS row
+            MERGE (s:Skill {name: row.name})
+            SET s.ontology_processed = row.ontology_processed, s.last_processed = row.last_processed
+        """, snapshot.iter_skills(), batch_size)
+        report["jobs"] = _run_in_batches(session, """
+            UNWIND $rows AS row
+            MERGE (j:Job {id: row.id})
+            SET j.title = row.title
+            WITH j, row
+            OPTIONAL MATCH (j)-[old:REQUIRES]->()
+            DELETE old
+            WITH DISTINCT j, row
+            UNWIND row.skills AS skillName
+            MATCH (s:Skill {name: skillName})
+            CREATE (j)-[:REQUIRES]->(s)
+        """, snapshot.iter_jobs(), batch_size)
+        report["resumes"] = _run_in_batches(session, """
+            UNWIND $rows AS row
+            MERGE (r:Resume {id: row.id})
+            SET r.name = row.name, r.file_id = row.file_id, r.email = row.email,
+                r.phone = row.phone, r.summary = row.summary
+            WITH r, row
+            OPTIONAL MATCH (r)-[old:HAS]->()
+            DELETE old
+            WITH DISTINCT r, row
+            UNWIND row.skills AS skillName
+            MATCH (s:Skill {name: skillName})
+            CREATE (r)-[:HAS]->(s)
+        """, snapshot.iter_resumes(), batch_size)
+
+        report["relations"] = 0
+        for rel_type in graph_snapshot.RELATION_TYPES:
+            # After a wipe there is nothing to merge with
+            write = f"CREATE (s1)-[r:{rel_type}]->(s2)" if replace else f"MERGE {_relation_merge_pattern(rel_type)}"
+            report["relations"] += _run_in_batches(session, f"""
+                UNWIND $rows AS row
+                MATCH (s1:Skill {{name: row.from}}), (s2:Skill {{name: row.to}})
+                {write}
+                SET r.source = row.source, r.confidence = row.confidence, r.updated_at = row.updated_at
+            """, (rel for rel in snapshot.iter_relations() if rel["relation_type"] == rel_type), batch_size)
+
+        report["similar"] = _run_in_batches(session, """
+            UNWIND $rows AS row
+            MATCH (s:Skill {name: row.from}), (t:Skill {name: row.to})
+            CREATE (s)-[sim:SIMILAR_TO]->(t)
+            SET sim.hops = row.hops, sim.confidence = row.confidence, sim.score = row.score,
+                sim.built_at = row.built_at
+        """, snapshot.iter_similar(), batch_size)
+        resume_ids = list(snapshot.strings("resume.id"))
+        closure_meta = snapshot.meta.get("similarity_closure")
+
+    if report["similar"]:
+        if closure_meta:
+            db["ontology_meta"].replace_one({"_id": "similarity_closure"}, closure_meta, upsert=True)
+    else:
+        _refresh_closure_safely()
+    bump_cache_versions("jobs", "ontology")
+    for start in range(0, len(resume_ids), batch_size):
+        bump_cache_versions(*[f"resume:{resume_id}" for resume_id in resume_ids[start:start + batch_size]])
+    report["elapsed_s"] = round(time.time() - t0, 1)
+    print(f"📦 Graph snapshot {path} imported in {report['elapsed_s']}s: {report}")
+    return report
+
+
+def map_graph_snapshot(path: Optional[str] = None):
+    """Memory-maps the snapshot for in-process use (replacing any mapped one). Returns it."""
+    global _mapped_snapshot
+    snapshot = graph_snapshot.GraphSnapshot(path or GRAPH_SNAPSHOT_PATH)
+    previous, _mapped_snapshot = _mapped_snapshot, snapshot
+    if previous is not None:
+        previous.close()
+    print(f"🗺️ Graph snapshot mapped: {snapshot.stats()}")
+    return snapshot
+
+
+def get_mapped_graph_snapshot():
+    """The snapshot mapped at startup (GRAPH_SNAPSHOT_PATH), or None."""
+    return _mapped_snapshot
+
+
+def close_graph_snapshot():
+    global _mapped_snapshot
+    if _mapped_snapshot is not None:
+        _mapped_snapshot.close()
+        _mapped_snapshot = None
+
+
+def _job_docs_by_id(job_ids):
+    """One projected query for the JD fields the recommendation cards need (not the full description)."""
+    object_ids = [ObjectId(job_id) for job_id in job_ids if ObjectId.is_valid(job_id)]
+    cursor = db["JD_skills"].find({"_id": {"$in": object_ids}}, {"job_title": 1, "company_portal_link": 1, "skills": 1})
+    return {str(doc["_id"]): doc for doc in cursor}
+
+
+def recommend_jobs(resume_id, limit=5, mode: str = "expanded", max_hops: Optional[int] = None,
+                   hop_decay: Optional[float] = None, use_confidence: bool = True,
+                   text_blend: Optional[float] = None):
     """
     MODIFIED: Now accepts a 'mode' parameter to toggle scoring logic.
     - 'expanded': (default) Uses weighted scoring (direct=1.0, related=0.5)
     - 'direct': Uses simple direct skill count.
+    - 'multihop': direct=1.0, related up to max_hops away scored from the
+      precomputed similarity closure with per-hop decay and edge confidence.
+    - 'text': BM25 over the resume text and job descriptions (see recommend_jobs_text).
     """
-    with neo4j_driver.session() as session:
+    if mode == "text":
+        return recommend_jobs_text(resume_id, limit=limit, text_blend=text_blend)
+
+    records = get_graph_store().recommend(resume_id, limit=limit, mode=mode, **_graph_scoring_params(
+        max_hops, hop_decay, use_confidence))
+    return _recommendation_cards(records, _job_docs_by_id([record["job_id"] for record in records]))
+
+
+def _recommendation_cards(records, job_docs):
+    """GraphStore recommendation rows joined with their JD documents, in the frontend's shape."""
+    recommendations = []
+    for record in records:
+        job_id = record["job_id"]
+        job_doc = job_docs.get(job_id)
+
+        recommendations.append({
+            "job_id": job_id,
+            "job_title": record["job_title"],
+            "company_portal_link": job_doc.get("company_portal_link", "") if job_doc else "",
+            "skills": job_doc.get("skills", []) if job_doc else [],
+            "weightedScore": record["weightedScore"],
+            "directScore": record["directScore"],
+            "relatedScore": record["relatedScore"],
+            "matchedSkills": record["directScore"] + record["relatedScore"] # For frontend compatibility
+        })
+    return recommendations
 
-        if mode == "direct":
-            # --- DIRECT-ONLY SCORING (Old Logic) ---
-            result = session.run("""
-                MATCH (r:Resume {id:$resume_id})-[:HAS]->(s:Skill)<-[:REQUIRES]-(j:Job)
-                RETURN j.id AS job_id,
-                       j.title AS job_title,
-                       count(s) AS directScore
-                ORDER BY directScore DESC
-                LIMIT $limit
-            """, resume_id=resume_id, limit=limit)
-
-            recommendations = []
-            for record in result:
-                job_id = record["job_id"]
-                job_doc = db["JD_skills"].find_one({"_id": ObjectId(job_id)})
-
-                recommendations.append({
-                    "job_id": job_id,
-                    "job_title": record["job_title"],
-                    "company_portal_link": job_doc.get("company_portal_link", "") if job_doc else "",
-                    "skills": job_doc.get("skills", []) if job_doc else [],
-                    "weightedScore": float(record["directScore"]), # Use float for consistency
-                    "directScore": record["directScore"],
-                    "relatedScore": 0,
-                    "matchedSkills": record["directScore"]
-                })
 
-        else:
-            # --- EXPANDED SCORING (New Logic) ---
-            result = session.run("""
-                MATCH (r:Resume {id:$resume_id})-[:HAS]->(rs:Skill) // Candidate's skills
-                WITH r, collect(DISTINCT rs) AS candidateSkills
-                MATCH (j:Job)-[:REQUIRES]->(js:Skill) // Job's required skills
-
-                // Calculate direct matches
-                WITH r, j, candidateSkills, js,
-                     CASE WHEN js IN candidateSkills THEN 1 ELSE 0 END AS directMatch
-
-                // Calculate related matches (1-hop)
-                WITH r, j, candidateSkills, js, directMatch
-                OPTIONAL MATCH (rs_related)-[:RELATED_TO|IS_A]->(js)
-                WHERE rs_related IN candidateSkills AND directMatch = 0 // Check for 1-hop relation, only if not a direct match
-                WITH r, j, js, directMatch,
-                     CASE WHEN rs_related IS NOT NULL THEN 1 ELSE 0 END AS relatedMatch
-
-                // Aggregate scores
-                WITH j,
-                     SUM(directMatch) AS directScore,
-                     SUM(relatedMatch) AS relatedScore
-                WHERE directScore + relatedScore > 0
-
-                RETURN j.id AS job_id,
-                       j.title AS job_title,
-                       (directScore * 1.0) + (relatedScore * 0.5) AS weightedScore,
-                       directScore,
-                       relatedScore
-                ORDER BY weightedScore DESC
-                LIMIT $limit
-            """, resume_id=resume_id, limit=limit)
-
-            recommendations = []
-            for record in result:
-                job_id = record["job_id"]
-                job_doc = db["JD_skills"].find_one({"_id": ObjectId(job_id)})
-
-                recommendations.append({
-                    "job_id": job_id,
-                    "job_title": record["job_title"],
-                    "company_portal_link": job_doc.get("company_portal_link", "") if job_doc else "",
-                    "skills": job_doc.get("skills", []) if job_doc else [],
-                    "weightedScore": record["weightedScore"],
-                    "directScore": record["directScore"],
-                    "relatedScore": record["relatedScore"],
-                    "matchedSkills": record["directScore"] + record["relatedScore"] # For frontend compatibility
-                })
+def _graph_scoring_params(max_hops: Optional[int], hop_decay: Optional[float], use_confidence: bool):
+    """Scoring keyword arguments for GraphStore.recommend/eligible, defaults filled in."""
+    return {"max_hops": max_hops or SCORING_MAX_HOPS,
+            "hop_decay": SCORING_HOP_DECAY if hop_decay is None else hop_decay,
+            "related_weight": SCORING_RELATED_WEIGHT,
+            "use_confidence": use_confidence}
 
-    return recommendations
 
+# Job-first applicant scoring bodies, shared with the batch ranking sweep
+_APPLICANT_SCORING = graph_store.APPLICANT_SCORING
 
 
-def eligible_applicants(job_id):
+def eligible_applicants(job_id, mode: str = "expanded", max_hops: Optional[int] = None,
+                        hop_decay: Optional[float] = None, use_confidence: bool = True,
+                        text_blend: Optional[float] = None):
     """
     Finds applicants based on direct AND related skills (1-hop).
     Implements weighted scoring: direct=1.0, related=0.5
+    mode='multihop' scores related skills up to max_hops away from the
+    precomputed similarity closure instead (see recommend_jobs).
+    mode='text' ranks by BM25 text similarity (see eligible_applicants_text).
     """
-    with neo4j_driver.session() as session:
-        result = session.run("""
-            MATCH (j:Job {id:$job_id})-[:REQUIRES]->(js:Skill) // Job's skills
-            WITH j, collect(DISTINCT js) AS jobSkills
-            MATCH (r:Resume)-[:HAS]->(rs:Skill) // Candidate's skills
-
-            // Calculate direct matches
-            WITH j, r, jobSkills, rs,
-                 CASE WHEN rs IN jobSkills THEN 1 ELSE 0 END AS directMatch
-
-            // Calculate related matches (1-hop)
-            WITH j, r, jobSkills, rs, directMatch
-            OPTIONAL MATCH (rs)-[:RELATED_TO|IS_A]->(js_related)
-            WHERE js_related IN jobSkills AND directMatch = 0 // Check for 1-hop relation, only if not a direct match
-            WITH j, r, rs, directMatch,
-                 CASE WHEN js_related IS NOT NULL THEN 1 ELSE 0 END AS relatedMatch
-
-            // Aggregate scores
-            WITH r,
-                 SUM(directMatch) AS directScore,
-                 SUM(relatedMatch) AS relatedScore
-            WHERE directScore + relatedScore > 0
-
-            RETURN r.id AS resume_id,
-                   r.name AS resume_name,
-                   r.file_id AS file_id,
-                   r.email AS email,
-                   r.phone AS phone,
-                   r.summary AS summary,
-                   (directScore * 1.0) + (relatedScore * 0.5) AS weightedScore,
-                   directScore,
-                   relatedScore
-            ORDER BY weightedScore DESC
-        """, job_id=job_id)
-
-        applicants = []
-        for record in result:
-            applicants.append({
-                "resume_id": record["resume_id"],
-                "resume_name": record["resume_name"],
-                "file_id": record["file_id"],
-                "email": record["email"],
-                "phone": record["phone"],
-                "summary": record["summary"],
-                "weightedScore": record["weightedScore"],
-                "directScore": record["directScore"],
-                "relatedScore": record["relatedScore"],
-                "matchedSkills": record["directScore"] + record["relatedScore"] # For frontend compatibility
-            })
+    if mode == "text":
+        return eligible_applicants_text(job_id, text_blend=text_blend)
+
+    applicants = []
+    for record in get_graph_store().eligible(job_id, mode=mode, **_graph_scoring_params(
+            max_hops, hop_decay, use_confidence)):
+        applicants.append({**record, "matchedSkills": record["directScore"] + record["relatedScore"]})  # For frontend compatibility
     return applicants
 
+# --- TEXT MATCHING (BM25) ---
+# mode='text' ranks by lexical similarity between resume text and job
+# descriptions, using the in-process BM25 indexes from text_index.py: no LLM
+# call and no dependence on which skill strings Gemini extracted. Each worker
+# keeps one index per side ("jobs" over JD_skills title/description/skills,
+# "resumes" over the stored extracted text, falling back to the parsed fields).
+# Indexes are loaded from TEXT_INDEX_DIR, then brought up to date incrementally
+# from the "text_index_changes" log: every write that changes a resume's or
+# job's indexed text (insert, stored text, reparse rewrite, delete) appends a
+# change after it lands, and each worker re-reads the document of every change
+# newer than its checkpoint. The last TEXT_SYNC_OVERLAP_SECONDS of the log are
+# re-read on every sync, so changes committed out of timestamp order (clocks
+# and commit latency differ between workers) are still applied. Inserts on this
+# worker are added right away, and the files are rewritten every
+# TEXT_INDEX_SAVE_EVERY changes and at shutdown. Searches never wait for a sync:
+# it runs in a background thread at most every TEXT_SYNC_INTERVAL_SECONDS.
+TEXT_INDEX_DIR = os.getenv("TEXT_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "text_index_data"))
+TEXT_INDEX_SAVE_EVERY = int(os.getenv("TEXT_INDEX_SAVE_EVERY", "200"))
+TEXT_QUERY_MAX_TERMS = int(os.getenv("TEXT_QUERY_MAX_TERMS", "48"))      # most discriminative terms of a long query
+TEXT_GRAPH_BLEND = float(os.getenv("TEXT_GRAPH_BLEND", "0"))             # 0 = pure BM25, 1 = graph 'expanded' order
+TEXT_MAX_APPLICANTS = int(os.getenv("TEXT_MAX_APPLICANTS", "200"))
+TEXT_BLEND_CANDIDATES = 50  # graph and text candidates considered per side when blending
+TEXT_SYNC_BATCH_SIZE = 1000
+TEXT_SYNC_INTERVAL_SECONDS = float(os.getenv("TEXT_SYNC_INTERVAL_SECONDS", "2"))
+TEXT_SYNC_OVERLAP_SECONDS = int(os.getenv("TEXT_SYNC_OVERLAP_SECONDS", "60"))
+TEXT_CHANGE_RETENTION_DAYS = int(os.getenv("TEXT_CHANGE_RETENTION_DAYS", "7"))  # older indexes are rebuilt
+TEXT_CHANGES_COLLECTION = "text_index_changes"
+
+_TEXT_SOURCES = {
+    "jobs": ("JD_skills", {"job_title": 1, "job_description": 1, "skills": 1}),
+    "resumes": ("resumes", {"summary": 1, "skills": 1, "professional_experience": 1, "projects": 1}),
+}
+_text_indexes = {}
+_text_index_locks = {kind: threading.Lock() for kind in _TEXT_SOURCES}
+_text_applied_changes = {kind: {} for kind in _TEXT_SOURCES}  # change _id -> at, within the overlap window
+_text_index_synced_at = {}  # kind -> time.monotonic() of the last sync started
+
+
+def record_text_changes(kind: str, doc_ids):
+    """Appends changes to the text change log; call after the Mongo write that changed (or deleted) the documents."""
+    at = datetime.now().isoformat()
+    changes = [{"kind": kind, "doc_id": str(doc_id), "at": at} for doc_id in doc_ids]
+    if changes:
+        db[TEXT_CHANGES_COLLECTION].insert_many(changes, ordered=False)
+
+
+def _job_index_text(job_doc):
+    return "\n".join([job_doc.get("job_title") or "", job_doc.get("job_description") or "",
+                      " ".join(job_doc.get("skills") or [])])
+
+
+def _resume_fields_text(resume_doc):
+    """Text from the parsed fields, for resumes whose extracted text was not stored."""
+    parts = [resume_doc.get("summary") or "", " ".join(resume_doc.get("skills") or [])]
+    for exp in resume_doc.get("professional_experience") or []:
+        if isinstance(exp, dict):
+            parts.append(exp.get("title") or "")
+            parts.extend(str(line) for line in exp.get("responsibilities") or [])
+    for project in resume_doc.get("projects") or []:
+        if isinstance(project, dict):
+            parts.append(project.get("title") or "")
+            parts.extend(str(line) for line in project.get("details") or [])
+    return "\n".join(part for part in parts if part)
+
+
+def _resume_index_texts(resume_docs):
+    """{resume_id: text} with the stored extracted text where there is one (one query for all)."""
+    ids = [doc["_id"] for doc in resume_docs]
+    stored = {doc["_id"]: zlib.decompress(doc["text_z"]).decode("utf-8")
+              for doc in db["resume_texts"].find({"_id": {"$in": ids}}, {"text_z": 1})}
+    return {str(doc["_id"]): stored.get(doc["_id"]) or _resume_fields_text(doc) for doc in resume_docs}
+
+
+def _text_index_path(kind: str):
+    return os.path.join(TEXT_INDEX_DIR, f"{kind}.bm25")
+
+
+def _index_text_docs(kind: str, index, docs):
+    if kind == "resumes":
+        for doc_id, text in _resume_index_texts(docs).items():
+            index.add(doc_id, text)
+    else:
+        for doc in docs:
+            index.add(str(doc["_id"]), _job_index_text(doc), tags=doc.get("skills") or [])
+
+
+def _build_text_index(kind: str, index):
+    """Indexes every document, then sets the checkpoint to before the scan so writes during it are replayed."""
+    collection, projection = _TEXT_SOURCES[kind]
+    started = datetime.now()
+    _text_applied_changes[kind].clear()
+    added, last_id = 0, None
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        docs = list(db[collection].find(query, projection).sort("_id", 1).limit(TEXT_SYNC_BATCH_SIZE))
+        if not docs:
+            break
+        _index_text_docs(kind, index, docs)
+        last_id = docs[-1]["_id"]
+        added += len(docs)
+        if added % (10 * TEXT_SYNC_BATCH_SIZE) == 0:
+            print(f"  -> Text index '{kind}': {added} documents indexed so far...")
+    index.checkpoint = started.isoformat()
+    return added
+
+
+def _sync_text_index(kind: str, index):
+    """Applies the change log since index.checkpoint (minus the overlap window). Caller holds the kind's lock."""
+    if index.checkpoint is None:
+        return _build_text_index(kind, index)
+    collection, projection = _TEXT_SOURCES[kind]
+    since = (datetime.fromisoformat(index.checkpoint) - timedelta(seconds=TEXT_SYNC_OVERLAP_SECONDS)).isoformat()
+    applied = _text_applied_changes[kind]
+    changes = [change for change in db[TEXT_CHANGES_COLLECTION].find({"kind": kind, "at": {"$gt": since}})
+               if change["_id"] not in applied]
+    doc_ids = list(dict.fromkeys(change["doc_id"] for change in changes))
+    for start in range(0, len(doc_ids), TEXT_SYNC_BATCH_SIZE):
+        batch = doc_ids[start:start + TEXT_SYNC_BATCH_SIZE]
+        docs = list(db[collection].find({"_id": {"$in": [ObjectId(doc_id) for doc_id in batch]}}, projection))
+        _index_text_docs(kind, index, docs)
+        for doc_id in set(batch) - {str(doc["_id"]) for doc in docs}:
+            index.remove(doc_id)  # deleted
+    for change in changes:
+        applied[change["_id"]] = change["at"]
+        index.checkpoint = max(index.checkpoint, change["at"])
+    for change_id in [change_id for change_id, at in applied.items() if at <= since]:
+        del applied[change_id]
+    if index.changes_since_save >= TEXT_INDEX_SAVE_EVERY:
+        _save_text_index(kind, index)
+    return len(doc_ids)
+
+
+def _save_text_index(kind: str, index):
+    try:
+        index.save(_text_index_path(kind))
+    except OSError as e:
+        print(f"⚠️ WARNING: Failed to save text index '{kind}': {e}")
+        return
+    cutoff = (datetime.now() - timedelta(days=TEXT_CHANGE_RETENTION_DAYS)).isoformat()
+    db[TEXT_CHANGES_COLLECTION].delete_many({"kind": kind, "at": {"$lt": cutoff}})
+
+
+def get_text_index(kind: str):
+    """
+    This worker's index for 'jobs' or 'resumes'. Only the first call waits (to
+    load or build it); after that callers read without the lock, and a sync
+    with MongoDB is started in the background at most every
+    TEXT_SYNC_INTERVAL_SECONDS (skipped while one is still running).
+    """
+    index = _text_indexes.get(kind)
+    if index is not None:
+        if time.monotonic() - _text_index_synced_at.get(kind, 0.0) >= TEXT_SYNC_INTERVAL_SECONDS \
+                and _text_index_locks[kind].acquire(blocking=False):
+            _text_index_synced_at[kind] = time.monotonic()
+            threading.Thread(target=_sync_text_index_in_background, args=(kind,), daemon=True).start()
+        return index
+    with _text_index_locks[kind]:
+        index = _text_indexes.get(kind)
+        if index is None:
+            index = text_index.BM25Index.load(_text_index_path(kind), kind)
+            retention_cutoff = (datetime.now() - timedelta(days=TEXT_CHANGE_RETENTION_DAYS)).isoformat()
+            if index is not None and (index.checkpoint or "") < retention_cutoff:
+                print(f"🔎 Text index file '{kind}' predates the change log retention; rebuilding.")
+                index = None
+            if index is None:
+                print(f"🔎 Building text index '{kind}' from MongoDB...")
+                index = text_index.BM25Index(kind)
+            _sync_text_index(kind, index)
+            # Published only once complete: readers never see a half-built index
+            _text_indexes[kind] = index
+            _text_index_synced_at[kind] = time.monotonic()
+    return index
+
+
+def _sync_text_index_in_background(kind: str):
+    """Runs one sync; the caller acquired the kind's lock, which is released here."""
+    try:
+        _sync_text_index(kind, _text_indexes[kind])
+    except Exception as e:
+        print(f"⚠️ WARNING: Text index '{kind}' sync failed (retried on a later search): {e}")
+    finally:
+        _text_index_locks[kind].release()
+
+
+def index_text_document(kind: str, doc_id: str, text: str, tags=()):
+    """Adds a just-inserted document to this worker's index (if loaded; otherwise the first sync picks it up)."""
+    index = _text_indexes.get(kind)
+    if index is not None:
+        index.add(str(doc_id), text, tags=tags)
+
+
+def unindex_text_document(kind: str, doc_id: str):
+    index = _text_indexes.get(kind)
+    if index is not None:
+        index.remove(str(doc_id))
+
+
+def save_text_indexes():
+    for kind, index in list(_text_indexes.items()):
+        if index.changes_since_save:
+            _save_text_index(kind, index)
+
+
+def rebuild_text_index(kind: str):
+    """Re-indexes one side from scratch (drops removed documents, picks up edited ones) and saves it."""
+    t0 = time.time()
+    index = text_index.BM25Index(kind)
+    with _text_index_locks[kind]:
+        _sync_text_index(kind, index)
+        _text_indexes[kind] = index
+        _save_text_index(kind, index)
+    return {"index": kind, **index.stats(), "elapsed_s": round(time.time() - t0, 2)}
+
+
+def _blend_scores(text_scores, graph_scores, text_blend):
+    """(1 - text_blend) * text + text_blend * graph, each scaled to 0..1 by its best candidate."""
+    text_max = max(text_scores.values(), default=0) or 1.0
+    graph_max = max(graph_scores.values(), default=0) or 1.0
+    return {doc_id: (1 - text_blend) * text_scores.get(doc_id, 0.0) / text_max
+                    + text_blend * graph_scores.get(doc_id, 0.0) / graph_max
+            for doc_id in set(text_scores) | set(graph_scores)}
+
+
+def recommend_jobs_text(resume_id, limit=5, text_blend: Optional[float] = None):
+    """
+    mode='text': jobs ranked by BM25 between the resume's text and each job's
+    title, description and skills. directScore counts the job's skills the
+    resume lists verbatim. With text_blend > 0 the graph 'expanded' score is
+    mixed in (graph and text candidates are the top TEXT_BLEND_CANDIDATES of
+    each; a job outside the graph's top list counts as graph score 0).
+    """
+    text_blend = TEXT_GRAPH_BLEND if text_blend is None else min(max(text_blend, 0.0), 1.0)
+    if not ObjectId.is_valid(resume_id):
+        return []
+    resume_doc = db["resumes"].find_one({"_id": ObjectId(resume_id)}, _TEXT_SOURCES["resumes"][1])
+    if not resume_doc:
+        return []
+    query_text = load_resume_text(resume_id) or _resume_fields_text(resume_doc)
+
+    index = get_text_index("jobs")
+    query_terms = index.query_terms(query_text, TEXT_QUERY_MAX_TERMS)
+    graph = {}
+    if text_blend > 0:
+        candidates = max(limit, TEXT_BLEND_CANDIDATES)
+        graph = {rec["job_id"]: rec for rec in recommend_jobs(resume_id, limit=candidates, mode="expanded")}
+        text_scores = dict(index.search(query_terms, candidates))
+        text_scores.update(index.scores(query_terms, doc_ids=graph.keys()))
+        scores = _blend_scores(text_scores, {job_id: rec["weightedScore"] for job_id, rec in graph.items()},
+                               text_blend)
+    else:
+        text_scores = dict(index.search(query_terms, limit * 2))  # spare rows for jobs deleted meanwhile
+        scores = text_scores
+
+    ranked = heapq.nlargest(limit * 2, scores.items(), key=lambda item: item[1])
+    job_docs = _job_docs_by_id([job_id for job_id, _ in ranked])
+    resume_skills = {skill.lower() for skill in resume_doc.get("skills") or []}
+    recommendations = []
+    for job_id, score in ranked:
+        job_doc = job_docs.get(job_id)
+        if not job_doc:
+            index.remove(job_id)  # deleted since it was indexed
+            continue
+        graph_rec = graph.get(job_id)
+        direct = graph_rec["directScore"] if graph_rec else \
+            sum(1 for skill in job_doc.get("skills") or [] if skill.lower() in resume_skills)
+        related = graph_rec["relatedScore"] if graph_rec else 0
+        recommendations.append({
+            "job_id": job_id,
+            "job_title": job_doc.get("job_title", ""),
+            "company_portal_link": job_doc.get("company_portal_link", ""),
+            "skills": job_doc.get("skills", []),
+            "weightedScore": round(score, 4),
+            "textScore": round(text_scores.get(job_id, 0.0), 4),
+            "directScore": direct,
+            "relatedScore": related,
+            "matchedSkills": direct + related # For frontend compatibility
+        })
+        if len(recommendations) == limit:
+            break
+    return recommendations
+
+
+def eligible_applicants_text(job_id, text_blend: Optional[float] = None, limit: Optional[int] = None):
+    """
+    mode='text': the TEXT_MAX_APPLICANTS resumes whose text best matches the job's
+    title, description and skills (BM25). text_blend mixes in the graph
+    'expanded' score as in recommend_jobs_text.
+    """
+    text_blend = TEXT_GRAPH_BLEND if text_blend is None else min(max(text_blend, 0.0), 1.0)
+    limit = limit or TEXT_MAX_APPLICANTS
+    if not ObjectId.is_valid(job_id):
+        return []
+    job_doc = db["JD_skills"].find_one({"_id": ObjectId(job_id)}, _TEXT_SOURCES["jobs"][1])
+    if not job_doc:
+        return []
+
+    index = get_text_index("resumes")
+    query_terms = index.query_terms(_job_index_text(job_doc), TEXT_QUERY_MAX_TERMS)
+    graph = {}
+    if text_blend > 0:
+        # The job-first graph query scores every applicant, so no candidate cut-off is needed here
+        graph = {row["resume_id"]: row for row in eligible_applicants(job_id, mode="expanded")}
+        text_scores = dict(index.search(query_terms, max(limit, TEXT_BLEND_CANDIDATES)))
+        text_scores.update(index.scores(query_terms, doc_ids=graph.keys()))
+        scores = _blend_scores(text_scores, {rid: row["weightedScore"] for rid, row in graph.items()}, text_blend)
+    else:
+        text_scores = dict(index.search(query_terms, limit))
+        scores = text_scores
+
+    ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+    object_ids = [ObjectId(resume_id) for resume_id, _ in ranked]
+    resume_docs = {str(doc["_id"]): doc for doc in db["resumes"].find(
+        {"_id": {"$in": object_ids}},
+        {"name": 1, "gridfs_file_id": 1, "email": 1, "phone": 1, "summary": 1, "skills": 1})}
+    job_skills = {skill.lower() for skill in job_doc.get("skills") or []}
+    applicants = []
+    for resume_id, score in ranked:
+        resume_doc = resume_docs.get(resume_id)
+        if not resume_doc:
+            index.remove(resume_id)  # deleted since it was indexed
+            continue
+        graph_row = graph.get(resume_id)
+        direct = graph_row["directScore"] if graph_row else \
+            sum(1 for skill in resume_doc.get("skills") or [] if skill.lower() in job_skills)
+        related = graph_row["relatedScore"] if graph_row else 0
+        applicants.append({
+            "resume_id": resume_id,
+            "resume_name": resume_doc.get("name"),
+            "file_id": resume_doc.get("gridfs_file_id"),
+            "email": resume_doc.get("email"),
+            "phone": resume_doc.get("phone"),
+            "summary": resume_doc.get("summary"),
+            "weightedScore": round(score, 4),
+            "textScore": round(text_scores.get(resume_id, 0.0), 4),
+            "directScore": direct,
+            "relatedScore": related,
+            "matchedSkills": direct + related # For frontend compatibility
+        })
+    return applicants
+
+# --- JOB SEARCH ---
+# /jobs/search runs on the same in-process "jobs" index: every query term must
+# appear (title, description or skills) and every requested skill must be one
+# of the job's skills (exact, case-insensitive). Matches are ranked by BM25, or
+# newest first when there is no text query (ObjectId order = creation order),
+# without scoring every match (see BM25Index.search_all). Only the page is
+# read from MongoDB.
+JOB_SEARCH_MAX_PAGE_SIZE = 100
+
+
+def search_jobs(q: str = "", skills=(), page: int = 1, page_size: int = 20):
+    """Returns (total_matches, [(job_id, score or None), ...]) for the requested page."""
+    terms = text_index.tokenize(q)
+    if q.strip() and not terms:
+        return 0, []  # only stopwords/punctuation: nothing to match, not "no query"
+    offset = (page - 1) * page_size
+    if not terms and not skills:
+        # Plain listing: newest first straight from the _id index
+        total = db["JD_skills"].estimated_document_count()
+        ids = db["JD_skills"].find({}, {"_id": 1}).sort("_id", -1).skip(offset).limit(page_size)
+        return total, [(str(doc["_id"]), None) for doc in ids]
+    return get_text_index("jobs").search_all(terms, skills, offset=offset, limit=page_size)
+
+# --- RECOMMENDATION CACHE ---
+# /recommend_jobs/ results are kept in memory per worker, keyed by the request
+# parameters. Each entry remembers the versions it was computed against: the
+# resume's own version plus the global "jobs" and "ontology" versions. Writers
+# bump those counters in Mongo (cache_versions), so every worker notices on its
+# next read and recomputes: a new job shows up on the very next request, while
+# repeated page reloads cost one indexed lookup instead of the Cypher query.
+# Per-job ("job:<id>") and per-skill ("skill:<name>", for every skill a changed
+# resume had before or has after the write) counters are bumped as well; a
+# precomputed applicant ranking is checked against its job's counter and those
+# of the skills that can score for the job, so a resume change only outdates the
+# rankings of jobs it could appear in.
+RECOMMEND_CACHE_MAX_ENTRIES = int(os.getenv("RECOMMEND_CACHE_MAX_ENTRIES", "5000"))
+RECOMMEND_CACHE_TTL_SECONDS = float(os.getenv("RECOMMEND_CACHE_TTL_SECONDS", "900"))  # safety net only
+CACHE_VERSIONS_COLLECTION = "cache_versions"
+
+_recommend_cache = OrderedDict()
+_recommend_cache_lock = threading.Lock()
+_recommend_cache_stats = {"hit": 0, "miss": 0, "stale": 0}
+
+
+def bump_cache_versions(*keys):
+    """
+    Invalidates cached results depending on these keys ("jobs", "job:<id>",
+    "ontology", "resume:<id>", "skill:<name>").
+    """
+    keys = list(dict.fromkeys(key for key in keys if key))
+    if not keys:
+        return
+    try:
+        db[CACHE_VERSIONS_COLLECTION].bulk_write(
+            [UpdateOne({"_id": key}, {"$inc": {"v": 1}}, upsert=True) for key in keys], ordered=False)
+    except Exception as e:
+        # Other workers may serve stale entries until the TTL; at least drop ours
+        print(f"⚠️ WARNING: Failed to bump cache versions {keys[:3]}: {e}")
+        with _recommend_cache_lock:
+            _recommend_cache.clear()
+
+
+def _recommend_cache_versions_many(resume_ids):
+    """Current (jobs, ontology, resume) versions for each resume, in one query."""
+    keys = ["jobs", "ontology"] + [f"resume:{resume_id}" for resume_id in resume_ids]
+    found = {doc["_id"]: doc.get("v", 0) for doc in db[CACHE_VERSIONS_COLLECTION].find({"_id": {"$in": keys}})}
+    return {resume_id: (found.get("jobs", 0), found.get("ontology", 0), found.get(f"resume:{resume_id}", 0))
+            for resume_id in resume_ids}
+
+
+def _recommend_cache_versions(resume_id):
+    return _recommend_cache_versions_many([resume_id])[resume_id]
+
+
+def cached_recommend_jobs(resume_id, limit=5, mode: str = "expanded", max_hops: Optional[int] = None,
+                          hop_decay: Optional[float] = None, use_confidence: bool = True,
+                          text_blend: Optional[float] = None):
+    """recommend_jobs() behind the versioned cache. Returns (recommendations, 'hit'|'miss'|'stale')."""
+    key = (resume_id, mode, limit, max_hops, hop_decay, use_confidence, text_blend)
+    versions = _recommend_cache_versions(resume_id)
+    now = time.time()
+    with _recommend_cache_lock:
+        entry = _recommend_cache.get(key)
+        if entry and entry[0] == versions and now - entry[1] < RECOMMEND_CACHE_TTL_SECONDS:
+            _recommend_cache.move_to_end(key)
+            _recommend_cache_stats["hit"] += 1
+            return entry[2], "hit"
+    status = "stale" if entry else "miss"
+
+    # Versions were read before computing, so a write that lands meanwhile
+    # leaves this entry outdated and the next read recomputes
+    recommendations = recommend_jobs(resume_id, limit=limit, mode=mode, max_hops=max_hops,
+                                     hop_decay=hop_decay, use_confidence=use_confidence, text_blend=text_blend)
+    with _recommend_cache_lock:
+        _recommend_cache_stats[status] += 1
+        _recommend_cache[key] = (versions, now, recommendations)
+        _recommend_cache.move_to_end(key)
+        while len(_recommend_cache) > RECOMMEND_CACHE_MAX_ENTRIES:
+            _recommend_cache.popitem(last=False)
+    return recommendations, status
+
+
+def get_recommend_cache_stats():
+    with _recommend_cache_lock:
+        lookups = sum(_recommend_cache_stats.values())
+        return {**_recommend_cache_stats, "entries": len(_recommend_cache),
+                "hit_rate": round(_recommend_cache_stats["hit"] / lookups, 4) if lookups else 0.0}
+
+
+# --- BATCH RECOMMENDATIONS ---
+# Same scoring as recommend_jobs, but for many resumes per round-trip through
+# GraphStore.recommend_many: on Neo4j the ids are UNWINDed and each resume's
+# top-k is computed in a CALL subquery that returns one row per recommended job.
+# A resume with no matches returns no rows, so recommend_many pre-fills an empty
+# list for every requested id and sorts each list like recommend() does.
+RECOMMEND_MODES = graph_store.SCORING_MODES + ("text",)
+BATCH_RECOMMEND_MAX_IDS = int(os.getenv("BATCH_RECOMMEND_MAX_IDS", "1000"))
+BATCH_RECOMMEND_CHUNK_SIZE = int(os.getenv("BATCH_RECOMMEND_CHUNK_SIZE", "100"))
+
+def _batch_recommend_chunk(resume_ids, limit, mode, max_hops, hop_decay, use_confidence):
+    """
+    Top-k job cards for each resume id with one GraphStore.recommend_many call
+    (one query on Neo4j), ranked exactly like recommend_jobs().
+    Returns {resume_id: [recommendation, ...]}.
+    """
+    rows = get_graph_store().recommend_many(resume_ids, limit=limit, mode=mode, **_graph_scoring_params(
+        max_hops, hop_decay, use_confidence))
+    job_docs = _job_docs_by_id({record["job_id"] for records in rows.values() for record in records})
+    return {resume_id: _recommendation_cards(rows[resume_id], job_docs) for resume_id in resume_ids}
+
+
+def iter_batch_recommendations(resume_ids, limit=5, mode: str = "expanded", max_hops: Optional[int] = None,
+                               hop_decay: Optional[float] = None, use_confidence: bool = True):
+    """
+    Yields (resume_id, recommendations, 'hit'|'computed') for every id. Cached
+    results go first; the rest are computed BATCH_RECOMMEND_CHUNK_SIZE resumes
+    per query and yielded as each chunk finishes (and cached for /recommend_jobs/).
+    """
+    resume_ids = list(dict.fromkeys(resume_ids))  # de-duplicate, keep order
+    versions = _recommend_cache_versions_many(resume_ids)
+    now = time.time()
+    missing = []
+    with _recommend_cache_lock:
+        cached = {}
+        for resume_id in resume_ids:
+            entry = _recommend_cache.get((resume_id, mode, limit, max_hops, hop_decay, use_confidence, None))
+            if entry and entry[0] == versions[resume_id] and now - entry[1] < RECOMMEND_CACHE_TTL_SECONDS:
+                cached[resume_id] = entry[2]
+            else:
+                missing.append(resume_id)
+        _recommend_cache_stats["hit"] += len(cached)
+    for resume_id, recommendations in cached.items():
+        yield resume_id, recommendations, "hit"
+
+    for start in range(0, len(missing), BATCH_RECOMMEND_CHUNK_SIZE):
+        chunk = missing[start:start + BATCH_RECOMMEND_CHUNK_SIZE]
+        if mode == "text":
+            # No server query to batch; BM25 lookups are in-process and cheap
+            batch = {resume_id: recommend_jobs(resume_id, limit=limit, mode=mode) for resume_id in chunk}
+        else:
+            batch = _batch_recommend_chunk(chunk, limit, mode, max_hops, hop_decay, use_confidence)
+        with _recommend_cache_lock:
+            _recommend_cache_stats["miss"] += len(chunk)
+            for resume_id in chunk:
+                key = (resume_id, mode, limit, max_hops, hop_decay, use_confidence, None)
+                _recommend_cache[key] = (versions[resume_id], now, batch[resume_id])
+                _recommend_cache.move_to_end(key)
+            while len(_recommend_cache) > RECOMMEND_CACHE_MAX_ENTRIES:
+                _recommend_cache.popitem(last=False)
+        for resume_id in chunk:
+            yield resume_id, batch[resume_id], "computed"
+
+# --- PRECOMPUTED APPLICANT RANKINGS ---
+# A batch sweep (nightly via precompute_rankings.py, or POST /rankings/precompute)
+# ranks applicants for every job in JD_skills and stores the lists in
+# applicant_rankings, so /eligible_applicants/ is a single document read.
+# Scoring is the job-first _APPLICANT_SCORING shared with eligible_applicants().
+# Each list records the cache versions it was computed against (its job, the
+# ontology, any resume); once one of them moves the list is ignored and the
+# applicants are scored live, so deleted resumes never reappear and new ones
+# are never missing.
+APPLICANT_RANKINGS_COLLECTION = "applicant_rankings"
+RANKINGS_MAX_APPLICANTS = int(os.getenv("RANKINGS_MAX_APPLICANTS", "2000"))  # keeps documents well under 16 MB
+RANKINGS_MAX_AGE_HOURS = float(os.getenv("RANKINGS_MAX_AGE_HOURS", "36"))    # older lists are recomputed live
+
+
+
+def _rank_applicants_chunk(session, job_ids, mode):
+    """Ranked applicant lists for several jobs in one query. Returns {job_id: (applicants, total)}."""
+    result = session.run(f"""
+        UNWIND $job_ids AS jid
+        CALL {{
+            WITH jid
+            {_APPLICANT_SCORING[mode]}
+            WITH r, weightedScore, directScore, relatedScore
+            ORDER BY weightedScore DESC
+            RETURN collect({{resume_id: r.id, resume_name: r.name, file_id: r.file_id, email: r.email,
+                             phone: r.phone, summary: r.summary, weightedScore: weightedScore,
+                             directScore: directScore, relatedScore: relatedScore}}) AS applicants
+        }}
+        RETURN jid AS job_id, applicants[0..$max_applicants] AS applicants, size(applicants) AS total
+    """, job_ids=job_ids, max_applicants=RANKINGS_MAX_APPLICANTS,
+         max_hops=SCORING_MAX_HOPS, hop_decay=SCORING_HOP_DECAY,
+         related_weight=SCORING_RELATED_WEIGHT, use_confidence=True)
+    rankings = {}
+    for record in result:
+        applicants = [{**a, "matchedSkills": a["directScore"] + a["relatedScore"]} for a in record["applicants"]]
+        rankings[record["job_id"]] = (applicants, record["total"])
+    return rankings
+
+
+# Skills whose holders can score for a job, per mode: the candidates of _APPLICANT_SCORING
+_RANKING_SKILLS = {
+    "expanded": """
+        MATCH (j:Job {id: jid})-[:REQUIRES]->(js:Skill)
+        OPTIONAL MATCH (rs:Skill)-[rel:RELATED_TO|IS_A]-(js)
+        WHERE type(rel) = 'RELATED_TO' OR startNode(rel) = rs
+        WITH collect(DISTINCT js.name) + collect(DISTINCT rs.name) AS names
+    """,
+    "multihop": """
+        MATCH (j:Job {id: jid})-[:REQUIRES]->(js:Skill)
+        OPTIONAL MATCH (rs:Skill)-[sim:SIMILAR_TO]->(js)
+        WHERE sim.hops <= $max_hops
+        WITH collect(DISTINCT js.name) + collect(DISTINCT rs.name) AS names
+    """,
+}
+
+
+def _ranking_skills_chunk(session, job_ids, mode):
+    """{job_id: sorted skill names} a ranking in this mode depends on."""
+    result = session.run(f"""
+        UNWIND $job_ids AS jid
+        CALL {{
+            WITH jid
+            {_RANKING_SKILLS[mode]}
+            RETURN names
+        }}
+        RETURN jid AS job_id, names
+    """, job_ids=job_ids, max_hops=SCORING_MAX_HOPS)
+    return {record["job_id"]: sorted(set(record["names"])) for record in result}
+
+
+def precompute_applicant_rankings(run_id: str, modes=("expanded",), batch_size: int = 50):
+    """
+    Sweeps every job in JD_skills (in _id order, checkpointed in ranking_runs so an
+    interrupted run can be resumed) and upserts one ranking document per job and mode.
+    """
+    runs = db["ranking_runs"]
+    run = runs.find_one({"_id": ObjectId(run_id)})
+    last_id = run.get("last_id")
+    runs.update_one({"_id": run["_id"]}, {"$set": {"status": "running", "updated_at": datetime.now().isoformat()}})
+    t0 = time.time()
+
+    try:
+        with neo4j_driver.session() as session:
+            while True:
+                query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+                ids = [d["_id"] for d in db["JD_skills"].find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+                if not ids:
+                    break
+                job_ids = [str(i) for i in ids]
+                generated_at = datetime.now().isoformat()
+                writes = []
+                for mode in modes:
+                    skills = _ranking_skills_chunk(session, job_ids, mode)
+                    # Read before scoring, so a write landing meanwhile makes the list stale
+                    versions = _ranking_versions(job_ids, skills)
+                    rankings = _rank_applicants_chunk(session, job_ids, mode)
+                    for job_id in job_ids:
+                        applicants, total = rankings.get(job_id, ([], 0))
+                        writes.append(ReplaceOne({"_id": f"{job_id}:{mode}"}, {
+                            "job_id": job_id, "mode": mode, "applicants": applicants,
+                            "total_applicants": total, "truncated": total > len(applicants),
+                            "generated_at": generated_at, "run_id": run_id, "versions": versions[job_id],
+                            "skills": skills.get(job_id, []),
+                        }, upsert=True))
+                db[APPLICANT_RANKINGS_COLLECTION].bulk_write(writes, ordered=False)
+
+                last_id = ids[-1]
+                runs.update_one({"_id": run["_id"]}, {"$inc": {"done": len(ids)}, "$set": {
+                    "last_id": last_id, "updated_at": datetime.now().isoformat()}})
+                print(f"  -> Rankings {run_id}: {len(ids)} jobs ranked ({', '.join(modes)}).")
+    except Exception as e:
+        runs.update_one({"_id": run["_id"]}, {"$set": {"status": "interrupted", "error": str(e),
+                                                        "updated_at": datetime.now().isoformat()}})
+        traceback.print_exc()
+        return
+
+    runs.update_one({"_id": run["_id"]}, {"$set": {"status": "completed", "finished_at": datetime.now().isoformat(),
+                                                    "updated_at": datetime.now().isoformat(),
+                                                    "elapsed_s": round(time.time() - t0, 1)}})
+    print(f"✅ Applicant rankings run {run_id} finished in {time.time() - t0:.1f}s.")
+
+
+def start_ranking_run(modes=("expanded",), run_id: Optional[str] = None):
+    """Creates (or reopens, given run_id) a ranking run record. Returns (run_id, modes)."""
+    if run_id:
+        run = db["ranking_runs"].find_one({"_id": ObjectId(run_id)})
+        if not run:
+            raise ValueError("Ranking run not found")
+        return run_id, tuple(run["modes"])
+    modes = tuple(modes)
+    for mode in modes:
+        if mode not in _APPLICANT_SCORING:
+            raise ValueError(f"Unknown ranking mode '{mode}' (use {', '.join(_APPLICANT_SCORING)})")
+    run_id = str(db["ranking_runs"].insert_one({
+        "modes": list(modes), "status": "queued", "total": db["JD_skills"].count_documents({}),
+        "done": 0, "last_id": None,
+        "started_at": datetime.now().isoformat(), "updated_at": datetime.now().isoformat()
+    }).inserted_id)
+    return run_id, modes
+
+
+def _ranking_versions(job_ids, skills_by_job):
+    """
+    Current cache versions for each job: {job_id: {"job", "ontology", "skills"}}.
+    "skills" sums the counters of the job's ranking skills; counters only grow,
+    so the sum changes whenever any of them is bumped.
+    """
+    skill_keys = {f"skill:{name}" for job_id in job_ids for name in skills_by_job.get(job_id, ())}
+    keys = ["ontology"] + [f"job:{job_id}" for job_id in job_ids] + sorted(skill_keys)
+    found = {doc["_id"]: doc.get("v", 0) for doc in db[CACHE_VERSIONS_COLLECTION].find({"_id": {"$in": keys}})}
+    return {job_id: {"job": found.get(f"job:{job_id}", 0), "ontology": found.get("ontology", 0),
+                     "skills": sum(found.get(f"skill:{name}", 0) for name in skills_by_job.get(job_id, ()))}
+            for job_id in job_ids}
+
+
+def load_precomputed_applicants(job_id: str, mode: str = "expanded"):
+    """
+    The stored ranking for a job, or None if missing, older than
+    RANKINGS_MAX_AGE_HOURS, or computed before the job, the ontology or a
+    resume holding one of the job's ranking skills last changed.
+    """
+    doc = db[APPLICANT_RANKINGS_COLLECTION].find_one({"_id": f"{job_id}:{mode}"})
+    if not doc:
+        return None
+    if datetime.fromisoformat(doc["generated_at"]) < datetime.now() - timedelta(hours=RANKINGS_MAX_AGE_HOURS):
+        return None
+    if doc.get("versions") != _ranking_versions([job_id], {job_id: doc.get("skills") or []})[job_id]:
+        return None
+    return doc
+
 # ---------------------------------------------------------------------------
 # 4️⃣ Authentication (Signup / Login)
 # ---------------------------------------------------------------------------
 
+def resolve_session_username(request: Request, username: Optional[str] = None):
+    """
+    Returns the caller's username, or None if unauthenticated.
+    A valid 'Authorization: Bearer <token>' wins (one HMAC check, no DB or
+    bcrypt); a username that disagrees with the token is rejected. Without a
+    token, the legacy username parameter is accepted unless REQUIRE_SESSION_TOKEN.
+    """
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        claims = security.verify_session_token(auth[7:].strip())
+        if not claims or (username and username != claims["sub"]):
+            return None
+        return claims["sub"]
+    if REQUIRE_SESSION_TOKEN:
+        return None
+    return username
+
+
+def _unauthorized():
+    return JSONResponse(content={"status": "failed", "message": "Invalid or missing session"}, status_code=401)
+
+
+class AdminRequired(Exception):
+    """Raised by require_admin; rendered as a 401 (no valid token) or 403 (not an admin)."""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+def require_admin(request: Request):
+    """
+    Dependency for the bulk/admin jobs (reparse, migrations, GC, rankings,
+    index and closure rebuilds, outbox drain): a verified session token with
+    role 'admin' is required; the legacy username parameter is not accepted.
+    """
+    auth = request.headers.get("authorization", "")
+    claims = security.verify_session_token(auth[7:].strip()) if auth.lower().startswith("bearer ") else None
+    if not claims:
+        raise AdminRequired(401)
+    if claims.get("role") != "admin":
+        raise AdminRequired(403)
+    return claims
+
+
+@app.exception_handler(AdminRequired)
+async def _admin_required_handler(request: Request, exc: AdminRequired):
+    if exc.status_code == 401:
+        return _unauthorized()
+    return JSONResponse(content={"status": "failed", "message": "Admin role required"}, status_code=403)
+
+
 @app.post("/signup/")
-def signup(username: str = Form(...), password: str = Form(...)):
+async def signup(username: str = Form(...), password: str = Form(...)):
+    if username == security.ADMIN_USERNAME:
+        return JSONResponse(content={"status": "failed", "message": "User already exists"}, status_code=400)
     try:
-        existing = db["users"].find_one({"username": username})
+        existing = await run_in_threadpool(db["users"].find_one, {"username": username}, {"_id": 1})
         if existing:
             return JSONResponse(content={"status": "failed", "message": "User already exists"}, status_code=400)
 
-        hashed_pwd = pwd_context.hash(password)
-        db["users"].insert_one({"username": username, "password": hashed_pwd})
+        hashed_pwd = await security.hash_password_async(password)
+        await run_in_threadpool(db["users"].insert_one, {"username": username, "password": hashed_pwd})
         return {"status": "success", "message": "User registered successfully"}
     except Exception as e:
         traceback.print_exc()
@@ -710,77 +2646,223 @@ def signup(username: str = Form(...), password: str = Form(...)):
 
 
 @app.post("/login/")
-def login(username: str = Form(...), password: str = Form(...)):
-    """User login: admin → /extract_jd_skills, others → /parse_resume."""
-    if username == "admin" and password == "admin":
-        return {"status": "success", "role": "admin", "redirect": "/extract_jd_skills"}
+async def login(username: str = Form(...), password: str = Form(...)):
+    """
+    User login: admin → /extract_jd_skills, others → /parse_resume.
+    Verifies bcrypt once (in the process pool) and returns a session token
+    to send as 'Authorization: Bearer <token>' on later requests.
+    """
+    if security.is_admin_login(username, password):
+        return {"status": "success", "role": "admin", "redirect": "/extract_jd_skills",
+                "token": security.create_session_token(username, "admin")}
 
-    user = db["users"].find_one({"username": username})
+    user = await run_in_threadpool(db["users"].find_one, {"username": username}, {"password": 1})
     if not user:
         return JSONResponse(content={"status": "failed", "message": "User not found"}, status_code=401)
 
-    if not pwd_context.verify(password, user["password"]):
+    if not await security.verify_password_async(password, user["password"]):
         return JSONResponse(content={"status": "failed", "message": "Invalid password"}, status_code=401)
 
-    return {"status": "success", "role": "user", "redirect": "/parse_resume"}
+    return {"status": "success", "role": "user", "redirect": "/parse_resume",
+            "token": security.create_session_token(username, "user")}
 
 # ---------------------------------------------------------------------------
 # 5️⃣ Resume Parsing (Gemini + MongoDB + Neo4j)
 # ---------------------------------------------------------------------------
 
-@app.post("/parse_resume/")
-async def parse_resume(file: UploadFile = File(...), username: str = Form(...)):
-    """
-    Using the correct, complex prompt that matches the normalize_parsed_resume function.
-    This will fix the missing name, work experience, and skills.
-    Triggers the robust ontology builder.
-    """
-    try:
-        file_content = await file.read()
+# Approximate token budget for the resume text in the parse prompt (0 = send everything)
+RESUME_PROMPT_TOKEN_BUDGET = int(os.getenv("RESUME_PROMPT_TOKEN_BUDGET", "3000"))
 
-        with fitz.open(stream=file_content, filetype="pdf") as doc:
-            raw_text = "".join(page.get_text() for page in doc)
-            if not raw_text.strip():
-                return JSONResponse(
-                    content={"status": "failed", "error": "No text in PDF"},
-                    status_code=400
-                )
 
-        # Prompt for resume parsing (matches normalize function)
-        prompt = f"""
-Act as an expert resume parser. Analyze the text below and return a structured JSON object.
-The JSON structure should include (but adapt if necessary):
-- "personal_information": {{ "name": "...", "contact_details": {{ "email": "...", "phone": "..." }} }}
-- "summary": "..." (or "career_objective")
-- "skills": {{ "programming_languages": [...], "frameworks": [...], "tools": [...] }} OR a flat list ["Python","SQL",...]
+def _gemini_unavailable_response(message: str):
+    """503 with Retry-After for requests that need Gemini while it is degraded."""
+    retry_after = max(1, round(connections.gemini_breaker.retry_after()) or 5)
+    return JSONResponse(content={"status": "failed", "error": message, "retry_after": retry_after},
+                        status_code=503, headers={"Retry-After": str(retry_after)})
+
+
+def _parse_resume_text_with_gemini(raw_text: str):
+    """
+    Sends extracted resume text to Gemini and normalizes the answer.
+    Returns (raw_parsed_data, parsed_data). Shared by /parse_resume/ and /reparse.
+    Only the cleaned, budgeted text is sent; the full text is still what gets stored.
+    """
+    prompt_text, token_stats = resume_parser.prepare_resume_text_for_prompt(raw_text, RESUME_PROMPT_TOKEN_BUDGET)
+    saved = token_stats["original_tokens"] - token_stats["prompt_tokens"]
+    print(f"🧮 Resume prompt text: ~{token_stats['original_tokens']} -> ~{token_stats['prompt_tokens']} tokens "
+          f"(saved ~{saved}, {saved / max(1, token_stats['original_tokens']):.0%}); "
+          f"kept {token_stats['sections_kept']}, dropped {token_stats['sections_dropped']}"
+          f"{', truncated' if token_stats['truncated'] else ''}")
+
+    # Prompt for resume parsing (shape enforced by RESUME_RESPONSE_SCHEMA)
+    prompt = f"""
+Act as an expert resume parser. Analyze the text below and return one JSON object with exactly these fields:
+- "name", "email", "phone", "location": strings
+- "summary": string (summary or career objective)
+- "skills": flat list of skill names ["Python","SQL",...]
 - "professional_experience": [{{ "title": "...", "company": "...", "dates": "...", "responsibilities": [...] }}]
 - "projects": [{{ "title": "...", "details": [...] }}]
+- "education": [{{ "degree": "...", "institution": "...", "start": "...", "end": "...", "grade": "..." }}]
 
 Resume Text:
 ---
-{raw_text}
+{prompt_text}
 ---
 
-Return only valid JSON. If a field is missing, you may omit it. Make the structure JSON-first so it can be parsed programmatically.
+Return only valid JSON. If a field is missing, use "" for strings and [] for lists.
 """
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            generation_config={"response_mime_type": "application/json"}
-        )
+    model = get_gemini_model("gemini-2.5-flash", generation_config=_json_generation_config(RESUME_RESPONSE_SCHEMA))
 
-        safety_settings = {
-            'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-            'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-            'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-            'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE'
-        }
+    safety_settings = {
+        'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
+        'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
+        'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
+        'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE'
+    }
+
+    response = call_gemini(model, prompt, safety_settings=safety_settings)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        print(f"🧮 Gemini usage: prompt={usage.prompt_token_count} tokens, output={usage.candidates_token_count} tokens")
+
+    # Normalize the parsed data (fast path when the schema was honoured)
+    raw_parsed_data = json.loads(response.text)
+    return raw_parsed_data, normalize_gemini_resume(raw_parsed_data)
+
+
+# --- RESUME STORAGE ---
+# The hot "resumes" collection only holds the normalized fields. Gemini's raw
+# output (parsed_raw, often as large as everything else combined) lives in
+# "resumes_raw" and is referenced by parsed_raw_id; read paths use projections
+# so they never pull it (or legacy embedded copies) into memory.
+RESUMES_RAW_COLLECTION = "resumes_raw"
+RESUME_GRAPH_PROJECTION = {"name": 1, "email": 1, "phone": 1, "summary": 1, "skills": 1, "gridfs_file_id": 1}
+RESUME_REFS_PROJECTION = {"_id": 1, "gridfs_file_id": 1, "parsed_raw_id": 1}
+
+
+def _split_parsed_raw(resume_doc):
+    """Returns (lean_doc, raw_doc or None); lean_doc gets an _id and a parsed_raw_id reference."""
+    lean = dict(resume_doc)
+    lean.setdefault("_id", ObjectId())
+    parsed_raw = lean.pop("parsed_raw", None)
+    if parsed_raw is None:
+        return lean, None
+    raw_id = lean.get("parsed_raw_id") or ObjectId()
+    lean["parsed_raw_id"] = raw_id
+    return lean, {"_id": raw_id, "resume_id": lean["_id"], "parsed_raw": parsed_raw,
+                  "stored_at": datetime.now().isoformat()}
+
+
+def insert_resume_documents(resume_docs):
+    """Inserts normalized resumes with parsed_raw split out. Returns the new resume ObjectIds."""
+    leans, raws = [], []
+    for doc in resume_docs:
+        lean, raw = _split_parsed_raw(doc)
+        leans.append(lean)
+        if raw:
+            raws.append(raw)
+    if raws:
+        db[RESUMES_RAW_COLLECTION].insert_many(raws, ordered=False)
+    if leans:
+        db["resumes"].insert_many(leans)
+        record_text_changes("resumes", [lean["_id"] for lean in leans])
+    return [lean["_id"] for lean in leans]
+
+
+def load_parsed_raw(resume_doc):
+    """Fetches the raw Gemini output for a resume (falls back to a legacy embedded copy)."""
+    if resume_doc.get("parsed_raw_id"):
+        raw = db[RESUMES_RAW_COLLECTION].find_one({"_id": resume_doc["parsed_raw_id"]}, {"parsed_raw": 1})
+        return raw.get("parsed_raw") if raw else None
+    return resume_doc.get("parsed_raw")
+
+
+def delete_resume_documents(resume_doc):
+    """Deletes a resume together with its raw output and stored text (not the GridFS file)."""
+    db["resumes"].delete_one({"_id": resume_doc["_id"]})
+    db["resume_texts"].delete_one({"_id": resume_doc["_id"]})
+    record_text_changes("resumes", [resume_doc["_id"]])
+    unindex_text_document("resumes", resume_doc["_id"])
+    if resume_doc.get("parsed_raw_id"):
+        db[RESUMES_RAW_COLLECTION].delete_one({"_id": resume_doc["parsed_raw_id"]})
+
+
+def migrate_split_parsed_raw(batch_size: int = 500):
+    """
+    One-off migration: moves parsed_raw embedded in existing resumes documents
+    into resumes_raw. Batched and re-runnable (only touches documents that
+    still embed it as an object; a null or malformed parsed_raw is left alone).
+    """
+    moved = 0
+    while True:
+        batch = list(db["resumes"].find({"parsed_raw": {"$type": "object"}}, {"_id": 1, "parsed_raw": 1, "parsed_raw_id": 1})
+                     .limit(batch_size))
+        if not batch:
+            break
+        raws, updates = [], []
+        for doc in batch:
+            lean, raw = _split_parsed_raw(doc)
+            raws.append(ReplaceOne({"_id": raw["_id"]}, raw, upsert=True))
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"parsed_raw_id": raw["_id"]},
+                                                           "$unset": {"parsed_raw": ""}}))
+        # Raw copies are written first, so an interruption never loses data
+        db[RESUMES_RAW_COLLECTION].bulk_write(raws, ordered=False)
+        db["resumes"].bulk_write(updates, ordered=False)
+        moved += len(batch)
+        print(f"  -> Moved parsed_raw out of {moved} resumes so far...")
+    print(f"✅ parsed_raw split migration finished ({moved} resumes).")
+    return {"status": "migration_complete", "resumes_migrated": moved}
+
+
+# Extracted PDF text is kept (zlib-compressed) in its own collection, keyed by
+# resume id, so parsing can be re-run without re-uploads or re-extraction and
+# the hot "resumes" documents stay small.
+def save_resume_text(resume_id, username: str, raw_text: str):
+    data = raw_text.encode("utf-8")
+    db["resume_texts"].replace_one({"_id": ObjectId(resume_id)}, {
+        "_id": ObjectId(resume_id),
+        "username": username,
+        "text_z": Binary(zlib.compress(data, 6)),
+        "text_length": len(data),
+        "sha1": hashlib.sha1(data).hexdigest(),
+        "extracted_at": datetime.now().isoformat()
+    }, upsert=True)
+    record_text_changes("resumes", [resume_id])  # indexed from the parsed fields until now
+
+
+def load_resume_text(resume_id):
+    doc = db["resume_texts"].find_one({"_id": ObjectId(resume_id)}, {"text_z": 1})
+    if not doc:
+        return None
+    return zlib.decompress(doc["text_z"]).decode("utf-8")
 
-        response = model.generate_content(prompt, safety_settings=safety_settings)
 
-        # Normalize the parsed data
-        raw_parsed_data = json.loads(response.text)
-        parsed_data = normalize_parsed_resume(raw_parsed_data)
+@app.post("/parse_resume/")
+def parse_resume(request: Request, file: UploadFile = File(...), username: Optional[str] = Form(None)):
+    """
+    Parses with the schema-constrained prompt (normalized shape, heuristic fallback).
+    Triggers the robust ontology builder.
+    A plain def on purpose: the Gemini calls (timeouts, retry backoff sleeps),
+    the ontology expansion and the graph sync wait all block, so FastAPI runs
+    it in the threadpool instead of on the event loop.
+    """
+    username = resolve_session_username(request, username)
+    if not username:
+        return _unauthorized()
+    try:
+        file_content = file.file.read()
+
+        with fitz.open(stream=file_content, filetype="pdf") as doc:
+            # Pages stay separated so the prompt cleaner can spot per-page headers/footers
+            raw_text = resume_parser.PAGE_SEPARATOR.join(page.get_text() for page in doc)
+            if not raw_text.strip():
+                return JSONResponse(
+                    content={"status": "failed", "error": "No text in PDF"},
+                    status_code=400
+                )
+
+        raw_parsed_data, parsed_data = _parse_resume_text_with_gemini(raw_text)
 
         # Check if normalization failed or essential data is missing
         if parsed_data.get("error") or not parsed_data.get("skills"):
@@ -798,10 +2880,12 @@ Return only valid JSON. If a field is missing, you may omit it. Make the structu
         parsed_data['username'] = username
 
         # Remove any previous resume from this user
-        existing = db["resumes"].find_one({"username": username})
+        existing = db["resumes"].find_one({"username": username}, RESUME_REFS_PROJECTION)
         if existing:
             print(f"Deleting existing resume for user {username} (ID: {existing.get('_id')})")
-            db["resumes"].delete_one({"username": username})
+            old_key = record_graph_change("resume", existing["_id"], op="delete")  # the sync drops its graph node
+            delete_resume_documents(existing)
+            release_graph_changes(old_key)
             try:
                 if existing.get("gridfs_file_id"):
                     print(f"Deleting associated GridFS file: {existing['gridfs_file_id']}")
@@ -810,15 +2894,22 @@ Return only valid JSON. If a field is missing, you may omit it. Make the structu
                  print(f"Warning: Failed to delete old GridFS file {existing.get('gridfs_file_id')}: {gridfs_err}")
 
 
-        # Insert the new parsed resume
-        result = db["resumes"].insert_one(parsed_data)
-        parsed_data['_id'] = str(result.inserted_id)
-        resume_id = str(result.inserted_id)
+        # Insert the new parsed resume (raw Gemini output goes to resumes_raw);
+        # the outbox entry goes first, the graph sync happens in the background
+        parsed_data['_id'] = ObjectId()
+        sync_key = record_graph_change("resume", parsed_data['_id'])
+        resume_id = str(insert_resume_documents([parsed_data])[0])
+        release_graph_changes(sync_key)
+        parsed_data['_id'] = resume_id
         print(f"✅ Successfully inserted new resume for {username} (ID: {resume_id})")
 
+        # Keep the extracted text so /reparse can refresh this resume later
+        try:
+            save_resume_text(resume_id, username, raw_text)
+            index_text_document("resumes", resume_id, raw_text)
+        except Exception as text_err:
+            print(f"Warning: Failed to store extracted text for resume {resume_id}: {text_err}")
 
-        # Push resume to Neo4j (will clear old :HAS and add new)
-        push_resumes_to_neo4j()
 
         # Trigger the ROBUST skill ontology expansion
         try:
@@ -833,11 +2924,17 @@ Return only valid JSON. If a field is missing, you may omit it. Make the structu
             print(f"⚠️ WARNING: Skill ontology expansion failed during trigger: {e}")
             traceback.print_exc(limit=1)
 
-        # Get job recommendations using the expanded logic (default for parse)
+        # Get job recommendations using the expanded logic (default for parse),
+        # once the outbox worker has put the resume into the graph
+        graph_synced = wait_for_graph_sync([sync_key])
         recommendations = recommend_jobs(resume_id, limit=5, mode="expanded")
 
-        return {"status": "success", "data": parsed_data, "recommendations": recommendations}
+        return {"status": "success", "data": parsed_data, "recommendations": recommendations,
+                "graph_sync": "done" if graph_synced else "pending"}
 
+    except GeminiUnavailable as e:
+        print(f"⏸️ /parse_resume unavailable: {e}")
+        return _gemini_unavailable_response("Resume parsing is temporarily unavailable, please try again shortly.")
     except Exception as e:
         print(f"❌ CRITICAL ERROR in /parse_resume: {e}")
         traceback.print_exc()
@@ -849,14 +2946,25 @@ Return only valid JSON. If a field is missing, you may omit it. Make the structu
 
 
 @app.get("/my_resume/")
-def get_my_resume(username: str):
-    """Return saved resume for this username (if any)."""
+def get_my_resume(request: Request, username: Optional[str] = None, include_raw: bool = True):
+    """
+    Return saved resume for this username (if any).
+    include_raw joins the raw Gemini output (the frontend reads e.g. education from it).
+    """
+    username = resolve_session_username(request, username)
+    if not username:
+        return _unauthorized()
     try:
-        doc = db["resumes"].find_one({"username": username})
+        # Legacy documents still embed parsed_raw; only pull it when asked for
+        doc = db["resumes"].find_one({"username": username}, None if include_raw else {"parsed_raw": 0})
         if not doc:
             return {"found": False}
         doc_copy = dict(doc)
         doc_copy["_id"] = str(doc.get("_id"))
+        if doc_copy.get("parsed_raw_id"):
+            doc_copy["parsed_raw_id"] = str(doc_copy["parsed_raw_id"])
+            if include_raw:
+                doc_copy["parsed_raw"] = load_parsed_raw(doc)
         # Ensure 'skills' is always a list for consistency
         if 'skills' not in doc_copy or not isinstance(doc_copy['skills'], list):
             # Attempt to re-normalize if needed (might indicate old data format)
@@ -869,18 +2977,23 @@ def get_my_resume(username: str):
 
 
 @app.delete("/my_resume/")
-def delete_my_resume(username: str):
+def delete_my_resume(request: Request, username: Optional[str] = None):
     """Delete saved resume and GridFS file for a username."""
+    username = resolve_session_username(request, username)
+    if not username:
+        return _unauthorized()
     try:
-        doc = db["resumes"].find_one({"username": username})
+        doc = db["resumes"].find_one({"username": username}, RESUME_REFS_PROJECTION)
         if not doc:
             return {"status": "failed", "message": "No resume found"}
 
         resume_id = str(doc.get("_id")) # Get ID for Neo4j deletion
 
-        # Delete from MongoDB
+        # Delete from MongoDB; the outbox worker then removes the graph node
         print(f"Deleting MongoDB resume for user {username} (ID: {resume_id})")
-        db["resumes"].delete_one({"_id": doc["_id"]})
+        sync_key = record_graph_change("resume", resume_id, op="delete")
+        delete_resume_documents(doc)
+        release_graph_changes(sync_key)
 
         # Delete GridFS file
         try:
@@ -890,23 +3003,178 @@ def delete_my_resume(username: str):
         except Exception as gridfs_err:
              print(f"Warning: Failed to delete GridFS file {doc.get('gridfs_file_id')}: {gridfs_err}")
 
+        return {"status": "success", "message": "Resume deleted"}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
 
-        # Delete Resume node and its relationships from Neo4j
-        try:
-            print(f"Deleting Neo4j node and relationships for resume ID: {resume_id}")
-            with neo4j_driver.session() as session:
-                 session.run("MATCH (r:Resume {id: $resume_id}) DETACH DELETE r", resume_id=resume_id)
-            print(f"✅ Neo4j node deleted for resume ID: {resume_id}")
-            # No need to call push_resumes_to_neo4j() anymore
-        except Exception as neo_err:
-            print(f"⚠️ WARNING: Failed to delete Neo4j node for resume {resume_id}: {neo_err}")
-            traceback.print_exc(limit=1)
+# --- REPARSE JOB ---
+# Re-runs parsing over stored data without touching GridFS or the PDFs:
+# - 'gemini':    stored extracted text -> Gemini -> normalize_gemini_resume
+# - 'normalize': stored parsed_raw -> normalize_gemini_resume (no LLM cost)
+# Progress is checkpointed by last processed _id in the "reparse_jobs" collection.
 
-        return {"status": "success", "message": "Resume deleted"}
+def _reparse_one(resume_doc, mode: str):
+    """Returns (parsed_data, error) for one resume document."""
+    try:
+        if mode == "normalize":
+            raw_parsed_data = load_parsed_raw(resume_doc)
+            if not isinstance(raw_parsed_data, dict):
+                return None, "no_parsed_raw"
+            parsed_data = normalize_gemini_resume(raw_parsed_data, record_stats=False)
+        else:
+            raw_text = load_resume_text(resume_doc["_id"])
+            if raw_text is None:
+                return None, "no_stored_text"
+            _, parsed_data = _parse_resume_text_with_gemini(raw_text)
+        if parsed_data.get("error"):
+            return None, parsed_data["error"]
+        return parsed_data, None
+    except Exception as e:
+        print(f"      - ❌ Reparse error for resume {resume_doc.get('_id')}: {type(e).__name__} - {e}")
+        return None, type(e).__name__
+
+
+def run_reparse_job(job_id: str, mode: str = "gemini", concurrency: int = 4, batch_size: int = 50,
+                    username: Optional[str] = None, expand_ontology: bool = True):
+    jobs = db["reparse_jobs"]
+    job = jobs.find_one({"_id": ObjectId(job_id)})
+    query = {"username": username} if username else {}
+    # Only resumes whose text was stored can be re-parsed from text
+    source = db["resume_texts"] if mode == "gemini" else db["resumes"]
+
+    last_id = job.get("last_id")
+    jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "running", "updated_at": datetime.now().isoformat()}})
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                batch_query = dict(query)
+                if last_id is not None:
+                    batch_query["_id"] = {"$gt": last_id}
+                ids = [d["_id"] for d in source.find(batch_query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+                if not ids:
+                    break
+                projection = {**RESUME_GRAPH_PROJECTION, "parsed_raw_id": 1}
+                if mode == "normalize":
+                    projection["parsed_raw"] = 1 # legacy documents not yet migrated
+                batch = list(db["resumes"].find({"_id": {"$in": ids}}, projection))
+
+                results = list(pool.map(lambda doc: _reparse_one(doc, mode), batch))
+
+                updates, raw_updates, updated_docs, errors, new_skills = [], [], [], {}, set()
+                for doc, (parsed_data, error) in zip(batch, results):
+                    if error:
+                        errors[error] = errors.get(error, 0) + 1
+                        continue
+                    # username, gridfs_file_id and _id are not part of the parse output and stay as-is
+                    lean, raw = _split_parsed_raw({**parsed_data, "_id": doc["_id"], "parsed_raw_id": doc.get("parsed_raw_id")})
+                    if raw:
+                        raw_updates.append(ReplaceOne({"_id": raw["_id"]}, raw, upsert=True))
+                    lean.pop("_id")
+                    if not raw:
+                        lean.pop("parsed_raw_id", None)
+                    updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": lean, "$unset": {"parsed_raw": ""}}))
+                    updated_docs.append({**doc, **lean})
+                    new_skills.update(parsed_data.get("skills", []))
+
+                if raw_updates:
+                    db[RESUMES_RAW_COLLECTION].bulk_write(raw_updates, ordered=False)
+                if updates:
+                    db["resumes"].bulk_write(updates, ordered=False)
+                    bulk_push_resumes_to_neo4j(updated_docs)
+                    record_text_changes("resumes", [doc["_id"] for doc in updated_docs])
+                if expand_ontology and new_skills:
+                    try:
+                        expand_skill_ontology_with_gemini(sorted(new_skills))
+                    except Exception as e:
+                        print(f"⚠️ WARNING: Skill ontology expansion failed during reparse: {e}")
+
+                last_id = ids[-1]
+                inc = {"done": len(ids), "updated": len(updates), "failed": len(ids) - len(updates)}
+                inc.update({f"errors.{k}": v for k, v in errors.items()})
+                jobs.update_one({"_id": job["_id"]}, {"$inc": inc, "$set": {
+                    "last_id": last_id, "updated_at": datetime.now().isoformat()}})
+                print(f"  -> Reparse {job_id}: {len(updates)}/{len(ids)} resumes updated in this batch.")
+    except Exception as e:
+        jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "interrupted", "error": str(e),
+                                                        "updated_at": datetime.now().isoformat()}})
+        traceback.print_exc()
+        return
+
+    save_text_indexes()
+    jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "completed", "finished_at": datetime.now().isoformat(),
+                                                    "updated_at": datetime.now().isoformat()}})
+    print(f"✅ Reparse job {job_id} finished.")
+
+
+@app.post("/reparse", dependencies=[Depends(require_admin)])
+def api_reparse(background_tasks: BackgroundTasks, mode: str = "gemini", concurrency: int = 4,
+                batch_size: int = 50, username: Optional[str] = None, expand_ontology: bool = True,
+                job_id: Optional[str] = None):
+    """
+    Admin job: re-parses stored resumes in concurrent batches without
+    re-extracting PDFs. Pass job_id to resume an interrupted job.
+    """
+    if mode not in ("gemini", "normalize"):
+        return JSONResponse(content={"status": "failed", "error": "mode must be 'gemini' or 'normalize'"}, status_code=400)
+    try:
+        if job_id:
+            job = db["reparse_jobs"].find_one({"_id": ObjectId(job_id)})
+            if not job:
+                return JSONResponse(content={"status": "failed", "error": "Reparse job not found"}, status_code=404)
+            mode, username = job["mode"], job.get("username")
+        else:
+            count_query = {"username": username} if username else {}
+            total = db["resume_texts" if mode == "gemini" else "resumes"].count_documents(count_query)
+            job_id = str(db["reparse_jobs"].insert_one({
+                "mode": mode, "username": username, "status": "queued", "total": total,
+                "done": 0, "updated": 0, "failed": 0, "last_id": None,
+                "started_at": datetime.now().isoformat(), "updated_at": datetime.now().isoformat()
+            }).inserted_id)
+
+        background_tasks.add_task(run_reparse_job, job_id, mode, concurrency, batch_size, username, expand_ontology)
+        return {"status": "success", "job_id": job_id, "status_url": f"/reparse/status?job_id={job_id}"}
     except Exception as e:
         traceback.print_exc()
         return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
 
+
+@app.post("/migrations/split_parsed_raw", dependencies=[Depends(require_admin)])
+def api_migrate_split_parsed_raw(batch_size: int = 500):
+    """One-off migration: moves embedded parsed_raw out of the resumes collection."""
+    try:
+        result = migrate_split_parsed_raw(batch_size)
+        return {"status": "success", "result": result}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
+
+
+@app.get("/reparse/status")
+def api_reparse_status(job_id: Optional[str] = None):
+    """Progress of the given (or latest) reparse job."""
+    query = {"_id": ObjectId(job_id)} if job_id else {}
+    job = db["reparse_jobs"].find_one(query, sort=[("started_at", -1)])
+    if not job:
+        return JSONResponse(content={"status": "failed", "error": "No reparse jobs found"}, status_code=404)
+    job["_id"] = str(job["_id"])
+    job["last_id"] = str(job["last_id"]) if job.get("last_id") else None
+    job["progress"] = round(job["done"] / job["total"], 4) if job.get("total") else 1.0
+    return {"status": "success", "job": job}
+
+
+@app.get("/gemini/stats")
+def api_gemini_stats():
+    """Circuit breaker state and call/retry/timeout counters for Gemini (this worker, since start)."""
+    return {"status": "success", "result": connections.get_gemini_stats()}
+
+
+@app.get("/parsing/schema_stats")
+def api_schema_stats():
+    """Schema hits vs. heuristic fallbacks for resume and JD parsing (this worker, since start)."""
+    return {"status": "success", "schema_enabled": GEMINI_RESPONSE_SCHEMA, "result": get_schema_stats()}
+
 # ---------------------------------------------------------------------------
 # 6️⃣ Job Description Skill Extraction (Gemini + MongoDB + Neo4j)
 # ---------------------------------------------------------------------------
@@ -920,43 +3188,40 @@ You are an expert career analyst. Extract all technical and soft skills from the
 Output JSON: {{ "skills": [ "Python", "SQL", ... ] }}
 """
     try:
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            generation_config={"response_mime_type": "application/json"}
-        )
-        response = model.generate_content(prompt)
+        model = get_gemini_model("gemini-2.5-flash", generation_config=_json_generation_config(JD_RESPONSE_SCHEMA))
+        response = call_gemini(model, prompt)
         text = response.text.strip().replace("```json", "").replace("```", "")
         data = json.loads(text)
 
-        # Normalize skills
-        skills_raw = data.get("skills", [])
-        seen = set()
-        clean_skills = []
-        for s in skills_raw:
-            s_normalized = s.strip().capitalize()
-            # Avoid empty strings
-            if not s_normalized:
-                continue
-            key = s_normalized.lower()
-            if key not in seen and s_normalized:
-                seen.add(key)
-                clean_skills.append(s_normalized)
-        return clean_skills
-
+        # Fast path: schema-shaped answer; otherwise salvage what we can
+        if _is_str_list(data.get("skills") if isinstance(data, dict) else None):
+            _record_schema_result("jd", None)
+            return _clean_skill_list(data["skills"])
+        _record_schema_result("jd", "skills_not_string_list")
+        skills_raw = data.get("skills", []) if isinstance(data, dict) else data
+        if not isinstance(skills_raw, list):
+            skills_raw = [skills_raw]
+        return _clean_skill_list([
+            s.get("name") or s.get("skill") or "" if isinstance(s, dict) else str(s) for s in skills_raw if s
+        ])
+
+    except GeminiUnavailable:
+        raise
     except Exception as e:
         traceback.print_exc()
         return {"error": str(e)}
 
 
 @app.post("/extract_jd_skills/")
-async def extract_jd_skills(
+def extract_jd_skills(
     job_description: str = Form(...),
     job_title: str = Form(...),
     company_portal_link: str = Form(...)
 ):
     """
-    Recruiter posts JD -> extract skills -> save -> sync Neo4j ->
+    Recruiter posts JD -> extract skills -> save (+ graph outbox entry) ->
     TRIGGER ROBUST ONTOLOGY EXPANSION -> return EXPANDED eligible applicants
+    A plain def (threadpool) for the same reason as /parse_resume/.
     """
     try:
         # Extract key skills using Gemini
@@ -972,15 +3237,16 @@ async def extract_jd_skills(
             "skills": skills
         }
 
-        # Save to MongoDB
+        # Save to MongoDB; the outbox entry goes first, the graph sync happens in the background
+        doc["_id"] = ObjectId()
+        sync_key = record_graph_change("job", doc["_id"])
         result = db["JD_skills"].insert_one(doc)
+        release_graph_changes(sync_key)
+        record_text_changes("jobs", [result.inserted_id])
         job_id = str(result.inserted_id)
         doc["_id"] = job_id
-
-        # Sync to Neo4j
-        push_jobs_to_neo4j() # Call helper to handle sync logic
-
-        print(f"✅ JD pushed to Neo4j: {job_title}")
+        index_text_document("jobs", job_id, _job_index_text(doc), tags=skills)
+        print(f"✅ JD saved, graph sync queued: {job_title}")
 
         # Trigger the ROBUST skill ontology expansion
         try:
@@ -993,7 +3259,8 @@ async def extract_jd_skills(
             print(f"⚠️ WARNING: Skill ontology expansion failed during trigger: {e}")
             traceback.print_exc(limit=1)
 
-        # Find eligible applicants based on expanded skills
+        # Find eligible applicants based on expanded skills, once the job is in the graph
+        graph_synced = wait_for_graph_sync([sync_key])
         applicants = eligible_applicants(job_id)
 
         # Return complete JD info and matched applicants
@@ -1006,9 +3273,13 @@ async def extract_jd_skills(
                 "job_description": job_description.strip(),
                 "skills": skills
             },
-            "applicants": applicants
+            "applicants": applicants,
+            "graph_sync": "done" if graph_synced else "pending"
         }
 
+    except GeminiUnavailable as e:
+        print(f"⏸️ /extract_jd_skills unavailable: {e}")
+        return _gemini_unavailable_response("Skill extraction is temporarily unavailable, please try again shortly.")
     except Exception as e:
         print(f"❌ CRITICAL ERROR in /extract_jd_skills: {e}")
         traceback.print_exc()
@@ -1023,30 +3294,266 @@ async def extract_jd_skills(
 # 7️⃣ Public Endpoints for Frontend (Now using expanded matching)
 # ---------------------------------------------------------------------------
 
+def _invalid_recommend_mode():
+    return JSONResponse(content={"status": "failed", "error": f"mode must be one of {', '.join(RECOMMEND_MODES)}"},
+                        status_code=400)
+
+
 @app.get("/recommend_jobs/")
-def get_recommendations(resume_id: str, mode: str = "expanded"):
+def get_recommendations(resume_id: str, mode: str = "expanded", limit: int = 5, max_hops: Optional[int] = None,
+                        hop_decay: Optional[float] = None, use_confidence: bool = True,
+                        text_blend: Optional[float] = None):
     """
     MODIFIED: Gets recommendations using the specified scoring 'mode'.
-    'expanded' (default) or 'direct'
+    'expanded' (default), 'direct', 'multihop' (max_hops/hop_decay/use_confidence apply)
+    or 'text' (BM25; text_blend in 0..1 mixes in the graph score).
+    Served from the versioned recommendation cache when nothing relevant changed.
     """
-    recs = recommend_jobs(resume_id, mode=mode)
-    return {"recommendations": recs}
+    if mode not in RECOMMEND_MODES:
+        return _invalid_recommend_mode()
+    recs, cache_status = cached_recommend_jobs(resume_id, limit=limit, mode=mode, max_hops=max_hops,
+                                               hop_decay=hop_decay, use_confidence=use_confidence,
+                                               text_blend=text_blend)
+    return {"recommendations": recs, "cache": cache_status}
+
+
+@app.get("/recommend_jobs/cache_stats")
+def api_recommend_cache_stats():
+    """Hit/miss/stale counts and size of this worker's recommendation cache."""
+    return {"status": "success", "result": get_recommend_cache_stats()}
+
+
+class BatchRecommendRequest(BaseModel):
+    resume_ids: List[str]
+    mode: str = "expanded"
+    limit: int = 5
+    max_hops: Optional[int] = None
+    hop_decay: Optional[float] = None
+    use_confidence: bool = True
+
+
+@app.post("/recommend_jobs/batch")
+def get_batch_recommendations(body: BatchRecommendRequest):
+    """
+    Top-k jobs for many resumes at once (recruiter dashboards). Streams
+    newline-delimited JSON, one {"resume_id", "recommendations", "cache"} line
+    per resume, as soon as its chunk is scored.
+    """
+    if not body.resume_ids:
+        return JSONResponse(content={"status": "failed", "error": "resume_ids is empty"}, status_code=400)
+    if body.mode not in RECOMMEND_MODES:
+        return _invalid_recommend_mode()
+    if len(body.resume_ids) > BATCH_RECOMMEND_MAX_IDS:
+        return JSONResponse(content={"status": "failed",
+                                     "error": f"At most {BATCH_RECOMMEND_MAX_IDS} resume_ids per request"},
+                            status_code=400)
+
+    def stream():
+        try:
+            for resume_id, recommendations, cache_status in iter_batch_recommendations(
+                    body.resume_ids, limit=body.limit, mode=body.mode, max_hops=body.max_hops,
+                    hop_decay=body.hop_decay, use_confidence=body.use_confidence):
+                yield json.dumps({"resume_id": resume_id, "recommendations": recommendations,
+                                  "cache": cache_status}) + "\n"
+        except Exception as e:
+            # Headers are already sent; report the failure as the last line
+            traceback.print_exc()
+            yield json.dumps({"status": "failed", "error": str(e)}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/jobs/search")
+def api_search_jobs(q: str = "", skills: str = "", page: int = 1, page_size: int = 20):
+    """
+    Keyword search over job postings. q is tokenized and every term must match;
+    skills is a comma-separated filter (all required). Ranked by relevance, or
+    newest first without q; a q of only stopwords matches nothing. Paginated
+    with page (1-based) and page_size.
+    """
+    if page < 1 or not 1 <= page_size <= JOB_SEARCH_MAX_PAGE_SIZE:
+        return JSONResponse(content={"status": "failed",
+                                     "error": f"page must be >= 1 and page_size 1..{JOB_SEARCH_MAX_PAGE_SIZE}"},
+                            status_code=400)
+    skill_filter = [skill.strip() for skill in skills.split(",") if skill.strip()]
+    try:
+        start = time.perf_counter()
+        total, hits = search_jobs(q, skill_filter, page, page_size)
+        search_ms = (time.perf_counter() - start) * 1000
+        job_docs = _job_docs_by_id([job_id for job_id, _ in hits])
+        results = []
+        for job_id, score in hits:
+            job_doc = job_docs.get(job_id)
+            if not job_doc:
+                unindex_text_document("jobs", job_id)  # deleted since it was indexed
+                continue
+            results.append({
+                "job_id": job_id,
+                "job_title": job_doc.get("job_title", ""),
+                "company_portal_link": job_doc.get("company_portal_link", ""),
+                "skills": job_doc.get("skills", []),
+                "score": round(score, 4) if score is not None else None,
+            })
+        return {"status": "success", "query": q, "skills": skill_filter, "page": page, "page_size": page_size,
+                "total": total, "results": results, "search_ms": round(search_ms, 2)}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
 
 
 @app.get("/eligible_applicants/")
-def get_eligible_applicants(job_id: str):
-    """Gets applicants using the MODIFIED expanded/weighted logic."""
-    applicants = eligible_applicants(job_id)
-    return {"applicants": applicants}
+def get_eligible_applicants(job_id: str, mode: str = "expanded", max_hops: Optional[int] = None,
+                            hop_decay: Optional[float] = None, use_confidence: bool = True, live: bool = False,
+                            text_blend: Optional[float] = None):
+    """
+    Gets applicants using the MODIFIED expanded/weighted logic, 'multihop', or
+    'text' (BM25; text_blend in 0..1 mixes in the graph score).
+    Served from the precomputed rankings when available (default scoring
+    parameters only); live=true forces a recompute.
+    """
+    if not live and max_hops is None and hop_decay is None and use_confidence and mode in _APPLICANT_SCORING:
+        doc = load_precomputed_applicants(job_id, mode)
+        if doc:
+            return {"applicants": doc["applicants"], "source": "precomputed", "generated_at": doc["generated_at"],
+                    "truncated": doc.get("truncated", False)}
+    applicants = eligible_applicants(job_id, mode=mode, max_hops=max_hops, hop_decay=hop_decay,
+                                     use_confidence=use_confidence, text_blend=text_blend)
+    return {"applicants": applicants, "source": "live", "generated_at": datetime.now().isoformat()}
+
+
+@app.post("/rankings/precompute", dependencies=[Depends(require_admin)])
+def api_precompute_rankings(background_tasks: BackgroundTasks, modes: str = "expanded", batch_size: int = 50,
+                            run_id: Optional[str] = None):
+    """
+    Admin job: ranks applicants for every job and stores the lists (normally run
+    nightly by precompute_rankings.py). modes is comma-separated (expanded, multihop);
+    pass run_id to resume an interrupted run.
+    """
+    try:
+        run_id, mode_list = start_ranking_run([m.strip() for m in modes.split(",") if m.strip()], run_id)
+    except ValueError as e:
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=400)
+    background_tasks.add_task(precompute_applicant_rankings, run_id, mode_list, batch_size)
+    return {"status": "success", "run_id": run_id, "status_url": f"/rankings/status?run_id={run_id}"}
+
+
+@app.get("/rankings/status")
+def api_rankings_status(run_id: Optional[str] = None):
+    """Progress of the given (or latest) applicant ranking run."""
+    query = {"_id": ObjectId(run_id)} if run_id else {}
+    run = db["ranking_runs"].find_one(query, sort=[("started_at", -1)])
+    if not run:
+        return JSONResponse(content={"status": "failed", "error": "No ranking runs found"}, status_code=404)
+    run["_id"] = str(run["_id"])
+    run["last_id"] = str(run["last_id"]) if run.get("last_id") else None
+    run["progress"] = round(run["done"] / run["total"], 4) if run.get("total") else 1.0
+    return {"status": "success", "run": run}
+
+
+# GridFS files are immutable (a re-upload gets a new file id), so clients may
+# cache them; validators let them revalidate cheaply with 304s.
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+DOWNLOAD_CACHE_MAX_AGE = int(os.getenv("DOWNLOAD_CACHE_MAX_AGE", "86400"))
+
+
+def _gridfs_etag(gridfs_file):
+    # md5 is only stored by older drivers; fall back to id + length, which is
+    # just as unique for immutable files.
+    md5 = getattr(gridfs_file, "md5", None)
+    return f'"{md5}"' if md5 else f'"{gridfs_file._id}-{gridfs_file.length}"'
+
+
+def _parse_range_header(range_header: str, length: int):
+    """
+    Parses a single 'bytes=' range into an inclusive (start, end).
+    Returns None when the header should be ignored (malformed or multi-range,
+    which we answer with the full file) and 'unsatisfiable' for a 416.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_s, _, end_s = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_s == "":
+            # Suffix range: the last N bytes (none to give from an empty file)
+            suffix = int(end_s)
+            if suffix <= 0 or length == 0:
+                return "unsatisfiable"
+            return max(length - suffix, 0), length - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else length - 1
+    except ValueError:
+        return None
+    if start > end:
+        # An open 'bytes=N-' only ends before N when N >= length (always, for an empty file)
+        return "unsatisfiable" if not end_s else None
+    if start >= length:
+        return "unsatisfiable"
+    return start, min(end, length - 1)
+
+
+def _iter_gridfs(gridfs_file, start: int, end: int, chunk_size: int):
+    """Yields bytes start..end (inclusive), seeking so only the needed GridFS chunks are read."""
+    gridfs_file.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        data = gridfs_file.read(min(chunk_size, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        yield data
 
 
 @app.get("/download_resume/{file_id}")
-def download_resume(file_id: str):
-    """Retrieves a resume from GridFS and streams it for download."""
+def download_resume(file_id: str, request: Request):
+    """
+    Retrieves a resume from GridFS and streams it for download.
+    Supports single byte ranges (206) and ETag / Last-Modified revalidation (304).
+    """
     try:
         gridfs_file = fs.get(ObjectId(file_id))
-        return StreamingResponse(gridfs_file, media_type='application/pdf',
-                                 headers={"Content-Disposition": f"attachment; filename=\"{gridfs_file.filename}\""})
+        etag = _gridfs_etag(gridfs_file)
+        upload_date = gridfs_file.upload_date.replace(tzinfo=timezone.utc, microsecond=0)
+        headers = {
+            "Content-Disposition": f"attachment; filename=\"{gridfs_file.filename}\"",
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "Last-Modified": format_datetime(upload_date, usegmt=True),
+            "Cache-Control": f"private, max-age={DOWNLOAD_CACHE_MAX_AGE}",
+        }
+
+        # Conditional GET: If-None-Match wins over If-Modified-Since (RFC 9110)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            if if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]:
+                return Response(status_code=304, headers=headers)
+        elif request.headers.get("if-modified-since"):
+            try:
+                if upload_date <= parsedate_to_datetime(request.headers["if-modified-since"]):
+                    return Response(status_code=304, headers=headers)
+            except (TypeError, ValueError):
+                pass
+
+        length = gridfs_file.length
+        byte_range = _parse_range_header(request.headers.get("range"), length)
+
+        # If-Range: only honour the range if the client's copy is still current
+        if_range = request.headers.get("if-range")
+        if byte_range and if_range and if_range.strip() not in (etag, headers["Last-Modified"]):
+            byte_range = None
+
+        if byte_range == "unsatisfiable":
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{length}"})
+
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(_iter_gridfs(gridfs_file, start, end, DOWNLOAD_CHUNK_SIZE), status_code=206,
+                                     media_type='application/pdf', headers=headers)
+
+        headers["Content-Length"] = str(length)
+        return StreamingResponse(_iter_gridfs(gridfs_file, 0, length - 1, DOWNLOAD_CHUNK_SIZE),
+                                 media_type='application/pdf', headers=headers)
     except gridfs.errors.NoFile:
         return JSONResponse(content={"error": "File not found"}, status_code=404)
     except Exception as e:
@@ -1060,7 +3567,57 @@ def download_resume(file_id: str):
 class SkillList(BaseModel):
     skills: List[str]
 
-@app.post("/ontology/expand")
+@app.post("/text_index/rebuild", dependencies=[Depends(require_admin)])
+def api_rebuild_text_index(kind: str = "all"):
+    """Rebuilds the BM25 index for 'jobs', 'resumes' or 'all' from MongoDB on this worker and saves it."""
+    kinds = list(_TEXT_SOURCES) if kind == "all" else [kind]
+    if any(k not in _TEXT_SOURCES for k in kinds):
+        return JSONResponse(content={"status": "failed", "error": "kind must be 'jobs', 'resumes' or 'all'"},
+                            status_code=400)
+    try:
+        return {"status": "success", "result": [rebuild_text_index(k) for k in kinds]}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
+
+
+@app.get("/text_index/status")
+def api_text_index_status():
+    """Size and sync checkpoint of this worker's BM25 indexes (not loaded = not used yet)."""
+    return {"status": "success", "result": {
+        kind: {**index.stats(), "checkpoint": index.checkpoint} if index else None
+        for kind, index in ((kind, _text_indexes.get(kind)) for kind in _TEXT_SOURCES)
+    }}
+
+
+@app.get("/graph/snapshot/status")
+def api_graph_snapshot_status():
+    """The graph snapshot this worker has memory-mapped (GRAPH_SNAPSHOT_PATH), or null."""
+    snapshot = get_mapped_graph_snapshot()
+    return {"status": "success", "result": {**snapshot.stats(), "meta": snapshot.meta} if snapshot else None}
+
+
+@app.get("/graph/outbox/status")
+def api_graph_outbox_status():
+    """Backlog of Mongo changes not yet applied to the graph, and this worker's sync counters."""
+    try:
+        return {"status": "success", "result": get_graph_outbox_status()}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
+
+
+@app.post("/graph/outbox/drain", dependencies=[Depends(require_admin)])
+def api_drain_graph_outbox(batch_size: Optional[int] = None):
+    """Applies all due outbox entries now instead of waiting for the background worker."""
+    try:
+        return {"status": "success", "result": {"synced": drain_graph_outbox(batch_size=batch_size)}}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
+
+
+@app.post("/ontology/expand", dependencies=[Depends(require_admin)])
 def api_expand_ontology(skill_list: SkillList):
     """
     Manual endpoint to trigger ontology expansion for a given list of skills.
@@ -1083,18 +3640,108 @@ def api_expand_ontology(skill_list: SkillList):
         traceback.print_exc()
         return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
 
-@app.post("/ontology/rebuild")
-def api_rebuild_ontology():
+@app.post("/ontology/rebuild", dependencies=[Depends(require_admin)])
+def api_rebuild_ontology(background_tasks: BackgroundTasks, mode: str = "full", ttl_hours: float = 24 * 7,
+                         workers: int = Query(4, ge=1, le=ONTOLOGY_REBUILD_MAX_WORKERS),
+                         batch_size: int = Query(20, ge=1, le=ONTOLOGY_REBUILD_MAX_BATCH_SIZE),
+                         resume: bool = True, background: bool = True):
+    """
+    Manual endpoint to trigger a rebuild of the skill ontology.
+    'full' reprocesses every skill, 'stale' only those older than ttl_hours or
+    marked failed. Runs in the background by default; poll /ontology/rebuild/status.
+    """
+    if mode not in ("full", "stale"):
+        return JSONResponse(content={"status": "failed", "error": "mode must be 'full' or 'stale'"}, status_code=400)
+    try:
+        if not background:
+            result = rebuild_ontology(mode, ttl_hours, workers, batch_size, resume)
+            return {"status": "success", "result": result}
+
+        latest = get_ontology_rebuild_status()
+        if latest and latest["status"] == "running":
+            heartbeat = datetime.fromisoformat(latest.get("updated_at") or latest["started_at"])
+            if (datetime.now() - heartbeat).total_seconds() < ONTOLOGY_REBUILD_STALE_AFTER_SECONDS:
+                return {"status": "success", "result": {"status": "already_running", "rebuild": latest}}
+
+        background_tasks.add_task(rebuild_ontology, mode, ttl_hours, workers, batch_size, resume)
+        return {"status": "success", "result": {"status": "rebuild_scheduled", "status_url": "/ontology/rebuild/status"}}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
+
+
+@app.post("/ontology/migrations/collapse_mirrored", dependencies=[Depends(require_admin)])
+def api_collapse_mirrored_relations(batch_size: int = 1000):
+    """
+    One-off migration: collapses mirrored RELATED_TO/IS_A pairs written by older
+    versions into single edges. Safe to run more than once.
+    """
+    try:
+        result = collapse_mirrored_relations(batch_size)
+        return {"status": "success", "result": result}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
+
+
+@app.post("/ontology/gc", dependencies=[Depends(require_admin)])
+def api_garbage_collect_skills(background_tasks: BackgroundTasks, batch_size: int = 200, pause_seconds: float = 0.1,
+                               keep_hubs_min_degree: int = 5, max_batches: Optional[int] = None,
+                               dry_run: bool = False, background: bool = True):
     """
-    Manual endpoint to trigger a full rebuild of the skill ontology.
+    Deletes Skill nodes no resume or job references (keep_hubs_min_degree=0 also
+    deletes ontology hubs). dry_run only counts. Poll /ontology/gc/status.
     """
+    if GRAPH_STORE == "memory":
+        return JSONResponse(content={"status": "failed", "error": "Skill GC works on Neo4j only (GRAPH_STORE=memory)"},
+                            status_code=409)
+    try:
+        if dry_run or not background:
+            result = garbage_collect_orphan_skills(batch_size, pause_seconds, keep_hubs_min_degree, max_batches, dry_run)
+            return {"status": "success", "result": result}
+        background_tasks.add_task(garbage_collect_orphan_skills, batch_size, pause_seconds, keep_hubs_min_degree,
+                                  max_batches, dry_run)
+        return {"status": "success", "result": {"status": "gc_scheduled", "status_url": "/ontology/gc/status"}}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
+
+
+@app.get("/ontology/gc/status")
+def api_skill_gc_status():
+    """Report of the latest (or running) orphan skill GC."""
+    report = db["ontology_meta"].find_one({"_id": "skill_gc"})
+    if not report:
+        return JSONResponse(content={"status": "failed", "error": "Skill GC has not run yet"}, status_code=404)
+    report.pop("_id")
+    return {"status": "success", "result": report}
+
+
+@app.post("/ontology/similarity/refresh", dependencies=[Depends(require_admin)])
+def api_refresh_similarity_closure(max_hops: Optional[int] = None, top_k: Optional[int] = None):
+    """Recomputes the full skill-similarity closure used by 'multihop' scoring."""
     try:
-        result = rebuild_ontology()
+        result = refresh_skill_similarity_closure(max_hops=max_hops, top_k=top_k)
         return {"status": "success", "result": result}
     except Exception as e:
         traceback.print_exc()
         return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
 
+
+@app.get("/ontology/rebuild/status")
+def api_rebuild_ontology_status(rebuild_id: Optional[str] = None):
+    """Progress and ETA of the given (or latest) ontology rebuild run."""
+    if rebuild_id and not ObjectId.is_valid(rebuild_id):
+        return JSONResponse(content={"status": "failed", "error": "Invalid rebuild_id"}, status_code=400)
+    try:
+        status = get_ontology_rebuild_status(rebuild_id)
+        if not status:
+            return JSONResponse(content={"status": "failed", "error": "No rebuild runs found"}, status_code=404)
+        return {"status": "success", "rebuild": status}
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"status": "failed", "error": str(e)}, status_code=500)
+
 @app.get("/explain_match/")
 def explain_match(resume_id: str, job_id: str):
     """
@@ -1102,75 +3749,45 @@ def explain_match(resume_id: str, job_id: str):
     (This query is correct and will work once the ontology is built)
     """
     try:
-        with neo4j_driver.session() as session:
-            result = session.run("""
-                MATCH (r:Resume {id: $resume_id})-[:HAS]->(rs:Skill)
-                MATCH (j:Job {id: $job_id})-[:REQUIRES]->(js:Skill)
-
-                // Find all paths (direct and 1-hop related)
-                // 0..1 hops: 0 = direct match (rs == js), 1 = related match
-                OPTIONAL MATCH p = shortestPath((rs)-[:RELATED_TO|IS_A*0..1]->(js))
-                WHERE p IS NOT NULL
-
-                WITH p, nodes(p)[0] AS candidateSkillNode, nodes(p)[-1] AS jobSkillNode
-                RETURN
-                    candidateSkillNode.name AS candidateSkill,
-                    jobSkillNode.name AS jobSkill,
-                    length(p) AS pathLength,
-                    [rel in relationships(p) | type(rel)] AS relations
-                LIMIT 10 // Limit explanations for brevity
-            """, resume_id=resume_id, job_id=job_id)
-
-            paths = []
-            explanations = []
-            seen_explanations = set()
-
-            for record in result:
-                path_data = {
-                    "candidateSkill": record["candidateSkill"],
-                    "jobSkill": record["jobSkill"],
-                    "pathLength": record["pathLength"],
-                    "relations": record["relations"]
-                }
-                paths.append(path_data)
-
-                explanation = ""
-                candidate_skill = record['candidateSkill']
-                job_skill = record['jobSkill']
-
-                if record["pathLength"] == 0:
-                    # Direct match check
-                    if candidate_skill == job_skill:
-                        explanation = f"Direct match: Your skill **{candidate_skill}** matches the requirement."
-                    # else: # Should not happen with *0..1 and WHERE p IS NOT NULL
-                    #     explanation = f"Path length 0 but skills differ ({candidate_skill} vs {job_skill}) - Check Cypher query."
-
-                elif record["pathLength"] == 1:
-                    # Related match check
-                    if record["relations"]: # Ensure relations list is not empty
-                        rel_type = record["relations"][0].replace("_", " ").lower()
-                        explanation = f"Related match: Your skill **{candidate_skill}** is **{rel_type}** the required skill **{job_skill}**."
-                    else: # Should not happen if pathLength is 1
-                         explanation = f"Path length 1 but no relation type found for {candidate_skill} -> {job_skill}."
-
-                # Add unique explanations
-                if explanation and explanation not in seen_explanations:
-                    explanations.append(explanation)
-                    seen_explanations.add(explanation)
-
-            if not explanations:
-                 # Check if there was ANY overlap, even if paths weren't found (fallback)
-                 direct_overlap_check = session.run("""
-                     MATCH (r:Resume {id: $resume_id})-[:HAS]->(s:Skill)<-[:REQUIRES]-(j:Job {id: $job_id})
-                     RETURN count(s) > 0 AS hasOverlap
-                 """, resume_id=resume_id, job_id=job_id)
-                 if direct_overlap_check.single()["hasOverlap"]:
-                     return {"paths": [], "explanations": ["Direct skill matches exist, but explanation path query failed. Check Cypher/DB state."]}
-                 else:
-                     return {"paths": [], "explanations": ["No clear skill matches (direct or related) found."]}
-
-
-            return {"paths": paths, "explanations": explanations}
+        store = get_graph_store()
+        paths = []
+        explanations = []
+        seen_explanations = set()
+
+        for record in store.explain(resume_id, job_id, limit=10):  # Limit explanations for brevity
+            paths.append(record)
+
+            explanation = ""
+            candidate_skill = record['candidateSkill']
+            job_skill = record['jobSkill']
+
+            if record["pathLength"] == 0:
+                # Direct match check
+                if candidate_skill == job_skill:
+                    explanation = f"Direct match: Your skill **{candidate_skill}** matches the requirement."
+
+            elif record["pathLength"] == 1:
+                # Related match check
+                if record["relations"]: # Ensure relations list is not empty
+                    rel_type = record["relations"][0].replace("_", " ").lower()
+                    explanation = f"Related match: Your skill **{candidate_skill}** is **{rel_type}** the required skill **{job_skill}**."
+                else: # Should not happen if pathLength is 1
+                     explanation = f"Path length 1 but no relation type found for {candidate_skill} -> {job_skill}."
+
+            # Add unique explanations
+            if explanation and explanation not in seen_explanations:
+                explanations.append(explanation)
+                seen_explanations.add(explanation)
+
+        if not explanations:
+             # Check if there was ANY overlap, even if paths weren't found (fallback)
+             if store.direct_overlap(resume_id, job_id):
+                 return {"paths": [], "explanations": ["Direct skill matches exist, but explanation path query failed. Check Cypher/DB state."]}
+             else:
+                 return {"paths": [], "explanations": ["No clear skill matches (direct or related) found."]}
+
+
+        return {"paths": paths, "explanations": explanations}
 
     except Exception as e:
         traceback.print_exc()
@@ -1188,21 +3805,8 @@ def get_skill_relations(skill: str):
     # Normalize skill name to match DB
     skill_name = skill.strip().capitalize()
 
-    with neo4j_driver.session() as session:
-        result = session.run("""
-            MATCH (s:Skill {name: $skill_name})-[r:RELATED_TO|IS_A]->(s2:Skill)
-            RETURN s2.name AS relatedSkill, type(r) AS relationType, r.confidence as confidence
-            ORDER BY relationType, confidence DESC
-            LIMIT 25
-        """, skill_name=skill_name)
-
-        relations = []
-        for record in result:
-            relations.append({
-                "skill": record["relatedSkill"],
-                "type": record["relationType"],
-                "confidence": record["confidence"]
-            })
+    # for IS_A: direction 'out' = parent category, 'in' = sub-skill
+    relations = get_graph_store().explore(skill_name, limit=25)
 
     return {"skill": skill_name, "relations": relations}
 
@@ -1213,6 +3817,48 @@ def get_skill_relations(skill: str):
 def home():
     return {"message": f"🚀 Resume & JD Analyzer API v{app.version} (Enhanced Ontology Logging) Ready!"}
 
+
+def _ping_mongo():
+    mongo_client.admin.command("ping")
+
+
+def _ping_neo4j():
+    neo4j_driver.verify_connectivity()
+
+
+async def _check_dependency(check):
+    """Runs one blocking check in the threadpool with a time limit."""
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(run_in_threadpool(check), timeout=READINESS_TIMEOUT_SECONDS)
+        return {"state": "ok", "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+    except asyncio.TimeoutError:
+        return {"state": "timeout", "timeout_s": READINESS_TIMEOUT_SECONDS}
+    except Exception as e:
+        return {"state": "error", "error": str(e)}
+
+
+@app.get("/ready")
+async def readiness():
+    """
+    Readiness probe: pings MongoDB and Neo4j (creating the clients if needed) and
+    checks Gemini is configured without calling it. 503 until all are usable.
+    With GRAPH_STORE=memory there is no Neo4j to ping; the in-process store is reported instead.
+    """
+    checks = {"mongodb": _check_dependency(_ping_mongo)}
+    if GRAPH_STORE != "memory":
+        checks["neo4j"] = _check_dependency(_ping_neo4j)
+    dependencies = dict(zip(checks, await asyncio.gather(*checks.values())))
+    if GRAPH_STORE == "memory":
+        dependencies["graph_store"] = {"state": "ok", "store": "memory", "loaded": _memory_graph_store is not None}
+    # The breaker is reported but does not affect readiness: every instance shares the same upstream
+    dependencies["gemini"] = {"state": "ok" if GEMINI_API_KEY else "missing_api_key",
+                              "configured": connections.gemini_configured(),
+                              "breaker": connections.gemini_breaker.snapshot()["state"]}
+    ready = all(dep["state"] == "ok" for dep in dependencies.values())
+    return JSONResponse(content={"status": "ready" if ready else "not_ready", "dependencies": dependencies},
+                        status_code=200 if ready else 503)
+
 # ---------------------------------------------------------------------------
 # 10️⃣ Run:
 # uvicorn main:app --reload
@@ -0,0 +1,39 @@
+"""
+Nightly batch job: ranks applicants for every job in JD_skills and stores the
+lists in applicant_rankings, which /eligible_applicants/ then serves directly.
+
+Runs in-process against MongoDB and Neo4j (the API does not need to be up).
+Schedule it once a night, e.g. with cron:
+    30 2 * * *  cd /path/to/backend && python precompute_rankings.py
+or with the Windows Task Scheduler:
+    schtasks /Create /SC DAILY /ST 02:30 /TN RankApplicants /TR "python C:\\path\\to\\backend\\precompute_rankings.py"
+
+Usage (from the backend folder):
+    python precompute_rankings.py --modes expanded,multihop --batch-size 50
+    python precompute_rankings.py --resume <run_id>
+"""
+import argparse
+
+from bson.objectid import ObjectId
+
+import connections
+from main import precompute_applicant_rankings, start_ranking_run, db
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute ranked applicant lists for all jobs.")
+    parser.add_argument("--modes", default="expanded", help="comma-separated: expanded, multihop")
+    parser.add_argument("--batch-size", type=int, default=50, help="jobs ranked per Cypher query")
+    parser.add_argument("--resume", metavar="RUN_ID", help="continue an interrupted run")
+    args = parser.parse_args()
+
+    run_id, modes = start_ranking_run([m.strip() for m in args.modes.split(",") if m.strip()], args.resume)
+    print(f"🏁 Ranking run {run_id} ({', '.join(modes)})")
+    try:
+        precompute_applicant_rankings(run_id, modes, args.batch_size)
+        run = db["ranking_runs"].find_one({"_id": ObjectId(run_id)})
+        print(f"   status={run['status']} jobs={run['done']}/{run['total']}")
+        if run["status"] != "completed":
+            raise SystemExit(1)
+    finally:
+        connections.close_all()
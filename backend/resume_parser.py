@@ -1,23 +1,33 @@
 import fitz  # PyMuPDF
-import pandas as pd
-from sentence_transformers import SentenceTransformer, util
-import torch
 import re
-import nltk
-from nltk.tokenize import sent_tokenize
-from pymongo import MongoClient
+import math
+from collections import Counter
 import datetime
 
-nltk.download("punkt")
+try:
+    from backend import connections
+except ImportError:  # run from inside backend/
+    import connections
+
+# nltk, pandas and sentence-transformers are imported where they are used, so
+# the API can import the prompt-preparation helpers below without loading them.
+
+RELEVANT_SECTIONS = ["skills", "experience", "projects", "technical", "technologies", "summary"]
+
+
+def ensure_punkt():
+    """Downloads the punkt tokenizer only if it is missing (not at import time)."""
+    import nltk
+    try:
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        nltk.download("punkt")
 
 # -------------------------------
 # 1. Extract resume text
 def extract_text_from_pdf(pdf_path):
     doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+    return PAGE_SEPARATOR.join(page.get_text() for page in doc)
 
 # -------------------------------
 # 2. Extract contact info
@@ -34,7 +44,7 @@ def extract_contact_info(text):
 # -------------------------------
 # 3. Extract relevant lines
 def extract_relevant_sentences(text):
-    sections = ["skills", "experience", "projects", "technical", "technologies", "summary"]
+    sections = RELEVANT_SECTIONS
     lines = text.split("\n")
     relevant = []
     capture = False
@@ -51,13 +61,206 @@ def extract_relevant_sentences(text):
                 relevant.append(line.strip())
 
     if not relevant:
+        from nltk.tokenize import sent_tokenize
+        ensure_punkt()
         relevant = sent_tokenize(text.lower())
 
     return list(set(relevant))
 
+# -------------------------------
+# 3b. Prepare resume text for an LLM prompt (token budget)
+# Section headings are recognised from their own vocabulary below (only
+# standalone, heading-shaped lines count) and the text keeps its order and
+# headings so the LLM still sees a resume. When the text is over budget,
+# sections are ranked: the contact block (everything before the first
+# heading), skills, experience and projects are kept first, and low-value
+# sections (references, hobbies, ...) are the first to go.
+PROMPT_SECTION_PRIORITY = [
+    ("skills", ["skill", "technical", "technologies", "tech stack", "competencies", "tools"]),
+    ("experience", ["experience", "employment", "work history", "internship", "career history"]),
+    ("projects", ["project"]),
+    ("summary", ["summary", "objective", "profile", "about me"]),
+    ("education", ["education", "academic", "qualification"]),
+    ("certifications", ["certification", "certificate", "course", "training", "award", "achievement"]),
+]
+PROMPT_DROPPED_SECTIONS = ["reference", "hobbies", "hobby", "interests", "declaration", "extracurricular"]
+# Words that may accompany a dropped-section word in its heading ("Hobbies & Interests")
+_DROPPED_HEADING_FILLER = {"and", "&", "/", "personal", "other", "activities", "s"}
+PAGE_SEPARATOR = "\f"  # joins PyMuPDF pages in the extracted text
+HEADER_FOOTER_LINES = 2  # lines at the top and bottom of a page checked for repeats
+ESSENTIAL_SECTIONS = ("contact", "skills", "experience", "projects")
+
+_BOILERPLATE_LINE_RES = [
+    re.compile(r"^(page\s*)?\d+\s*(of|/)\s*\d+$"),             # "Page 1 of 2", "1/2"
+    re.compile(r"^[-–—\s]*\d+[-–—\s]*$"),                         # "- 1 -"
+    re.compile(r"^(curriculum vitae|resume|résumé|cv)$"),
+    re.compile(r"^references? (are )?available (up)?on request\.?$"),
+    re.compile(r"^i hereby declare\b"),
+]
+_BULLET_RE = re.compile(r"^[•●▪■◦‣∙·*➢➤►✓✔-]+\s*")
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), enough to budget prompts."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _page_edge_repeats(pages):
+    """
+    Lines repeated at the top or bottom of most pages (headers/footers).
+    Returns {(page number, line number)} of the occurrences to drop.
+    """
+    if len(pages) < 2:
+        return set()
+    edges = []
+    for lines in pages:
+        filled = [i for i, line in enumerate(lines) if line]
+        edges.append(set(filled[:HEADER_FOOTER_LINES] + filled[-HEADER_FOOTER_LINES:]))
+    counts = Counter()
+    for lines, edge in zip(pages, edges):
+        counts.update({lines[i].lower() for i in edge})  # once per page
+    repeated = {line for line, count in counts.items() if count > len(pages) / 2}
+    return {(p, i) for p, (lines, edge) in enumerate(zip(pages, edges)) for i in edge if lines[i].lower() in repeated}
+
+
+def _clean_resume_lines(text):
+    """
+    Collapses whitespace, unifies bullets and drops page furniture. Pages are
+    split on PAGE_SEPARATOR; a line only counts as a header/footer when it
+    repeats at the top or bottom of most pages, so repeated body lines (the
+    same job title in several roles) are kept.
+    """
+    pages = [[re.sub(r"\s+", " ", line).strip() for line in page.replace("\r", "\n").split("\n")]
+             for page in text.split(PAGE_SEPARATOR)]
+    furniture = _page_edge_repeats(pages)
+    cleaned = []
+    for p, lines in enumerate(pages):
+        for i, line in enumerate(lines):
+            lower = line.lower()
+            if not line:
+                if cleaned and cleaned[-1] != "":
+                    cleaned.append("")
+                continue
+            if (p, i) in furniture or any(rx.match(lower) for rx in _BOILERPLATE_LINE_RES):
+                continue
+            cleaned.append(_BULLET_RE.sub("- ", line))
+    while cleaned and cleaned[-1] == "":
+        cleaned.pop()
+    return cleaned
+
+
+def _section_kind(line):
+    """
+    Returns the section kind if the line is a heading, else None. Headings are
+    standalone: not bulleted, short, no sentence punctuation and nothing after
+    a colon ("Interests: distributed systems" is body text).
+    """
+    if line.startswith("- "):
+        return None
+    heading = line.lower().strip()
+    if heading.endswith(":"):
+        heading = heading[:-1].strip()
+    if (not heading or len(heading) > 40 or len(heading.split()) > 4 or heading.endswith(".")
+            or ":" in heading or not line[:1].isupper()):
+        return None
+    words = re.findall(r"[a-z&/]+", heading)
+    if any(any(word.startswith(dropped) for dropped in PROMPT_DROPPED_SECTIONS) for word in words) and all(
+            word in _DROPPED_HEADING_FILLER or any(word.startswith(d) for d in PROMPT_DROPPED_SECTIONS)
+            for word in words):
+        return "dropped"
+    for kind, words in PROMPT_SECTION_PRIORITY:
+        if any(word in heading for word in words):
+            return kind
+    return None
+
+
+def _split_sections(lines):
+    sections = [{"kind": "contact", "lines": []}]
+    for line in lines:
+        kind = _section_kind(line)
+        if kind:
+            sections.append({"kind": kind, "lines": [line]})
+        else:
+            sections[-1]["lines"].append(line)
+    return [sec for sec in sections if any(sec["lines"])]
+
+
+def _truncate_lines(lines, token_budget):
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1  # + newline
+        if used + cost > token_budget:
+            if not kept and token_budget > 1:
+                # One very long line (PDFs without line breaks): cut it instead
+                kept.append(line[:(token_budget - 1) * 4])
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def prepare_resume_text_for_prompt(text, token_budget=3000):
+    """
+    Strips boilerplate, collapses whitespace and fits the resume into token_budget
+    (0 = no limit). Returns (prepared_text, stats).
+    """
+    original_tokens = estimate_tokens(text)
+    sections = _split_sections(_clean_resume_lines(text))
+    for sec in sections:
+        sec["text"] = "\n".join(sec["lines"])
+        sec["tokens"] = estimate_tokens(sec["text"]) + 1
+
+    dropped = []
+    truncated = False
+    if token_budget and sum(sec["tokens"] for sec in sections) > token_budget:
+        # Over budget: low-value sections go first, then the budget is shared out
+        dropped = [sec["lines"][0].lower().rstrip(":") for sec in sections if sec["kind"] == "dropped"]
+        sections = [sec for sec in sections if sec["kind"] != "dropped"]
+    if token_budget and sum(sec["tokens"] for sec in sections) > token_budget:
+        truncated = True
+        rank = {kind: i for i, kind in enumerate(["contact"] + [k for k, _ in PROMPT_SECTION_PRIORITY])}
+        by_priority = sorted(sections, key=lambda sec: rank.get(sec["kind"], len(rank)))
+        essentials = [sec for sec in by_priority if sec["kind"] in ESSENTIAL_SECTIONS]
+        # Pass 1: every essential section gets up to an equal share, so one long
+        # experience section cannot crowd out skills or projects
+        share = token_budget // max(1, len(essentials))
+        grant = {id(sec): min(sec["tokens"], share) for sec in essentials}
+        # Pass 2: what is left completes the smallest sections first, so only
+        # the longest ones end up truncated
+        remaining = token_budget - sum(grant.values())
+        for sec in sorted(by_priority, key=lambda sec: sec["tokens"]):
+            extra = min(remaining, sec["tokens"] - grant.get(id(sec), 0))
+            if extra > 0:
+                grant[id(sec)] = grant.get(id(sec), 0) + extra
+                remaining -= extra
+        kept_sections = []
+        for sec in sections:
+            budget = grant.get(id(sec), 0)
+            if budget >= sec["tokens"]:
+                kept_sections.append(sec)
+                continue
+            lines = _truncate_lines(sec["lines"], budget)
+            if lines:
+                kept_sections.append({**sec, "text": "\n".join(lines)})
+            else:
+                dropped.append(sec["kind"])
+        sections = kept_sections
+
+    prepared = "\n\n".join(sec["text"].strip("\n") for sec in sections)
+    return prepared, {
+        "original_tokens": original_tokens,
+        "prompt_tokens": estimate_tokens(prepared),
+        "sections_kept": [sec["kind"] for sec in sections],
+        "sections_dropped": dropped,
+        "truncated": truncated,
+    }
+
 # -------------------------------
 # 4. Load & deduplicate skill list
 def load_unique_skills(csv_path, model, similarity_threshold=0.9):
+    import pandas as pd
+    from sentence_transformers import util
+
     df = pd.read_csv(csv_path)
     if 'skills' in df.columns:
         raw_skills = df['skills'].dropna().astype(str).str.lower().str.strip().tolist()
@@ -78,6 +281,8 @@ def load_unique_skills(csv_path, model, similarity_threshold=0.9):
 # -------------------------------
 # 5. Match skills
 def match_skills(sentences, skills, model, threshold=0.55, top_k=15):
+    from sentence_transformers import util
+
     skill_embeddings = model.encode(skills, convert_to_tensor=True)
     matched = {}
 
@@ -106,10 +311,9 @@ def match_skills(sentences, skills, model, threshold=0.55, top_k=15):
 
 # -------------------------------
 # 6. Save to MongoDB
-def save_to_mongodb(data, db_name="Resume_Matcher", collection_name="resumes", mongo_uri="mongodb://localhost:27017"):
+def save_to_mongodb(data, db_name="Resume_Matcher", collection_name="resumes", mongo_uri=None):
     try:
-        client = MongoClient(mongo_uri)
-        db = client[db_name]
+        db = connections.get_database(db_name, mongo_uri)
         collection = db[collection_name]
         result = collection.insert_one(data)
         print(f"Saved to MongoDB with _id: {result.inserted_id}")
@@ -119,6 +323,8 @@ def save_to_mongodb(data, db_name="Resume_Matcher", collection_name="resumes", m
 # -------------------------------
 # 7. Main runner
 if __name__ == "__main__":
+    from sentence_transformers import SentenceTransformer
+
     resume_path = r"D:\NOSql Project\Abishek resume.pdf"
     skills_csv = "skills.csv"
 
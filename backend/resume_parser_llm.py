@@ -1,15 +1,17 @@
 import os
 import json
-import google.generativeai as genai
 import fitz  # PyMuPDF
-from pymongo import MongoClient  #  MongoDB integration
+
+try:
+    from backend import connections
+except ImportError:  # run from inside backend/
+    import connections
 
 # --- CONFIGURATION ---
 
-GOOGLE_API_KEY =  os.environ.get("GEMINI_API_KEY")
+GOOGLE_API_KEY = connections.GEMINI_API_KEY
 PDF_FILE_PATH = r"D:\NOSql Project\Abishek resume.pdf"
 
-MONGO_URI = "mongodb://localhost:27017"
 DB_NAME = "ResumeDB"
 COLLECTION_NAME = "resumes"
 
@@ -38,8 +40,7 @@ def parse_and_store_resume():
 
     print(" Sending text to Gemini AI for JSON parsing...")
     try:
-        genai.configure(api_key=GOOGLE_API_KEY)
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        model = connections.get_gemini_model('gemini-2.5-flash')
 
         prompt = f"""
         Act as an expert resume parser. Analyze the raw text below and convert it into a structured JSON object.
@@ -55,7 +56,7 @@ def parse_and_store_resume():
         {raw_text}
         ---
         """
-        response = model.generate_content(prompt)
+        response = connections.call_gemini(model, prompt)
 
         json_text = response.text.strip().replace("```json", "").replace("```", "")
         parsed_data = json.loads(json_text)
@@ -78,8 +79,7 @@ def parse_and_store_resume():
 
     print(" Saving to MongoDB...")
     try:
-        client = MongoClient(MONGO_URI)
-        db = client[DB_NAME]
+        db = connections.get_database(DB_NAME)
         collection = db[COLLECTION_NAME]
         result = collection.insert_one(parsed_data)
         print(f" Resume data stored with _id: {result.inserted_id}")
@@ -0,0 +1,118 @@
+"""
+Password hashing and signed session tokens.
+
+Kept free of app imports on purpose: bcrypt runs in a process pool, and on
+platforms that spawn workers (Windows) each worker imports this module only,
+not main.py with its database clients.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+SESSION_SECRET_CONFIGURED = bool(SESSION_SECRET)
+if not SESSION_SECRET:
+    # Tokens then only survive until restart and are not shared between workers;
+    # main.py refuses to start more than one worker without it
+    print("⚠️ WARNING: SESSION_SECRET not set; using a random per-process secret.")
+    SESSION_SECRET = secrets.token_hex(32)
+# The admin account is configured, not stored: without ADMIN_PASSWORD nobody can log in as admin
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
+if not ADMIN_PASSWORD:
+    print("⚠️ WARNING: ADMIN_PASSWORD not set; admin login is disabled.")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(12 * 3600)))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+_bcrypt_pool = None
+
+
+# --- Passwords ---
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    try:
+        return pwd_context.verify(password, hashed)
+    except ValueError:
+        # Malformed or unknown hash format
+        return False
+
+
+def is_admin_login(username: str, password: str) -> bool:
+    """True for the configured admin credentials (constant-time compare); always False without ADMIN_PASSWORD."""
+    if not ADMIN_PASSWORD:
+        return False
+    return (hmac.compare_digest(username.encode("utf-8"), ADMIN_USERNAME.encode("utf-8"))
+            and hmac.compare_digest(password.encode("utf-8"), ADMIN_PASSWORD.encode("utf-8")))
+
+
+def get_bcrypt_pool():
+    """Dedicated, bounded pool so bcrypt never occupies FastAPI's shared threadpool."""
+    global _bcrypt_pool
+    if _bcrypt_pool is None:
+        _bcrypt_pool = ProcessPoolExecutor(max_workers=BCRYPT_WORKERS)
+    return _bcrypt_pool
+
+
+def shutdown_bcrypt_pool():
+    global _bcrypt_pool
+    if _bcrypt_pool is not None:
+        _bcrypt_pool.shutdown(wait=False, cancel_futures=True)
+        _bcrypt_pool = None
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(get_bcrypt_pool(), hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(get_bcrypt_pool(), verify_password, password, hashed)
+
+
+# --- Session tokens ---
+# Format: base64url(json payload) + "." + base64url(HMAC-SHA256(payload part)).
+# Verifying one costs a single HMAC, so bcrypt only runs at login.
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(SESSION_SECRET.encode("utf-8"), body.encode("ascii"), hashlib.sha256).digest())
+
+
+def create_session_token(username: str, role: str, ttl_seconds: int = None) -> str:
+    payload = {"sub": username, "role": role, "exp": int(time.time()) + (ttl_seconds or SESSION_TTL_SECONDS)}
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return f"{body}.{_sign(body)}"
+
+
+def verify_session_token(token: str):
+    """Returns the token's payload, or None if it is malformed, forged or expired."""
+    try:
+        body, signature = token.split(".", 1)
+        if not hmac.compare_digest(signature, _sign(body)):
+            return None
+        payload = json.loads(_b64decode(body))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("exp", 0) < time.time():
+        return None
+    return payload
@@ -0,0 +1,40 @@
+"""
+Graph snapshot tool: exports the Neo4j matching graph (skills, jobs, resumes,
+ontology relations with confidence/timestamps, SIMILAR_TO closure) to one
+compact columnar file, and bulk-loads such a file back for a warm start
+without re-pushing from MongoDB or re-running the ontology.
+
+Usage (from the backend folder, with MongoDB and Neo4j running):
+    python snapshot_graph.py export snapshots/graph.snap
+    python snapshot_graph.py import snapshots/graph.snap --replace
+    python snapshot_graph.py info snapshots/graph.snap
+
+Point GRAPH_SNAPSHOT_PATH at the file to have the API memory-map it at startup.
+"""
+import argparse
+import json
+
+import connections
+import graph_snapshot
+from main import export_graph_snapshot, import_graph_snapshot, GRAPH_SNAPSHOT_BATCH_SIZE
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a compact graph snapshot.")
+    parser.add_argument("command", choices=["export", "import", "info"])
+    parser.add_argument("path", help="snapshot file")
+    parser.add_argument("--replace", action="store_true",
+                        help="import: delete the existing Skill/Job/Resume graph first")
+    parser.add_argument("--batch-size", type=int, default=GRAPH_SNAPSHOT_BATCH_SIZE, help="rows per Cypher query")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            export_graph_snapshot(args.path)
+        elif args.command == "import":
+            import_graph_snapshot(args.path, replace=args.replace, batch_size=args.batch_size)
+        else:
+            with graph_snapshot.GraphSnapshot(args.path) as snapshot:
+                print(json.dumps({**snapshot.stats(), "meta": snapshot.meta}, indent=2, default=str))
+    finally:
+        connections.close_all()
@@ -0,0 +1,440 @@
+"""
+Synthetic dataset generator for load and scale testing.
+
+Produces N resumes (raw Gemini-shaped JSON in every layout that
+normalize_parsed_resume understands, plus a matching PDF), M job descriptions
+with Zipf-distributed skill lists and a synthetic skill ontology, then loads
+them straight into MongoDB (resumes, JD_skills, GridFS) and Neo4j through the
+bulk UNWIND writers in main.py.
+
+Every generated document carries "synthetic": True so it can be purged again.
+
+Usage (from the backend folder):
+    python synthetic_data.py --resumes 10000 --jobs 2000 --skills 800
+    python synthetic_data.py --resumes 50 --jobs 10 --out-dir ./synthetic --no-load
+    python synthetic_data.py --purge
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import fitz  # PyMuPDF
+from bson.objectid import ObjectId
+
+from main import (
+    normalize_parsed_resume,
+    db,
+    fs,
+    neo4j_driver,
+    bulk_push_jobs_to_neo4j,
+    bulk_push_resumes_to_neo4j,
+    bulk_push_skill_relations_to_neo4j,
+    insert_resume_documents,
+    bump_cache_versions,
+    record_text_changes,
+    ensure_graph_indexes,
+    RESUMES_RAW_COLLECTION,
+)
+
+# ---------------------------------------------------------------------------
+# Vocabulary
+# ---------------------------------------------------------------------------
+
+CATEGORIES = {
+    "Programming language": ["Python", "Java", "Javascript", "Typescript", "Go", "Rust", "C++", "C#", "Kotlin", "Scala", "Ruby", "Php"],
+    "Web framework": ["Django", "Flask", "Fastapi", "React", "Angular", "Vue", "Spring boot", "Express", "Next.js", "Rails"],
+    "Database": ["Mongodb", "Postgresql", "Mysql", "Redis", "Neo4j", "Cassandra", "Elasticsearch", "Sqlite", "Dynamodb"],
+    "Cloud platform": ["Aws", "Azure", "Gcp", "Heroku", "Cloudflare"],
+    "Devops": ["Docker", "Kubernetes", "Terraform", "Ansible", "Jenkins", "Github actions", "Linux", "Git"],
+    "Data science": ["Pandas", "Numpy", "Scikit-learn", "Pytorch", "Tensorflow", "Spark", "Airflow", "Tableau", "Sql"],
+    "Soft skill": ["Communication", "Leadership", "Teamwork", "Problem solving", "Mentoring", "Agile", "Scrum", "Stakeholder management"],
+}
+
+SYNTHETIC_PREFIXES = ["Stream", "Graph", "Edge", "Vector", "Event", "Batch", "Mobile", "Embedded", "Realtime", "Distributed"]
+SYNTHETIC_SUFFIXES = ["processing", "analytics", "modeling", "security", "testing", "caching", "messaging", "design", "observability", "search"]
+
+FIRST_NAMES = ["Asha", "Ravi", "Meera", "Arjun", "Priya", "Karthik", "Divya", "Rahul", "Sneha", "Vikram", "Lena", "Omar", "Chen", "Maria", "Noah"]
+LAST_NAMES = ["Kumar", "Sharma", "Iyer", "Reddy", "Nair", "Patel", "Singh", "Das", "Garcia", "Nguyen", "Smith", "Khan", "Müller", "Rossi"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Tech", "Hooli", "Vandelay", "Soylent", "Tyrell"]
+ROLES = ["Software Engineer", "Backend Developer", "Data Scientist", "DevOps Engineer", "Frontend Developer", "ML Engineer", "Data Engineer", "Full Stack Developer"]
+SENIORITY = ["Junior", "", "Senior", "Lead", "Principal"]
+
+
+def build_skill_vocabulary(num_skills: int):
+    """
+    Returns (skills, category_of) where skills is ordered by popularity rank
+    (rank 0 = most common) and category_of maps each skill to its IS_A parent.
+    Real skill names come first; the rest are synthetic compounds.
+    """
+    skills, category_of = [], {}
+    for category, names in CATEGORIES.items():
+        for name in names:
+            skills.append(name)
+            category_of[name] = category
+
+    categories = list(CATEGORIES)
+    i = 0
+    while len(skills) < num_skills:
+        prefix = SYNTHETIC_PREFIXES[i % len(SYNTHETIC_PREFIXES)]
+        suffix = SYNTHETIC_SUFFIXES[(i // len(SYNTHETIC_PREFIXES)) % len(SYNTHETIC_SUFFIXES)]
+        generation = i // (len(SYNTHETIC_PREFIXES) * len(SYNTHETIC_SUFFIXES))
+        name = f"{prefix} {suffix}" + (f" {generation}" if generation else "")
+        skills.append(name.capitalize())
+        category_of[name.capitalize()] = categories[i % len(categories)]
+        i += 1
+
+    skills = skills[:num_skills]
+    return skills, {s: category_of[s] for s in skills}
+
+
+class ZipfSampler:
+    """Draws distinct items where item at rank k has weight 1 / (k + 1) ** exponent."""
+
+    def __init__(self, items, exponent: float, rng: random.Random):
+        self.items = list(items)
+        self.rng = rng
+        total = 0.0
+        self.cum_weights = []
+        for rank in range(len(self.items)):
+            total += 1.0 / (rank + 1) ** exponent
+            self.cum_weights.append(total)
+
+    def sample(self, k: int):
+        k = min(k, len(self.items))
+        chosen, seen = [], set()
+        # Oversample in rounds; the long tail makes collisions rare after the first few draws
+        while len(chosen) < k:
+            for item in self.rng.choices(self.items, cum_weights=self.cum_weights, k=(k - len(chosen)) * 2):
+                if item not in seen:
+                    seen.add(item)
+                    chosen.append(item)
+                    if len(chosen) == k:
+                        break
+        return chosen
+
+
+def build_ontology(skills, category_of, rng: random.Random, max_related: int = 4):
+    """
+    Builds IS_A edges (skill -> category) and RELATED_TO edges that prefer
+    skills in the same category, in the relation format used by the ontology builder.
+    """
+    relations = []
+    by_category = {}
+    for skill in skills:
+        by_category.setdefault(category_of[skill], []).append(skill)
+
+    for skill in skills:
+        relations.append({
+            "from": skill,
+            "to": category_of[skill],
+            "relation_type": "IS_A",
+            "confidence": round(rng.uniform(0.85, 0.99), 2),
+            "source": "SYNTHETIC"
+        })
+        peers = [s for s in by_category[category_of[skill]] if s != skill]
+        for related in rng.sample(peers, min(len(peers), rng.randint(1, max_related))):
+            relations.append({
+                "from": skill,
+                "to": related,
+                "relation_type": "RELATED_TO",
+                "confidence": round(rng.uniform(0.6, 0.95), 2),
+                "source": "SYNTHETIC"
+            })
+    return relations
+
+
+# ---------------------------------------------------------------------------
+# Raw resume variants
+# Each axis is chosen with (index + offset) % len(options) so that every
+# branch of normalize_parsed_resume is hit in any run of a few dozen resumes.
+# ---------------------------------------------------------------------------
+
+def _pick(options, index: int, offset: int):
+    return options[(index + offset) % len(options)]
+
+
+def _person(index: int, rng: random.Random):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}{index}@example.com",
+        "phone": f"+91 {rng.randint(70000, 99999)} {rng.randint(10000, 99999)}",
+        "summary": f"{rng.choice(ROLES)} with {rng.randint(1, 15)} years of experience building reliable systems."
+    }
+
+
+def _identity_variant(index: int, person: dict):
+    """Covers name / full_name / personal_information / personalInfo / personal, contact dict vs flat, and the find_email/find_phone fallbacks."""
+    variant = _pick(["flat", "full_name", "personal_contact_details", "personalInfo_contact", "personal_email_str", "personal_phone_str", "buried"], index, 0)
+    if variant == "flat":
+        return {"name": person["name"], "email": person["email"], "phone": person["phone"]}
+    if variant == "full_name":
+        return {"full_name": person["name"], "email": person["email"], "phone": person["phone"]}
+    if variant == "personal_contact_details":
+        return {"personal_information": {"name": person["name"], "contact_details": {"email": person["email"], "phone": person["phone"]}}}
+    if variant == "personalInfo_contact":
+        return {"personalInfo": {"full_name": person["name"], "contact": {"email": person["email"], "phone": person["phone"]}}}
+    if variant == "personal_email_str":
+        return {"personal": {"name": person["name"], "contact": "see below", "Email": person["email"]}, "phone": person["phone"]}
+    if variant == "personal_phone_str":
+        return {"personal": {"full_name": person["name"], "contact": "n/a", "Phone": person["phone"]}, "email": person["email"]}
+    # Email and phone only reachable through the recursive fallback walkers
+    return {"name": person["name"], "links": [{"label": "mail", "value": person["email"]}, {"label": "mobile", "value": person["phone"]}]}
+
+
+def _summary_variant(index: int, summary: str, raw: dict):
+    variant = _pick(["summary", "career_objective", "objective", "personal_summary", "personal_career_objective"], index, 1)
+    if variant.startswith("personal_"):
+        personal = raw.get("personal_information") or raw.get("personalInfo") or raw.get("personal")
+        if isinstance(personal, dict):
+            personal[variant[len("personal_"):]] = summary
+            return
+        variant = "summary"
+    raw[variant] = summary
+
+
+def _skills_variant(index: int, skills, rng: random.Random):
+    key = _pick(["skills", "skillset", "technical_skills"], index, 2)
+    variant = _pick(["dict_lists", "dict_strings", "flat_list", "list_of_dicts", "comma_string"], index, 3)
+    if variant in ("dict_lists", "dict_strings"):
+        groups = {"programming_languages": [], "frameworks": [], "tools": []}
+        for skill in skills:
+            groups[rng.choice(list(groups))].append(skill)
+        if variant == "dict_strings":
+            groups = {k: ", ".join(v) for k, v in groups.items()}
+        return {key: groups}
+    if variant == "list_of_dicts":
+        return {key: [{_pick(["name", "skill"], i, 0): s, "level": rng.choice(["basic", "advanced"])} for i, s in enumerate(skills)]}
+    if variant == "comma_string":
+        return {key: ", ".join(skills)}
+    return {key: list(skills)}
+
+
+def _experience_variant(index: int, rng: random.Random):
+    key = _pick(["professional_experience", "work_experience", "experience"], index, 4)
+    variant = _pick(["list", "list_alt_keys", "list_string_resp", "dict_of_dict", "dict_of_list", "list_of_str"], index, 5)
+    jobs = []
+    for _ in range(rng.randint(1, 4)):
+        start = rng.randint(2008, 2022)
+        jobs.append({
+            "title": f"{rng.choice(SENIORITY)} {rng.choice(ROLES)}".strip(),
+            "company": rng.choice(COMPANIES),
+            "dates": f"{start} - {start + rng.randint(1, 3)}",
+            "responsibilities": [f"Delivered {rng.choice(SYNTHETIC_PREFIXES).lower()} features for {rng.randint(2, 40)} teams",
+                                 f"Reduced latency by {rng.randint(5, 60)}%"]
+        })
+    if variant == "list":
+        return {key: jobs}
+    if variant == "list_alt_keys":
+        return {key: [{"role": j["title"], "employer": j["company"], "period": j["dates"], "tasks": j["responsibilities"]} for j in jobs]}
+    if variant == "list_string_resp":
+        return {key: [{"position": j["title"], "company": j["company"], "duration": j["dates"], "description": ". ".join(j["responsibilities"])} for j in jobs]}
+    if variant == "dict_of_dict":
+        return {key: {j["company"]: {"role": j["title"], "duration": j["dates"], "tasks": j["responsibilities"]} for j in jobs}}
+    if variant == "dict_of_list":
+        by_company = {}
+        for j in jobs:
+            by_company.setdefault(j["company"], []).append({"title": j["title"], "dates": j["dates"], "responsibilities": j["responsibilities"]})
+        return {key: by_company}
+    return {key: [f"{j['title']} at {j['company']} ({j['dates']})" for j in jobs]}
+
+
+def _projects_variant(index: int, skills, rng: random.Random):
+    key = _pick(["projects", "personal_projects", "project"], index, 6)
+    variant = _pick(["list", "list_name_description", "dict", "list_of_str"], index, 7)
+    projects = []
+    for n in range(rng.randint(0, 3)):
+        used = ", ".join(rng.sample(skills, min(2, len(skills))))
+        projects.append({"title": f"Project {rng.choice(SYNTHETIC_PREFIXES)} {n + 1}", "details": [f"Built with {used}", "Deployed to production"]})
+    if variant == "list":
+        return {key: projects}
+    if variant == "list_name_description":
+        return {key: [{"name": p["title"], "description": ". ".join(p["details"])} for p in projects]}
+    if variant == "dict":
+        return {key: {p["title"]: {"points": p["details"]} if n % 2 else {"description": ". ".join(p["details"])} for n, p in enumerate(projects)}}
+    return {key: [p["title"] for p in projects]}
+
+
+def generate_raw_resume(index: int, skill_sampler: ZipfSampler, rng: random.Random):
+    """Returns (raw_gemini_json, person) for resume number `index`."""
+    person = _person(index, rng)
+    skills = skill_sampler.sample(rng.randint(4, 18))
+    raw = _identity_variant(index, person)
+    _summary_variant(index, person["summary"], raw)
+    raw.update(_skills_variant(index, skills, rng))
+    raw.update(_experience_variant(index, rng))
+    raw.update(_projects_variant(index, skills, rng))
+    return raw, person
+
+
+def render_resume_pdf(person: dict, normalized: dict) -> bytes:
+    """Renders a plain one-page PDF whose text layer mirrors the parsed resume."""
+    lines = [person["name"], f"{person['email']} | {person['phone']}", "", "Summary", normalized.get("summary", ""), "", "Skills",
+             ", ".join(normalized.get("skills", [])), "", "Experience"]
+    for exp in normalized.get("professional_experience", []):
+        lines.append(f"{exp['title']} - {exp['company']} ({exp['dates']})")
+        lines.extend(f"  - {r}" for r in exp["responsibilities"])
+    lines.extend(["", "Projects"])
+    for proj in normalized.get("projects", []):
+        lines.append(proj["title"])
+        lines.extend(f"  - {d}" for d in proj["details"])
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(50, 50, 560, 800), "\n".join(lines), fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def generate_job(index: int, skill_sampler: ZipfSampler, rng: random.Random):
+    skills = skill_sampler.sample(rng.randint(5, 15))
+    title = f"{rng.choice(SENIORITY)} {rng.choice(ROLES)}".strip()
+    company = rng.choice(COMPANIES)
+    description = (
+        f"{company} is hiring a {title}. You will work with {', '.join(skills[:-1])} and {skills[-1]}. "
+        f"Experience with {rng.choice(skills)} in production is a strong plus. "
+        f"We value {rng.choice(CATEGORIES['Soft skill']).lower()} and ownership."
+    )
+    return {
+        "job_title": title,
+        "company_portal_link": f"https://careers.example.com/{company.lower().replace(' ', '-')}/{index}",
+        "job_description": description,
+        "skills": skills,
+        "synthetic": True
+    }
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def _batched(items, batch_size: int):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def generate_and_load(num_resumes: int, num_jobs: int, num_skills: int, seed: int = 42, batch_size: int = 500,
+                      with_pdfs: bool = True, load: bool = True, out_dir: str = None, zipf_exponent: float = 1.1):
+    rng = random.Random(seed)
+    t0 = time.time()
+
+    skills, category_of = build_skill_vocabulary(num_skills)
+    relations = build_ontology(skills, category_of, rng)
+    sampler = ZipfSampler(skills, zipf_exponent, rng)
+    print(f"🧪 Vocabulary: {len(skills)} skills, {len(relations)} ontology relations.")
+
+    jobs = [generate_job(i, sampler, rng) for i in range(num_jobs)]
+
+    resumes, raw_resumes, pdfs = [], [], []
+    for i in range(num_resumes):
+        raw, person = generate_raw_resume(i, sampler, rng)
+        doc = normalize_parsed_resume(raw)
+        doc["username"] = f"synthetic_user_{i}"
+        doc["synthetic"] = True
+        resumes.append(doc)
+        raw_resumes.append(raw)
+        pdfs.append(render_resume_pdf(person, doc) if with_pdfs else None)
+    print(f"🧪 Generated {len(resumes)} resumes and {len(jobs)} jobs in {time.time() - t0:.1f}s.")
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "raw_resumes.jsonl"), "w", encoding="utf-8") as f:
+            for raw in raw_resumes:
+                f.write(json.dumps(raw) + "\n")
+        with open(os.path.join(out_dir, "jobs.jsonl"), "w", encoding="utf-8") as f:
+            for job in jobs:
+                f.write(json.dumps(job) + "\n")
+        with open(os.path.join(out_dir, "ontology.json"), "w", encoding="utf-8") as f:
+            json.dump({"skills": skills, "relations": relations}, f)
+        if with_pdfs:
+            pdf_dir = os.path.join(out_dir, "pdfs")
+            os.makedirs(pdf_dir, exist_ok=True)
+            for i, pdf in enumerate(pdfs):
+                with open(os.path.join(pdf_dir, f"synthetic_resume_{i}.pdf"), "wb") as f:
+                    f.write(pdf)
+        print(f"💾 Wrote dataset to {out_dir}")
+
+    if not load:
+        return {"resumes": len(resumes), "jobs": len(jobs), "skills": len(skills), "relations": len(relations), "loaded": False}
+
+    # Indexes before the bulk MERGEs, which otherwise label-scan per row
+    ensure_graph_indexes()
+
+    # Ontology first, flagged as processed, so later uploads don't send these skills to Gemini
+    t1 = time.time()
+    bulk_push_skill_relations_to_neo4j(relations, batch_size=batch_size, mark_processed=True)
+    print(f"✅ Ontology loaded in {time.time() - t1:.1f}s.")
+
+    t1 = time.time()
+    for batch in _batched(jobs, batch_size):
+        result = db["JD_skills"].insert_many(batch)
+        for job, inserted_id in zip(batch, result.inserted_ids):
+            job["_id"] = inserted_id
+        record_text_changes("jobs", result.inserted_ids)
+        bulk_push_jobs_to_neo4j(batch, batch_size=batch_size)
+    print(f"✅ {len(jobs)} jobs loaded in {time.time() - t1:.1f}s.")
+
+    t1 = time.time()
+    for start in range(0, len(resumes), batch_size):
+        batch = resumes[start:start + batch_size]
+        for doc, pdf in zip(batch, pdfs[start:start + batch_size]):
+            if pdf is not None:
+                file_id = fs.put(pdf, filename=f"{doc['username']}.pdf", synthetic=True)
+                doc["gridfs_file_id"] = str(file_id)
+        for doc, inserted_id in zip(batch, insert_resume_documents(batch)):
+            doc["_id"] = inserted_id
+        bulk_push_resumes_to_neo4j(batch, batch_size=batch_size)
+    print(f"✅ {len(resumes)} resumes loaded in {time.time() - t1:.1f}s.")
+
+    return {"resumes": len(resumes), "jobs": len(jobs), "skills": len(skills), "relations": len(relations), "loaded": True}
+
+
+def purge_synthetic_data(batch_size: int = 1000):
+    """Removes everything this script inserted (Mongo documents, GridFS files, graph nodes)."""
+    resume_ids = [str(d["_id"]) for d in db["resumes"].find({"synthetic": True}, {"_id": 1})]
+    job_ids = [str(d["_id"]) for d in db["JD_skills"].find({"synthetic": True}, {"_id": 1})]
+
+    with neo4j_driver.session() as session:
+        for batch in _batched(resume_ids, batch_size):
+            session.run("UNWIND $ids AS id MATCH (r:Resume {id: id}) DETACH DELETE r", ids=batch)
+        for batch in _batched(job_ids, batch_size):
+            session.run("UNWIND $ids AS id MATCH (j:Job {id: id}) DETACH DELETE j", ids=batch)
+        session.run("MATCH ()-[r:RELATED_TO|IS_A {source: 'SYNTHETIC'}]->() DELETE r")
+    bump_cache_versions("jobs", "ontology", *[f"resume:{resume_id}" for resume_id in resume_ids])
+
+    for f in db["fs.files"].find({"synthetic": True}, {"_id": 1}):
+        fs.delete(ObjectId(f["_id"]))
+    raw_ids = [d["parsed_raw_id"] for d in db["resumes"].find({"synthetic": True, "parsed_raw_id": {"$exists": True}}, {"parsed_raw_id": 1})]
+    for batch in _batched(raw_ids, batch_size):
+        db[RESUMES_RAW_COLLECTION].delete_many({"_id": {"$in": batch}})
+    db["resumes"].delete_many({"synthetic": True})
+    db["JD_skills"].delete_many({"synthetic": True})
+    record_text_changes("resumes", resume_ids)
+    record_text_changes("jobs", job_ids)
+    print(f"🧹 Purged {len(resume_ids)} synthetic resumes and {len(job_ids)} synthetic jobs.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate and bulk-load a synthetic Resume Matcher dataset.")
+    parser.add_argument("--resumes", type=int, default=1000, help="number of resumes (N)")
+    parser.add_argument("--jobs", type=int, default=200, help="number of job descriptions (M)")
+    parser.add_argument("--skills", type=int, default=500, help="size of the synthetic skill vocabulary")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for skill popularity")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--no-pdfs", action="store_true", help="skip PDF rendering and GridFS uploads")
+    parser.add_argument("--no-load", action="store_true", help="generate only; do not write to MongoDB/Neo4j")
+    parser.add_argument("--out-dir", help="also write raw JSON, jobs, ontology and PDFs to this folder")
+    parser.add_argument("--purge", action="store_true", help="delete previously loaded synthetic data and exit")
+    args = parser.parse_args()
+
+    if args.purge:
+        purge_synthetic_data()
+    else:
+        summary = generate_and_load(args.resumes, args.jobs, args.skills, seed=args.seed, batch_size=args.batch_size,
+                                    with_pdfs=not args.no_pdfs, load=not args.no_load, out_dir=args.out_dir,
+                                    zipf_exponent=args.zipf)
+        print(json.dumps(summary, indent=4))
@@ -0,0 +1,329 @@
+"""
+In-process BM25 full-text index (used for the "text" matching mode).
+
+One BM25Index holds an inverted index (term -> {doc_id: term frequency}) plus
+document lengths, and optional exact-match tags per document (e.g. skills) for
+filtering. Documents are added and removed one at a time, so callers keep
+it current as records are inserted; save()/load() persist it to disk so a
+restart only has to index what changed since. No LLM and no database involved.
+"""
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter, OrderedDict
+
+# Keeps "c++", "c#", "node.js", "asp.net" and "ci/cd"-style parts together
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each etc few for from further had has have having he her
+here hers him his how i if in into is it its itself just me more most my no nor not of off on once only or
+other our ours out over own per same she should so some such than that the their theirs them then there these
+they this those through to too under until up us very via was we were what when where which while who whom
+why will with within would you your yours
+""".split())
+
+FORMAT_VERSION = 3
+RANKED_CACHE_SIZE = 256  # per-term/per-tag orderings kept for conjunctive search
+
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords, single characters or trailing dots."""
+    if not text:
+        return []
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".")
+        if len(token) > 1 and token not in STOPWORDS and not token.isdigit():
+            tokens.append(token)
+    return tokens
+
+
+def normalize_tag(tag):
+    return " ".join(str(tag).lower().split())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index. Thread-safe; search cost is proportional
+    to the postings of the query's terms, not to the number of documents.
+    """
+
+    def __init__(self, name, k1=1.2, b=0.75):
+        self.name = name
+        self.k1 = k1
+        self.b = b
+        self.postings = {}   # term -> {doc_id: tf}
+        self.doc_len = {}    # doc_id -> number of tokens
+        self.doc_terms = {}  # doc_id -> its distinct terms, so removal only touches its own postings
+        self.tags = {}       # normalized tag -> set of doc_ids
+        self.doc_tags = {}   # doc_id -> its tags
+        self.total_len = 0
+        self.checkpoint = None  # sync checkpoint kept by the owner (e.g. the last change-log timestamp applied)
+        self.changes_since_save = 0
+        self.version = 0     # bumped on every change; invalidates the cached orderings
+        self._ranked_cache = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_len
+
+    def add(self, doc_id, text, tags=()):
+        """Indexes (or re-indexes) one document; tags are matched exactly (case-insensitive) by candidates()."""
+        counts = Counter(tokenize(text))
+        doc_tags = tuple({normalize_tag(tag) for tag in tags if tag} - {""})
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+            for tag in doc_tags:
+                self.tags.setdefault(tag, set()).add(doc_id)
+            if doc_tags:
+                self.doc_tags[doc_id] = doc_tags
+            length = sum(counts.values())
+            self.doc_len[doc_id] = length
+            self.doc_terms[doc_id] = tuple(counts)
+            self.total_len += length
+            self.changes_since_save += 1
+            self.version += 1
+
+    def remove(self, doc_id):
+        with self._lock:
+            if self._remove(doc_id):
+                self.changes_since_save += 1
+                self.version += 1
+
+    def _remove(self, doc_id):
+        length = self.doc_len.pop(doc_id, None)
+        if length is None:
+            return False
+        self.total_len -= length
+        for term in self.doc_terms.pop(doc_id, ()):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+        for tag in self.doc_tags.pop(doc_id, ()):
+            docs = self.tags.get(tag)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del self.tags[tag]
+        return True
+
+    def _idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_len) - df + 0.5) / (df + 0.5))
+
+    def query_terms(self, text, max_terms=None):
+        """
+        Distinct query terms weighted by their count in the query. Long queries
+        (a whole resume or job description) keep only the max_terms most
+        discriminative ones, which bounds search cost.
+        """
+        counts = Counter(tokenize(text))
+        with self._lock:
+            weighted = {term: (1 + math.log(qtf)) for term, qtf in counts.items() if term in self.postings}
+            if max_terms and len(weighted) > max_terms:
+                top = heapq.nlargest(max_terms, weighted, key=lambda term: weighted[term] * self._idf(term))
+                weighted = {term: weighted[term] for term in top}
+        return weighted
+
+    def candidates(self, terms=(), tags=()):
+        """
+        Documents containing every term and carrying every tag, or None when
+        neither is given. Intersects the smallest lists first.
+        """
+        with self._lock:
+            lists = [self.postings.get(term, {}) for term in dict.fromkeys(terms)]
+            lists += [self.tags.get(normalize_tag(tag), set()) for tag in dict.fromkeys(tags)]
+            if not lists:
+                return None
+            # Posting dicts are intersected through their key views: C-level, iterating the smaller side
+            lists = sorted((docs.keys() if isinstance(docs, dict) else docs for docs in lists), key=len)
+            if len(lists) == 1:
+                return set(lists[0])
+            result = lists[0] & lists[1]
+            for docs in lists[2:]:
+                if not result:
+                    break
+                result &= docs
+            return result
+
+    def scores(self, query_terms, doc_ids=None):
+        """BM25 score of every matching document (or only of doc_ids). Returns {doc_id: score}."""
+        with self._lock:
+            n_docs = len(self.doc_len)
+            if not n_docs:
+                return {}
+            avg_len = self.total_len / n_docs
+            only = set(doc_ids) if doc_ids is not None else None
+            scores = {}
+            for term, q_weight in query_terms.items():
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = self._idf(term) * q_weight
+                if only is not None and len(only) < len(docs):
+                    # Few candidates: look them up instead of walking the whole posting list
+                    pairs = ((doc_id, docs[doc_id]) for doc_id in only if doc_id in docs)
+                else:
+                    pairs = ((doc_id, tf) for doc_id, tf in docs.items() if only is None or doc_id in only)
+                for doc_id, tf in pairs:
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            return scores
+
+    def _cached(self, key, build):
+        with self._lock:
+            entry = self._ranked_cache.get(key)
+            if entry is None or entry[0] != self.version:
+                entry = (self.version, build())
+                self._ranked_cache[key] = entry
+                while len(self._ranked_cache) > RANKED_CACHE_SIZE:
+                    self._ranked_cache.popitem(last=False)
+            self._ranked_cache.move_to_end(key)
+            return entry[1]
+
+    def term_order(self, term):
+        """
+        (doc_ids by descending BM25 term weight, {doc_id: weight}) for one term,
+        cached until the index changes. The weight excludes idf, so a one-term
+        query's top-k is a slice of the list.
+        """
+        def build():
+            docs = self.postings.get(term, {})
+            avg_len = self.total_len / max(1, len(self.doc_len))
+            weights = {doc_id: tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avg_len))
+                       for doc_id, tf in docs.items()}
+            return sorted(weights, key=weights.__getitem__, reverse=True), weights
+        return self._cached(("term", term), build)
+
+    def tag_order(self, tag):
+        """The tag's doc_ids in descending order (newest first for time-ordered ids), cached."""
+        return self._cached(("tag", tag), lambda: sorted(self.tags.get(tag, ()), reverse=True))
+
+    def search_all(self, terms=(), tags=(), offset=0, limit=20):
+        """
+        Conjunctive search: documents containing every term and carrying every
+        tag, ranked by BM25 over the terms (by descending doc_id with tags only).
+        Returns (total_matches, [(doc_id, score or None), ...]) for the slice.
+        """
+        terms = list(dict.fromkeys(terms))
+        tags = [normalize_tag(tag) for tag in dict.fromkeys(tags)]
+        want = offset + limit
+        with self._lock:
+            if not terms and not tags:
+                return 0, []
+            if len(terms) > 1:
+                matches = self.candidates(terms, tags)
+                return len(matches), self._threshold_top(terms, matches, want)[offset:]
+
+            # One term (or tags only): walk a precomputed ordering instead of scoring every match
+            if terms:
+                order, weights = self.term_order(terms[0])
+                idf = self._idf(terms[0])
+                score = lambda doc_id: idf * weights[doc_id]
+                filters = tags
+            else:
+                order = self.tag_order(tags[0])
+                score = lambda doc_id: None
+                filters = tags[1:]
+            if not filters:
+                return len(order), [(doc_id, score(doc_id)) for doc_id in order[offset:want]]
+            matches = self.candidates(terms, tags)
+            if len(matches) * 8 < len(order):
+                # Selective filter: ranking the few matches beats scanning the ordering
+                ranked = sorted(matches, key=score, reverse=True) if terms else sorted(matches, reverse=True)
+                return len(matches), [(doc_id, score(doc_id)) for doc_id in ranked[offset:want]]
+            page = []
+            for doc_id in order:
+                if doc_id in matches:
+                    page.append(doc_id)
+                    if len(page) == want:
+                        break
+            return len(matches), [(doc_id, score(doc_id)) for doc_id in page[offset:]]
+
+    def _threshold_top(self, terms, matches, want):
+        """
+        Top `want` of matches by summed BM25 over terms, using the threshold
+        algorithm: walk every term's ordering in parallel and stop as soon as
+        the k-th best score beats the best score any unseen document could get.
+        """
+        lists = [(self._idf(term), *self.term_order(term)) for term in terms]
+        if len(matches) * 8 < min(len(order) for _, order, _ in lists):
+            # Few matches (rare combination or strict filter): scoring them all is cheaper than walking
+            scored = ((sum(idf * weights[doc_id] for idf, _, weights in lists), doc_id) for doc_id in matches)
+            return [(doc_id, score) for score, doc_id in heapq.nlargest(want, scored)]
+        top, seen = [], set()
+        for depth in range(min(len(order) for _, order, _ in lists)):
+            threshold = 0.0
+            for idf, order, weights in lists:
+                doc_id = order[depth]
+                threshold += idf * weights[doc_id]
+                if doc_id in matches and doc_id not in seen:
+                    seen.add(doc_id)
+                    item = (sum(i * w[doc_id] for i, _, w in lists), doc_id)
+                    if len(top) < want:
+                        heapq.heappush(top, item)
+                    elif item > top[0]:
+                        heapq.heapreplace(top, item)
+            if len(top) == want and top[0][0] >= threshold:
+                break
+        # Every match appears in the shortest ordering, so once it is exhausted all were seen
+        return [(doc_id, score) for score, doc_id in sorted(top, reverse=True)]
+
+    def search(self, query_terms, limit=10, exclude=()):
+        """Top `limit` (doc_id, score) pairs, best first."""
+        scores = self.scores(query_terms)
+        for doc_id in exclude:
+            scores.pop(doc_id, None)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def stats(self):
+        with self._lock:
+            return {"documents": len(self.doc_len), "terms": len(self.postings), "tags": len(self.tags),
+                    "avg_doc_length": round(self.total_len / len(self.doc_len), 1) if self.doc_len else 0,
+                    "unsaved_changes": self.changes_since_save}
+
+    # --- persistence ---
+    def save(self, path):
+        """Writes the index atomically (temp file + rename), so a crash never leaves a torn file."""
+        with self._lock:
+            state = {"format": FORMAT_VERSION, "name": self.name, "k1": self.k1, "b": self.b,
+                     "postings": self.postings, "doc_len": self.doc_len, "doc_terms": self.doc_terms,
+                     "tags": self.tags, "doc_tags": self.doc_tags,
+                     "total_len": self.total_len, "checkpoint": self.checkpoint}
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self.changes_since_save = 0
+
+    @classmethod
+    def load(cls, path, name):
+        """The index saved at path, or None if it is missing or from another format version."""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if not isinstance(state, dict) or state.get("format") != FORMAT_VERSION:
+            return None
+        index = cls(name, k1=state["k1"], b=state["b"])
+        index.postings = state["postings"]
+        index.doc_len = state["doc_len"]
+        index.doc_terms = state["doc_terms"]
+        index.tags = state["tags"]
+        index.doc_tags = state["doc_tags"]
+        index.total_len = state["total_len"]
+        index.checkpoint = state["checkpoint"]
+        return index
@@ -5,4 +5,25 @@ const API = axios.create({
   baseURL: "http://127.0.0.1:8000",
 });
 
+// Attach the session token from /login/ so the backend can skip password checks
+API.interceptors.request.use((config) => {
+  const token = localStorage.getItem("token");
+  if (token) config.headers.Authorization = `Bearer ${token}`;
+  return config;
+});
+
+// An expired or rejected session (e.g. the server restarted with a new secret)
+// sends the user back to the login page instead of failing every request
+API.interceptors.response.use(
+  (response) => response,
+  (error) => {
+    const url = (error.config && error.config.url) || "";
+    if (error.response && error.response.status === 401 && !url.startsWith("/login")) {
+      localStorage.clear();
+      if (window.location.pathname !== "/") window.location.assign("/");
+    }
+    return Promise.reject(error);
+  }
+);
+
 export default API;
@@ -21,6 +21,8 @@ const Login = () => {
       if (res.data.status === "success") {
         // Save username to localStorage so we can fetch user's saved resume later
         localStorage.setItem("username", username);
+        // Session token: sent as a Bearer header on every later request (see api.js)
+        if (res.data.token) localStorage.setItem("token", res.data.token);
 
         alert("✅ Login successful!");
         if (res.data.role === "admin") {